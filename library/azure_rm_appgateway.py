@@ -423,7 +423,6 @@ id:
     sample: id
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from copy import deepcopy
 from ansible.module_utils.network.common.utils import dict_merge
@@ -808,11 +807,10 @@ class AzureRMApplicationGateways(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_applicationgateway()
+            poller = self.delete_applicationgateway()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_applicationgateway():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_applicationgateway, poller)
         else:
             self.log("Application Gateway instance unchanged")
             self.results['changed'] = False
@@ -847,7 +845,7 @@ class AzureRMApplicationGateways(AzureRMModuleBase):
         '''
         Deletes specified Application Gateway instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the Application Gateway instance {0}".format(self.name))
         try:
@@ -857,7 +855,7 @@ class AzureRMApplicationGateways(AzureRMModuleBase):
             self.log('Error attempting to delete the Application Gateway instance.')
             self.fail("Error deleting the Application Gateway instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_applicationgateway(self):
         '''
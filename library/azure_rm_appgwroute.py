@@ -88,7 +88,6 @@ id:
     sample: /subscriptions/subid/resourceGroups/rg1/providers/Microsoft.Network/routeTables/testrt/routes/route1
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -236,11 +235,10 @@ class AzureRMRoutes(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_route()
+            poller = self.delete_route()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_route():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_route, poller)
         else:
             self.log("Route instance unchanged")
             self.results['changed'] = False
@@ -276,7 +274,7 @@ class AzureRMRoutes(AzureRMModuleBase):
         '''
         Deletes specified Route instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the Route instance {0}".format(self.route_name))
         try:
@@ -287,7 +285,7 @@ class AzureRMRoutes(AzureRMModuleBase):
             self.log('Error attempting to delete the Route instance.')
             self.fail("Error deleting the Route instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_route(self):
         '''
@@ -105,7 +105,6 @@ id:
     sample: /subscriptions/subid/resourceGroups/rg1/providers/Microsoft.Network/routeTables/testrt
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -253,11 +252,10 @@ class AzureRMRouteTables(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_routetable()
+            poller = self.delete_routetable()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_routetable():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_routetable, poller)
         else:
             self.log("Route Table instance unchanged")
             self.results['changed'] = False
@@ -292,7 +290,7 @@ class AzureRMRouteTables(AzureRMModuleBase):
         '''
         Deletes specified Route Table instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the Route Table instance {0}".format(self.route_table_name))
         try:
@@ -302,7 +300,7 @@ class AzureRMRouteTables(AzureRMModuleBase):
             self.log('Error attempting to delete the Route Table instance.')
             self.fail("Error deleting the Route Table instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_routetable(self):
         '''
@@ -364,7 +364,7 @@ class AzureRMContainerRegistry(AzureRMModuleBase):
         '''
         self.log("Deleting the container registry instance {0}".format(self.name))
         try:
-            self.containerregistry_client.registries.delete(self.resource_group, self.name).wait()
+            self.get_poller_result(self.containerregistry_client.registries.delete(self.resource_group, self.name))
         except CloudError as e:
             self.log('Error attempting to delete the container registry instance.')
             self.fail("Error deleting the container registry instance: {0}".format(str(e)))
@@ -76,7 +76,6 @@ status:
     contains:
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -210,11 +209,10 @@ class AzureRMReplications(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_replication()
+            poller = self.delete_replication()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_replication():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_replication, poller)
         else:
             self.log("Replication instance unchanged")
             self.results['changed'] = False
@@ -257,7 +255,7 @@ class AzureRMReplications(AzureRMModuleBase):
         '''
         Deletes specified Replication instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the Replication instance {0}".format(self.replication_name))
         try:
@@ -268,7 +266,7 @@ class AzureRMReplications(AzureRMModuleBase):
             self.log('Error attempting to delete the Replication instance.')
             self.fail("Error deleting the Replication instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_replication(self):
         '''
@@ -91,7 +91,6 @@ status:
     sample: enabled
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -252,11 +251,10 @@ class AzureRMWebhooks(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_webhook()
+            poller = self.delete_webhook()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_webhook():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_webhook, poller)
         else:
             self.log("Webhook instance unchanged")
             self.results['changed'] = False
@@ -299,7 +297,7 @@ class AzureRMWebhooks(AzureRMModuleBase):
         '''
         Deletes specified Webhook instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the Webhook instance {0}".format(self.webhook_name))
         try:
@@ -310,7 +308,7 @@ class AzureRMWebhooks(AzureRMModuleBase):
             self.log('Error attempting to delete the Webhook instance.')
             self.fail("Error deleting the Webhook instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_webhook(self):
         '''
@@ -538,7 +538,7 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
         """
         try:
             result = self.rm_client.resource_groups.delete(self.resource_group_name)
-            result.wait()  # Blocking wait till the delete is finished
+            self.get_poller_result(result)  # Blocking wait till the delete is finished
         except CloudError as e:
             if e.status_code == 404 or e.status_code == 204:
                 return
@@ -228,11 +228,11 @@ class AzureRMFunctionApp(AzureRMModuleBase):
                 self.results['state'] = function_app.as_dict()
             elif self.results['changed']:
                 try:
-                    new_function_app = self.web_client.web_apps.create_or_update(
+                    new_function_app = self.get_poller_result(self.web_client.web_apps.create_or_update(
                         resource_group_name=self.resource_group,
                         name=self.name,
                         site_envelope=function_app
-                    ).result()
+                    ))
                     self.results['state'] = new_function_app.as_dict()
                 except CloudError as exc:
                     self.fail('Error creating or updating web app: {}'.format(exc))
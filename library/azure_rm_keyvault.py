@@ -185,7 +185,6 @@ id:
 '''
 
 import collections
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -421,11 +420,10 @@ class AzureRMVaults(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_keyvault()
+            poller = self.delete_keyvault()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_keyvault():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_keyvault, poller)
         else:
             self.log("Key Vault instance unchanged")
             self.results['changed'] = False
@@ -460,7 +458,7 @@ class AzureRMVaults(AzureRMModuleBase):
         '''
         Deletes specified Key Vault instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the Key Vault instance {0}".format(self.vault_name))
         try:
@@ -470,7 +468,7 @@ class AzureRMVaults(AzureRMModuleBase):
             self.log('Error attempting to delete the Key Vault instance.')
             self.fail("Error deleting the Key Vault instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_keyvault(self):
         '''
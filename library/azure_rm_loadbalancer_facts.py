@@ -47,6 +47,13 @@ options:
     tags:
         description:
             - Limit results by providing a list of tags. Format tags as 'key' or 'key:value'.
+    select:
+        description:
+            - List of fields returned in C(azure_loadbalancers), as dotted paths of the serialized object like C(properties.frontendIPConfigurations).
+            - Only the selected fields are serialized, which is much faster for big load balancers with many rules.
+            - All fields are returned when not set.
+        type: list
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -72,6 +79,13 @@ EXAMPLES = '''
       azure_rm_loadbalancer_facts:
         tags:
           - testing
+
+    - name: Get the frontend IP configurations of all load balancers in a specific resource group
+      azure_rm_loadbalancer_facts:
+        resource_group: TestRG
+        select:
+          - name
+          - properties.frontendIPConfigurations
 '''
 
 RETURN = '''
@@ -101,7 +115,8 @@ class AzureRMLoadBalancerFacts(AzureRMModuleBase):
         self.module_args = dict(
             name=dict(type='str'),
             resource_group=dict(type='str'),
-            tags=dict(type='list')
+            tags=dict(type='list'),
+            select=dict(type='list')
         )
 
         self.results = dict(
@@ -114,6 +129,7 @@ class AzureRMLoadBalancerFacts(AzureRMModuleBase):
         self.name = None
         self.resource_group = None
         self.tags = None
+        self.select = None
 
         super(AzureRMLoadBalancerFacts, self).__init__(
             derived_arg_spec=self.module_args,
@@ -147,7 +163,7 @@ class AzureRMLoadBalancerFacts(AzureRMModuleBase):
             pass
 
         if item and self.has_tags(item.tags, self.tags):
-            result = [self.serialize_obj(item, AZURE_OBJECT_CLASS)]
+            result = [self.serialize_fields(item, AZURE_OBJECT_CLASS, self.select)]
 
         return result
 
@@ -170,7 +186,7 @@ class AzureRMLoadBalancerFacts(AzureRMModuleBase):
         results = []
         for item in response:
             if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
+                results.append(self.serialize_fields(item, AZURE_OBJECT_CLASS, self.select))
 
         return results
 
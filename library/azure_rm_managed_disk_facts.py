@@ -121,6 +121,9 @@ except Exception:
     pass
 
 
+AZURE_RESOURCE_TYPE = 'Microsoft.Compute/disks'
+
+
 # duplicated in azure_rm_managed_disk
 def managed_disk_to_dict(managed_disk):
     create_data = managed_disk.creation_data
@@ -150,7 +153,7 @@ class AzureRMManagedDiskFacts(AzureRMModuleBase):
                 type='str'
             ),
             tags=dict(
-                type='str'
+                type='list'
             ),
         )
         self.results = dict(
@@ -200,29 +203,26 @@ class AzureRMManagedDiskFacts(AzureRMModuleBase):
     def list_items(self):
         """Get all managed disks"""
         try:
-            response = self.compute_client.disks.list()
+            response = self.list_resources(self.compute_client.disks.list,
+                                           resource_type=AZURE_RESOURCE_TYPE,
+                                           get_fn=self.compute_client.disks.get,
+                                           tags=self.tags)
+            return [managed_disk_to_dict(item) for item in response]
         except CloudError as exc:
             self.fail('Failed to list all items - {}'.format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(managed_disk_to_dict(item))
-        return results
-
     def list_items_by_resource_group(self):
         """Get managed disks in a resource group"""
         try:
-            response = self.compute_client.disks.list_by_resource_group(resource_group_name=self.resource_group)
+            response = self.list_resources(lambda: self.compute_client.disks.list_by_resource_group(resource_group_name=self.resource_group),
+                                           resource_type=AZURE_RESOURCE_TYPE,
+                                           get_fn=self.compute_client.disks.get,
+                                           resource_group=self.resource_group,
+                                           tags=self.tags)
+            return [managed_disk_to_dict(item) for item in response]
         except CloudError as exc:
             self.fail('Failed to list items by resource group - {}'.format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(managed_disk_to_dict(item))
-        return results
-
 
 def main():
     """Main module execution code path"""
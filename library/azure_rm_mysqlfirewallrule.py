@@ -75,7 +75,6 @@ id:
     sample: /subscriptions/xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx/resourceGroups/TestGroup/providers/Microsoft.DBforMySQL/servers/testserver/firewallRules/rule1
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -188,11 +187,10 @@ class AzureRMFirewallRules(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_firewallrule()
+            poller = self.delete_firewallrule()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_firewallrule():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_firewallrule, poller)
         else:
             self.log("MySQL firewall rule instance unchanged")
             self.results['changed'] = False
@@ -229,7 +227,7 @@ class AzureRMFirewallRules(AzureRMModuleBase):
         '''
         Deletes specified MySQL firewall rule instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the MySQL firewall rule instance {0}".format(self.name))
         try:
@@ -240,7 +238,7 @@ class AzureRMFirewallRules(AzureRMModuleBase):
             self.log('Error attempting to delete the MySQL firewall rule instance.')
             self.fail("Error deleting the MySQL firewall rule instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_firewallrule(self):
         '''
@@ -132,7 +132,6 @@ fully_qualified_domain_name:
     sample: mysqlsrv1b6dd89593.mysql.database.azure.com
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -288,11 +287,10 @@ class AzureRMServers(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_mysqlserver()
+            poller = self.delete_mysqlserver()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_mysqlserver():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_mysqlserver, poller)
         else:
             self.log("MySQL Server instance unchanged")
             self.results['changed'] = False
@@ -336,7 +334,7 @@ class AzureRMServers(AzureRMModuleBase):
         '''
         Deletes specified MySQL Server instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the MySQL Server instance {0}".format(self.name))
         try:
@@ -346,7 +344,7 @@ class AzureRMServers(AzureRMModuleBase):
             self.log('Error attempting to delete the MySQL Server instance.')
             self.fail("Error deleting the MySQL Server instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_mysqlserver(self):
         '''
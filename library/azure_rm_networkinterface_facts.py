@@ -209,6 +209,7 @@ from ansible.module_utils.azure_rm_common import AzureRMModuleBase, azure_id_to_
 
 
 AZURE_OBJECT_CLASS = 'NetworkInterface'
+AZURE_RESOURCE_TYPE = 'Microsoft.Network/networkInterfaces'
 
 
 def nic_to_dict(nic):
@@ -297,8 +298,18 @@ class AzureRMNetworkInterfaceFacts(AzureRMModuleBase):
         else:
             results = self.list_all()
 
-        self.results['ansible_facts']['azure_networkinterfaces'] = self.serialize_nics(results)
-        self.results['networkinterfaces'] = self.to_dict_list(results)
+        # results may be a generator, both outputs are built in one pass without keeping the SDK objects
+        facts = []
+        nics = []
+        try:
+            for item in results:
+                facts.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
+                nics.append(nic_to_dict(item))
+        except Exception as exc:
+            self.fail("Error listing network interfaces - {0}".format(str(exc)))
+
+        self.results['ansible_facts']['azure_networkinterfaces'] = facts
+        self.results['networkinterfaces'] = nics
         return self.results
 
     def get_item(self):
@@ -313,25 +324,18 @@ class AzureRMNetworkInterfaceFacts(AzureRMModuleBase):
 
     def list_resource_group(self):
         self.log('List for resource group')
-        try:
-            response = self.network_client.network_interfaces.list(self.resource_group)
-            return [item for item in response if self.has_tags(item.tags, self.tags)]
-        except Exception as exc:
-            self.fail("Error listing by resource group {0} - {1}".format(self.resource_group, str(exc)))
+        return self.list_resources(lambda: self.network_client.network_interfaces.list(self.resource_group),
+                                   resource_type=AZURE_RESOURCE_TYPE,
+                                   get_fn=self.network_client.network_interfaces.get,
+                                   resource_group=self.resource_group,
+                                   tags=self.tags)
 
     def list_all(self):
         self.log('List all')
-        try:
-            response = self.network_client.network_interfaces.list_all()
-            return [item for item in response if self.has_tags(item.tags, self.tags)]
-        except Exception as exc:
-            self.fail("Error listing all - {0}".format(str(exc)))
-
-    def serialize_nics(self, raws):
-        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in raws] if raws else []
-
-    def to_dict_list(self, raws):
-        return [nic_to_dict(item) for item in raws] if raws else []
+        return self.list_resources(self.network_client.network_interfaces.list_all,
+                                   resource_type=AZURE_RESOURCE_TYPE,
+                                   get_fn=self.network_client.network_interfaces.get,
+                                   tags=self.tags)
 
 
 def main():
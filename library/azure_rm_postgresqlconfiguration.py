@@ -71,7 +71,6 @@ id:
             ns/array_nulls"
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -188,11 +187,10 @@ class AzureRMConfigurations(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_configuration()
+            poller = self.delete_configuration()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_configuration():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_configuration, poller)
         else:
             self.log("Configuration instance unchanged")
             self.results['changed'] = False
@@ -229,7 +227,7 @@ class AzureRMConfigurations(AzureRMModuleBase):
         '''
         Deletes specified Configuration instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the Configuration instance {0}".format(self.name))
         try:
@@ -238,7 +236,7 @@ class AzureRMConfigurations(AzureRMModuleBase):
             self.log('Error attempting to delete the Configuration instance.')
             self.fail("Error deleting the Configuration instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_configuration(self):
         '''
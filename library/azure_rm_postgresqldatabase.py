@@ -91,7 +91,6 @@ name:
     sample: db1
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -218,11 +217,10 @@ class AzureRMDatabases(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_postgresqldatabase()
+            poller = self.delete_postgresqldatabase()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_postgresqldatabase():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_postgresqldatabase, poller)
         else:
             self.log("PostgreSQL Database instance unchanged")
             self.results['changed'] = False
@@ -259,7 +257,7 @@ class AzureRMDatabases(AzureRMModuleBase):
         '''
         Deletes specified PostgreSQL Database instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the PostgreSQL Database instance {0}".format(self.name))
         try:
@@ -270,7 +268,7 @@ class AzureRMDatabases(AzureRMModuleBase):
             self.log('Error attempting to delete the PostgreSQL Database instance.')
             self.fail("Error deleting the PostgreSQL Database instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_postgresqldatabase(self):
         '''
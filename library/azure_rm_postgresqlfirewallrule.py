@@ -76,7 +76,6 @@ id:
             s/rule1"
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -189,11 +188,10 @@ class AzureRMFirewallRules(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_firewallrule()
+            poller = self.delete_firewallrule()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_firewallrule():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_firewallrule, poller)
         else:
             self.log("PostgreSQL firewall rule instance unchanged")
             self.results['changed'] = False
@@ -230,7 +228,7 @@ class AzureRMFirewallRules(AzureRMModuleBase):
         '''
         Deletes specified PostgreSQL firewall rule instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the PostgreSQL firewall rule instance {0}".format(self.name))
         try:
@@ -241,7 +239,7 @@ class AzureRMFirewallRules(AzureRMModuleBase):
             self.log('Error attempting to delete the PostgreSQL firewall rule instance.')
             self.fail("Error deleting the PostgreSQL firewall rule instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_firewallrule(self):
         '''
@@ -131,7 +131,6 @@ fully_qualified_domain_name:
     sample: postgresqlsrv1b6dd89593.postgresql.database.azure.com
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -287,11 +286,10 @@ class AzureRMServers(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_postgresqlserver()
+            poller = self.delete_postgresqlserver()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_postgresqlserver():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_postgresqlserver, poller)
         else:
             self.log("PostgreSQL Server instance unchanged")
             self.results['changed'] = False
@@ -337,7 +335,7 @@ class AzureRMServers(AzureRMModuleBase):
         '''
         Deletes specified PostgreSQL Server instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the PostgreSQL Server instance {0}".format(self.name))
         try:
@@ -347,7 +345,7 @@ class AzureRMServers(AzureRMModuleBase):
             self.log('Error attempting to delete the PostgreSQL Server instance.')
             self.fail("Error deleting the PostgreSQL Server instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_postgresqlserver(self):
         '''
@@ -159,7 +159,7 @@ publicipaddresses:
 '''
 try:
     from msrestazure.azure_exceptions import CloudError
-    from azure.common import AzureMissingResourceHttpError, AzureHttpError
+    from azure.common import AzureMissingResourceHttpError
 except Exception:
     # This is handled in azure_rm_common
     pass
@@ -167,6 +167,7 @@ except Exception:
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 AZURE_OBJECT_CLASS = 'PublicIp'
+AZURE_RESOURCE_TYPE = 'Microsoft.Network/publicIPAddresses'
 
 
 class AzureRMPublicIPFacts(AzureRMModuleBase):
@@ -208,27 +209,26 @@ class AzureRMPublicIPFacts(AzureRMModuleBase):
         else:
             result = self.list_all()
 
-        raw = self.filter(result)
+        # result may be a generator, both outputs are built in one pass without keeping the SDK objects
+        facts = []
+        pips = []
+        try:
+            for item in result:
+                facts.append(self.serialize(item))
+                pips.append(self.pip_to_dict(item))
+        except CloudError as exc:
+            self.fail("Error listing public IP addresses - {0}".format(str(exc)))
 
-        self.results['ansible_facts']['azure_publicipaddresses'] = self.serialize(raw)
-        self.results['publicipaddresses'] = self.format(raw)
+        self.results['ansible_facts']['azure_publicipaddresses'] = facts
+        self.results['publicipaddresses'] = pips
 
         return self.results
 
-    def format(self, raw):
-        return [self.pip_to_dict(item) for item in raw]
-
-    def serialize(self, raw):
-        results = []
-        for item in raw:
-            pip = self.serialize_obj(item, AZURE_OBJECT_CLASS)
-            pip['name'] = item.name
-            pip['type'] = item.type
-            results.append(pip)
-        return results
-
-    def filter(self, response):
-        return [item for item in response if self.has_tags(item.tags, self.tags)]
+    def serialize(self, item):
+        pip = self.serialize_obj(item, AZURE_OBJECT_CLASS)
+        pip['name'] = item.name
+        pip['type'] = item.type
+        return pip
 
     # duplicate with azure_rm_publicipaddress
     def pip_to_dict(self, pip):
@@ -263,23 +263,22 @@ class AzureRMPublicIPFacts(AzureRMModuleBase):
             item = self.network_client.public_ip_addresses.get(self.resource_group, self.name)
         except CloudError:
             pass
-        return [item] if item else []
+        return [item] if item and self.has_tags(item.tags, self.tags) else []
 
     def list_resource_group(self):
         self.log('List items in resource groups')
-        try:
-            response = self.network_client.public_ip_addresses.list(self.resource_group)
-        except AzureHttpError as exc:
-            self.fail("Error listing items in resource groups {0} - {1}".format(self.resource_group, str(exc)))
-        return response
+        return self.list_resources(lambda: self.network_client.public_ip_addresses.list(self.resource_group),
+                                   resource_type=AZURE_RESOURCE_TYPE,
+                                   get_fn=self.network_client.public_ip_addresses.get,
+                                   resource_group=self.resource_group,
+                                   tags=self.tags)
 
     def list_all(self):
         self.log('List all items')
-        try:
-            response = self.network_client.public_ip_addresses.list_all()
-        except AzureHttpError as exc:
-            self.fail("Error listing all items - {0}".format(str(exc)))
-        return response
+        return self.list_resources(self.network_client.public_ip_addresses.list_all,
+                                   resource_type=AZURE_RESOURCE_TYPE,
+                                   get_fn=self.network_client.public_ip_addresses.get,
+                                   tags=self.tags)
 
 
 def main():
@@ -90,6 +90,15 @@ options:
     default: 60
     type: int
     version_added: "2.8"
+  response_cache:
+    description:
+      - Keep the body and ETag of GET responses in C(~/.azure/ansible_rest_cache), one file per URL, for an hour.
+      - The files are only readable by the user. Paths returning keys or secrets, like C(listKeys) or C(secrets), are never stored.
+      - Later GETs of the same resource send C(If-None-Match) and reuse the stored body when it has not changed.
+      - Mostly useful together with I(idempotency).
+    default: no
+    type: bool
+    version_added: "2.8"
   state:
     description:
       - Assert the state of the resource. Use C(present) to create or update resource or C(absent) to delete resource.
@@ -97,6 +106,70 @@ options:
     choices:
         - absent
         - present
+  requests:
+    description:
+      - List of requests sent through the ARM batch API, up to 20 per call, instead of the single request described
+        by the other options.
+      - Options an item does not set, except I(url), default to the module level values.
+      - Idempotency checks of all items are batched as well. Long running operations started by an item are not
+        waited for.
+    type: list
+    elements: dict
+    version_added: "2.8"
+    suboptions:
+      url:
+        description:
+          - Azure RM Resource URL.
+        type: str
+      provider:
+        description:
+          - Provider type.
+        type: str
+      resource_group:
+        description:
+          - Resource group to be used.
+        type: str
+      resource_type:
+        description:
+          - Resource type.
+        type: str
+      resource_name:
+        description:
+          - Resource name.
+        type: str
+      subresource:
+        description:
+          - List of subresources, see the module option.
+        type: list
+      api_version:
+        description:
+          - Specific API version to be used.
+        type: str
+      method:
+        description:
+          - The HTTP method of the request.
+        type: str
+        choices: [ "GET", "PUT", "POST", "HEAD", "PATCH", "DELETE", "MERGE" ]
+      body:
+        description:
+          - The body of the http request.
+        type: raw
+      status_code:
+        description:
+          - Valid, numeric, HTTP status codes that signify success of the request.
+        type: list
+        elements: int
+      idempotency:
+        description:
+          - Check with a GET whether the resource already matches I(body) first.
+        type: bool
+      state:
+        description:
+          - Use C(present) to create or update the resource or C(absent) to delete it.
+        type: str
+        choices:
+          - absent
+          - present
 
 extends_documentation_fragment:
   - azure
@@ -115,6 +188,25 @@ EXAMPLES = '''
       resource_name: "{{ scaleset_name }}"
       api_version: "2017-12-01"
       body: "{{ body }}"
+
+  - name: Tag several network security groups in one call
+    azure_rm_resource:
+      resource_group: "{{ resource_group }}"
+      provider: network
+      resource_type: networksecuritygroups
+      api_version: "2018-02-01"
+      idempotency: yes
+      requests:
+        - resource_name: nsg1
+          body:
+            location: eastus
+            tags:
+              env: test
+        - resource_name: nsg2
+          body:
+            location: eastus
+            tags:
+              env: prod
 '''
 
 RETURN = '''
@@ -122,6 +214,23 @@ response:
     description: Response specific to resource type.
     returned: always
     type: dict
+responses:
+    description: Result of every item of I(requests), in the same order.
+    returned: when I(requests) is set
+    type: complex
+    contains:
+        url:
+            description: Resource URL of the item.
+            type: str
+        changed:
+            description: Whether the item was sent, or only checked when I(idempotency) is set.
+            type: bool
+        status_code:
+            description: HTTP status code of the item, or of its idempotency check when nothing was sent.
+            type: int
+        response:
+            description: Response specific to resource type.
+            type: dict
 '''
 
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
@@ -190,12 +299,22 @@ class AzureRMResource(AzureRMModuleBase):
                 type='int',
                 default=60
             ),
+            response_cache=dict(
+                type='bool',
+                default=False
+            ),
             state=dict(
                 type='str',
                 default='present',
                 choices=['present', 'absent']
             )
         )
+        # items of requests take the request options of the module, the ones they don't set keep the module values
+        self.request_arg_spec = dict((key, dict((k, v) for k, v in self.module_arg_spec[key].items() if k not in ['default', 'required']))
+                                     for key in ['url', 'provider', 'resource_group', 'resource_type', 'resource_name',
+                                                 'subresource', 'api_version', 'method', 'body', 'idempotency', 'state'])
+        self.request_arg_spec['status_code'] = dict(type='list', elements='int')
+        self.module_arg_spec['requests'] = dict(type='list', elements='dict', options=self.request_arg_spec)
         # store the results of the module operation
         self.results = dict(
             changed=False,
@@ -216,8 +335,10 @@ class AzureRMResource(AzureRMModuleBase):
         self.idempotency = False
         self.polling_timeout = None
         self.polling_interval = None
+        self.response_cache = False
         self.state = None
         self.body = None
+        self.requests = None
         super(AzureRMResource, self).__init__(self.module_arg_spec, supports_tags=False)
 
     def exec_module(self, **kwargs):
@@ -225,41 +346,21 @@ class AzureRMResource(AzureRMModuleBase):
             setattr(self, key, kwargs[key])
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        if self.response_cache:
+            self.mgmt_client.enable_response_cache()
+
+        if self.requests:
+            self.results['responses'] = self.exec_batch()
+            self.results['changed'] = any(item['changed'] for item in self.results['responses'])
+            return self.results
 
         if self.state == 'absent':
             self.method = 'DELETE'
             self.status_code.append(204)
 
         if self.url is None:
-            orphan = None
-            rargs = dict()
-            rargs['subscription'] = self.subscription_id
-            rargs['resource_group'] = self.resource_group
-            if not (self.provider is None or self.provider.lower().startswith('.microsoft')):
-                rargs['namespace'] = "Microsoft." + self.provider
-            else:
-                rargs['namespace'] = self.provider
-
-            if self.resource_type is not None and self.resource_name is not None:
-                rargs['type'] = self.resource_type
-                rargs['name'] = self.resource_name
-                for i in range(len(self.subresource)):
-                    resource_ns = self.subresource[i].get('namespace', None)
-                    resource_type = self.subresource[i].get('type', None)
-                    resource_name = self.subresource[i].get('name', None)
-                    if resource_type is not None and resource_name is not None:
-                        rargs['child_namespace_' + str(i + 1)] = resource_ns
-                        rargs['child_type_' + str(i + 1)] = resource_type
-                        rargs['child_name_' + str(i + 1)] = resource_name
-                    else:
-                        orphan = resource_type
-            else:
-                orphan = self.resource_type
-
-            self.url = resource_id(**rargs)
-
-            if orphan is not None:
-                self.url += '/' + orphan
+            self.url = self.build_url(self.provider, self.resource_group, self.resource_type, self.resource_name,
+                                      self.subresource)
         query_parameters = {}
         query_parameters['api-version'] = self.api_version
 
@@ -304,6 +405,121 @@ class AzureRMResource(AzureRMModuleBase):
 
         return self.results
 
+    def build_url(self, provider, resource_group, resource_type, resource_name, subresource):
+        orphan = None
+        rargs = dict()
+        rargs['subscription'] = self.subscription_id
+        rargs['resource_group'] = resource_group
+        if not (provider is None or provider.lower().startswith('.microsoft')):
+            rargs['namespace'] = "Microsoft." + provider
+        else:
+            rargs['namespace'] = provider
+
+        if resource_type is not None and resource_name is not None:
+            rargs['type'] = resource_type
+            rargs['name'] = resource_name
+            for i in range(len(subresource)):
+                resource_ns = subresource[i].get('namespace', None)
+                resource_type = subresource[i].get('type', None)
+                resource_name = subresource[i].get('name', None)
+                if resource_type is not None and resource_name is not None:
+                    rargs['child_namespace_' + str(i + 1)] = resource_ns
+                    rargs['child_type_' + str(i + 1)] = resource_type
+                    rargs['child_name_' + str(i + 1)] = resource_name
+                else:
+                    orphan = resource_type
+        else:
+            orphan = resource_type
+
+        url = resource_id(**rargs)
+
+        if orphan is not None:
+            url += '/' + orphan
+        return url
+
+    def get_batch_items(self):
+        '''
+        Settings of every item of requests, missing values taken from the module options. Ansible already validated
+        the items against request_arg_spec.
+        '''
+        items = []
+        for request in self.requests:
+            item = dict(url=None, provider=self.provider, resource_group=self.resource_group,
+                        resource_type=self.resource_type, resource_name=self.resource_name, subresource=self.subresource,
+                        api_version=self.api_version, method=self.method, body=self.body, status_code=self.status_code,
+                        idempotency=self.idempotency, state=self.state)
+            item.update((key, value) for key, value in request.items() if value is not None)
+
+            # the module level status codes are not converted by Ansible
+            item['status_code'] = [int(code) for code in item['status_code']]
+            if item['state'] == 'absent':
+                item['method'] = 'DELETE'
+                item['status_code'].append(204)
+            if not item['url']:
+                item['url'] = self.build_url(item['provider'], item['resource_group'], item['resource_type'],
+                                             item['resource_name'], item['subresource'] or [])
+            items.append(item)
+        return items
+
+    def exec_batch(self):
+        '''
+        Run the idempotency checks, then the changes, of all items through the ARM batch API.
+
+        :return: list of per item results
+        '''
+        items = self.get_batch_items()
+        results = [dict(url=item['url'], changed=True, status_code=None, response=None) for item in items]
+        errors = []
+
+        try:
+            checked = [index for index, item in enumerate(items) if item['idempotency']]
+            originals = self.mgmt_client.batch([dict(method='GET',
+                                                     url=items[index]['url'],
+                                                     query_parameters={'api-version': items[index]['api_version']})
+                                                for index in checked])
+            for index, original in zip(checked, originals):
+                item = items[index]
+                result = results[index]
+                result['status_code'] = original['status_code']
+                if original['status_code'] == 404:
+                    result['changed'] = item['state'] != 'absent'
+                elif original['status_code'] != 200:
+                    result['changed'] = False
+                    result['response'] = original['body']
+                    errors.append(index)
+                elif item['state'] == 'absent':
+                    # the resource exists and is deleted, its body doesn't matter
+                    result['response'] = original['body']
+                else:
+                    result['response'] = original['body']
+                    # a body that is not an object can't be compared, the item is sent
+                    if isinstance(original['body'], dict):
+                        result['changed'] = (dict_merge(original['body'], item['body']) != original['body'])
+
+            changed = [index for index, result in enumerate(results) if result['changed']]
+            responses = self.mgmt_client.batch([dict(method=items[index]['method'],
+                                                     url=items[index]['url'],
+                                                     query_parameters={'api-version': items[index]['api_version']},
+                                                     body=items[index]['body'])
+                                                for index in changed])
+        except CloudError as exc:
+            request_id = exc.request_id if exc.request_id else ''
+            self.fail("Error sending batch request, request id {0} - {1}".format(request_id, str(exc)), responses=results)
+        except Exception as exc:
+            self.fail("Error sending batch request - {0}".format(str(exc)), responses=results)
+
+        for index, response in zip(changed, responses):
+            result = results[index]
+            result['status_code'] = response['status_code']
+            result['response'] = response['body'] if items[index]['state'] == 'present' else None
+            if response['status_code'] not in items[index]['status_code']:
+                errors.append(index)
+
+        if errors:
+            self.fail("Batch request failed for {0}".format(', '.join(results[index]['url'] for index in sorted(errors))),
+                      responses=results)
+        return results
+
 
 def main():
     AzureRMResource()
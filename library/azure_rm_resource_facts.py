@@ -57,6 +57,27 @@ options:
       name:
         description:
           - Subresource name
+  response_cache:
+    description:
+      - Keep the body and ETag of GET responses in C(~/.azure/ansible_rest_cache), one file per URL, for an hour.
+      - The files are only readable by the user. Paths returning keys or secrets, like C(listKeys) or C(secrets), are never stored.
+      - Later GETs of the same resource send C(If-None-Match) and reuse the stored body when it has not changed.
+    default: no
+    type: bool
+    version_added: "2.8"
+  max_items:
+    description:
+      - Maximum number of items returned from a collection. No further pages are requested once it is reached.
+      - All items are returned when not set.
+      - Must be at least 1.
+    type: int
+    version_added: "2.8"
+  select:
+    description:
+      - List of fields returned for every item, as dotted paths like C(properties.provisioningState).
+      - Full items are returned when not set.
+    type: list
+    version_added: "2.8"
 
 extends_documentation_fragment:
   - azure
@@ -74,16 +95,27 @@ EXAMPLES = '''
       resource_type: virtualmachinescalesets
       resource_name: "{{ scaleset_name }}"
       api_version: "2017-12-01"
+
+  - name: Get names and states of all virtual networks in the subscription
+    azure_rm_resource_facts:
+      provider: network
+      resource_type: virtualnetworks
+      api_version: "2018-08-01"
+      select:
+        - name
+        - properties.provisioningState
 '''
 
 RETURN = '''
 response:
-    description: Response specific to resource type.
+    description:
+      - Response specific to resource type.
+      - For a collection, the items of all its pages.
     returned: always
-    type: dict
+    type: list
 '''
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, select_fields
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
 
 try:
@@ -123,6 +155,16 @@ class AzureRMResourceFacts(AzureRMModuleBase):
             api_version=dict(
                 type='str',
                 required=True
+            ),
+            response_cache=dict(
+                type='bool',
+                default=False
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            select=dict(
+                type='list'
             )
         )
         # store the results of the module operation
@@ -137,13 +179,20 @@ class AzureRMResourceFacts(AzureRMModuleBase):
         self.resource_type = None
         self.resource_name = None
         self.subresource = []
+        self.response_cache = False
+        self.max_items = None
+        self.select = None
         super(AzureRMResourceFacts, self).__init__(self.module_arg_spec, supports_tags=False)
 
     def exec_module(self, **kwargs):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
+        if self.max_items is not None and self.max_items < 1:
+            self.fail("max_items must be at least 1, got {0}".format(self.max_items))
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        if self.response_cache:
+            self.mgmt_client.enable_response_cache()
 
         if self.url is None:
             orphan = None
@@ -185,18 +234,53 @@ class AzureRMResourceFacts(AzureRMModuleBase):
         header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         response = self.mgmt_client.query(self.url, "GET", query_parameters, header_parameters, None, [200, 404], 0, 0)
+        pages = self.iter_items(response, header_parameters)
+        # the generator drops the raw response once parsed, don't keep it alive here
+        response = None
 
+        items = []
         try:
-            response = json.loads(response.text)
-            if response is list:
-                self.results['response'] = response
-            else:
-                self.results['response'] = [response]
-        except Exception:
-            self.results['response'] = []
+            for item in pages:
+                items.append(select_fields(item, self.select) if self.select else item)
+                if self.max_items is not None and len(items) >= self.max_items:
+                    break
+        except CloudError as exc:
+            request_id = exc.request_id if exc.request_id else ''
+            self.fail("Error getting next page of {0}, request id {1} - {2}".format(self.url, request_id, str(exc)))
+        self.results['response'] = items
 
         return self.results
 
+    def iter_items(self, response, header_parameters):
+        '''
+        Generator over the items of the response. A collection is followed through its nextLink pages, each page is
+        parsed only when the previous one has been consumed and is released afterwards.
+
+        :param response: response of the first request
+        :param header_parameters: headers sent with the requests for further pages
+        :return: generator of item dicts
+        '''
+        try:
+            page = json.loads(response.text)
+        except Exception:
+            return
+        response = None
+
+        if isinstance(page, list):
+            for item in page:
+                yield item
+        elif isinstance(page, dict) and isinstance(page.get('value'), list):
+            next_link = page.get('nextLink')
+            items = page['value']
+            page = None
+            for item in items:
+                yield item
+            if next_link:
+                for item in self.mgmt_client.query_pages(next_link, {}, header_parameters):
+                    yield item
+        else:
+            yield page
+
 
 def main():
     AzureRMResourceFacts()
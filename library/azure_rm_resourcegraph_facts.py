@@ -0,0 +1,229 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2018 Ansible Project
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: azure_rm_resourcegraph_facts
+version_added: "2.8"
+short_description: Query Azure resources with Azure Resource Graph.
+description:
+  - Run a Kusto query against Azure Resource Graph and return the matching rows.
+  - A single query can inventory resources of any type across many subscriptions, which is much faster than
+    listing every resource type in every resource group.
+  - Refer to https://docs.microsoft.com/en-us/azure/governance/resource-graph/ regarding the query language.
+
+options:
+  query:
+    description:
+      - Resource Graph query, for example C(Resources | where type =~ 'microsoft.compute/virtualmachines').
+    required: yes
+    type: str
+  subscriptions:
+    description:
+      - List of subscription IDs the query runs against.
+      - Defaults to the subscription of the current credentials.
+    type: list
+  max_items:
+    description:
+      - Maximum number of rows to return. No further pages are requested once it is reached.
+      - All rows are returned when not set.
+      - Must be at least 1.
+    type: int
+  page_size:
+    description:
+      - Number of rows requested per page.
+    default: 1000
+    type: int
+  api_version:
+    description:
+      - Resource Graph API version.
+    default: "2019-04-01"
+    type: str
+
+extends_documentation_fragment:
+  - azure
+
+author:
+  - "Ansible Project"
+
+'''
+
+EXAMPLES = '''
+  - name: Get all virtual machines, network interfaces and disks with their tags
+    azure_rm_resourcegraph_facts:
+      subscriptions:
+        - "{{ subscription_a }}"
+        - "{{ subscription_b }}"
+      query: >-
+        Resources
+        | where type in~ ('microsoft.compute/virtualmachines', 'microsoft.network/networkinterfaces', 'microsoft.compute/disks')
+        | project id, name, type, resourceGroup, subscriptionId, location, tags
+
+  - name: Count resources per type
+    azure_rm_resourcegraph_facts:
+      query: "Resources | summarize count() by type"
+'''
+
+RETURN = '''
+resources:
+    description: Rows returned by the query, one dict per row keyed by the projected columns.
+    returned: always
+    type: list
+    sample: [
+        {
+            "id": "/subscriptions/xxxx/resourceGroups/myResourceGroup/providers/Microsoft.Compute/virtualMachines/myVM",
+            "name": "myVM",
+            "type": "microsoft.compute/virtualmachines",
+            "tags": { "env": "prod" }
+        }
+    ]
+total_records:
+    description: Total number of rows matching the query, which may exceed the number of rows returned.
+    returned: always
+    type: int
+    sample: 1024
+'''
+
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+
+try:
+    from msrestazure.azure_exceptions import CloudError
+    import json
+
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+RESOURCE_GRAPH_URL = '/providers/Microsoft.ResourceGraph/resources'
+
+
+class AzureRMResourceGraphFacts(AzureRMModuleBase):
+    def __init__(self):
+        # define user inputs into argument
+        self.module_arg_spec = dict(
+            query=dict(
+                type='str',
+                required=True
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            page_size=dict(
+                type='int',
+                default=1000
+            ),
+            api_version=dict(
+                type='str',
+                default='2019-04-01'
+            )
+        )
+        # store the results of the module operation
+        self.results = dict(
+            changed=False,
+            resources=[],
+            total_records=0
+        )
+        self.mgmt_client = None
+        self.query = None
+        self.subscriptions = None
+        self.max_items = None
+        self.page_size = None
+        self.api_version = None
+        super(AzureRMResourceGraphFacts, self).__init__(self.module_arg_spec, supports_tags=False, facts_module=True)
+
+    def exec_module(self, **kwargs):
+        for key in self.module_arg_spec:
+            setattr(self, key, kwargs[key])
+        if self.max_items is not None and self.max_items < 1:
+            self.fail("max_items must be at least 1, got {0}".format(self.max_items))
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                    base_url=self._cloud_environment.endpoints.resource_manager)
+
+        resources = []
+        try:
+            for row in self.query_rows():
+                resources.append(row)
+                if self.max_items is not None and len(resources) >= self.max_items:
+                    break
+        except CloudError as exc:
+            request_id = exc.request_id if exc.request_id else ''
+            self.fail("Error running Resource Graph query, request id {0} - {1}".format(request_id, str(exc)))
+
+        self.results['resources'] = resources
+        return self.results
+
+    def query_rows(self):
+        '''
+        Generator over the rows of the query, requesting the next page with $skipToken only when the previous
+        one has been consumed.
+
+        :return: generator of row dicts
+        '''
+        query_parameters = {}
+        query_parameters['api-version'] = self.api_version
+
+        header_parameters = {}
+        header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+
+        body = dict(
+            subscriptions=self.subscriptions or [self.subscription_id],
+            query=self.query,
+            options=dict(resultFormat='objectArray')
+        )
+
+        yielded = 0
+        while True:
+            top = self.page_size
+            if self.max_items is not None:
+                # only ask for the rows still missing
+                top = min(top, self.max_items - yielded)
+            body['options']['$top'] = top
+
+            response = self.mgmt_client.query(RESOURCE_GRAPH_URL, 'POST', query_parameters, dict(header_parameters), body, [200], 0, 0)
+            page = json.loads(response.text)
+
+            self.results['total_records'] = page.get('totalRecords', 0)
+            for row in self.page_rows(page.get('data')):
+                yielded += 1
+                yield row
+
+            skip_token = page.get('$skipToken')
+            if not skip_token or (self.max_items is not None and yielded >= self.max_items):
+                break
+            body['options']['$skipToken'] = skip_token
+
+    @staticmethod
+    def page_rows(data):
+        '''
+        Rows of a response page. Older API versions ignore resultFormat and always answer with a table.
+        '''
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict) and 'columns' in data:
+            names = [column['name'] for column in data['columns']]
+            return [dict(zip(names, row)) for row in data.get('rows', [])]
+        return []
+
+
+def main():
+    AzureRMResourceGraphFacts()
+
+
+if __name__ == '__main__':
+    main()
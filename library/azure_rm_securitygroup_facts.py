@@ -36,6 +36,13 @@ options:
     tags:
         description:
             - Limit results by providing a list of tags. Format tags as 'key' or 'key:value'.
+    select:
+        description:
+            - List of fields returned in C(azure_securitygroups), as dotted paths of the serialized object like C(properties.securityRules).
+            - Only the selected fields are serialized, which is much faster for big security groups with many rules.
+            - All fields are returned when not set.
+        type: list
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -56,6 +63,14 @@ EXAMPLES = '''
       azure_rm_securitygroup_facts:
         resource_group: Testing
 
+    - name: Get the rules of a security group
+      azure_rm_securitygroup_facts:
+        resource_group: Testing
+        name: secgroup001
+        select:
+          - name
+          - properties.securityRules
+
 '''
 
 RETURN = '''
@@ -208,6 +223,7 @@ class AzureRMSecurityGroupFacts(AzureRMModuleBase):
             name=dict(type='str'),
             resource_group=dict(required=True, type='str'),
             tags=dict(type='list'),
+            select=dict(type='list')
         )
 
         self.results = dict(
@@ -218,6 +234,7 @@ class AzureRMSecurityGroupFacts(AzureRMModuleBase):
         self.name = None
         self.resource_group = None
         self.tags = None
+        self.select = None
 
         super(AzureRMSecurityGroupFacts, self).__init__(self.module_arg_spec,
                                                         supports_tags=False,
@@ -245,9 +262,7 @@ class AzureRMSecurityGroupFacts(AzureRMModuleBase):
             pass
 
         if item and self.has_tags(item.tags, self.tags):
-            grp = self.serialize_obj(item, AZURE_OBJECT_CLASS)
-            grp['name'] = item.name
-            result = [grp]
+            result = [self.serialize_group(item)]
 
         return result
 
@@ -261,11 +276,16 @@ class AzureRMSecurityGroupFacts(AzureRMModuleBase):
         results = []
         for item in response:
             if self.has_tags(item.tags, self.tags):
-                grp = self.serialize_obj(item, AZURE_OBJECT_CLASS)
-                grp['name'] = item.name
-                results.append(grp)
+                results.append(self.serialize_group(item))
         return results
 
+    def serialize_group(self, item):
+        if self.select:
+            return self.serialize_fields(item, AZURE_OBJECT_CLASS, self.select)
+        grp = self.serialize_obj(item, AZURE_OBJECT_CLASS)
+        grp['name'] = item.name
+        return grp
+
 
 def main():
     AzureRMSecurityGroupFacts()
@@ -193,7 +193,6 @@ status:
     sample: Online
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -402,11 +401,10 @@ class AzureRMDatabases(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_sqldatabase()
+            poller = self.delete_sqldatabase()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_sqldatabase():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_sqldatabase, poller)
         else:
             self.log("SQL Database instance unchanged")
             self.results['changed'] = False
@@ -444,7 +442,7 @@ class AzureRMDatabases(AzureRMModuleBase):
         '''
         Deletes specified SQL Database instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the SQL Database instance {0}".format(self.name))
         try:
@@ -455,7 +453,7 @@ class AzureRMDatabases(AzureRMModuleBase):
             self.log('Error attempting to delete the SQL Database instance.')
             self.fail("Error deleting the SQL Database instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_sqldatabase(self):
         '''
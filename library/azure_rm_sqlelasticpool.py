@@ -94,7 +94,6 @@ state:
     sample: Ready
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -243,11 +242,10 @@ class AzureRMElasticPools(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_elasticpool()
+            poller = self.delete_elasticpool()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_elasticpool():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_elasticpool, poller)
         else:
             self.log("ElasticPool instance unchanged")
             self.results['changed'] = False
@@ -284,7 +282,7 @@ class AzureRMElasticPools(AzureRMModuleBase):
         '''
         Deletes specified ElasticPool instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the ElasticPool instance {0}".format(self.name))
         try:
@@ -295,7 +293,7 @@ class AzureRMElasticPools(AzureRMModuleBase):
             self.log('Error attempting to delete the ElasticPool instance.')
             self.fail("Error deleting the ElasticPool instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_elasticpool(self):
         '''
@@ -77,7 +77,6 @@ id:
              5/firewallRules/firewallrulecrudtest-5370"
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -186,11 +185,10 @@ class AzureRMFirewallRules(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_firewallrule()
+            poller = self.delete_firewallrule()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_firewallrule():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_firewallrule, poller)
         else:
             self.log("Firewall Rule instance unchanged")
             self.results['changed'] = False
@@ -227,7 +225,7 @@ class AzureRMFirewallRules(AzureRMModuleBase):
         '''
         Deletes specified Firewall Rule instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the Firewall Rule instance {0}".format(self.name))
         try:
@@ -238,7 +236,7 @@ class AzureRMFirewallRules(AzureRMModuleBase):
             self.log('Error attempting to delete the Firewall Rule instance.')
             self.fail("Error deleting the Firewall Rule instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_firewallrule(self):
         '''
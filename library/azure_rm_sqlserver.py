@@ -101,7 +101,6 @@ fully_qualified_domain_name:
     sample: sqlcrudtest-4645.database.windows.net
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -236,11 +235,10 @@ class AzureRMServers(AzureRMModuleBase):
             if self.check_mode:
                 return self.results
 
-            self.delete_sqlserver()
+            poller = self.delete_sqlserver()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_sqlserver():
-                time.sleep(20)
+            self.wait_for_deletion(self.get_sqlserver, poller)
         else:
             self.log("SQL Server instance unchanged")
             self.results['changed'] = False
@@ -278,7 +276,7 @@ class AzureRMServers(AzureRMModuleBase):
         '''
         Deletes specified SQL Server instance in the specified subscription and resource group.
 
-        :return: True
+        :return: delete poller or response
         '''
         self.log("Deleting the SQL Server instance {0}".format(self.name))
         try:
@@ -288,7 +286,7 @@ class AzureRMServers(AzureRMModuleBase):
             self.log('Error attempting to delete the SQL Server instance.')
             self.fail("Error deleting the SQL Server instance: {0}".format(str(e)))
 
-        return True
+        return response
 
     def get_sqlserver(self):
         '''
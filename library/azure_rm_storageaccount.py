@@ -560,7 +560,10 @@ class AzureRMStorageAccount(AzureRMModuleBase):
         not be deleted.
         '''
         self.log('Checking for existing blob containers')
-        blob_service = self.get_blob_client(self.resource_group, self.name)
+        try:
+            blob_service = self.get_blob_client(self.resource_group, self.name)
+        except Exception as exc:
+            self.fail(str(exc))
         try:
             response = blob_service.list_containers()
         except AzureMissingResourceHttpError:
@@ -49,6 +49,13 @@ options:
             - Note that it will cost a lot time when list all storageaccount rather than querry a single one.
         type: bool
         version_added: "2.8"
+    concurrency:
+        description:
+            - Maximum number of storage accounts whose keys and blob CORS settings are retrieved at the same time.
+            - Only used with I(show_connection_string) or I(show_blob_cors).
+        type: int
+        default: 8
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -294,7 +301,8 @@ class AzureRMStorageAccountFacts(AzureRMModuleBase):
             resource_group=dict(type='str', aliases=['resource_group_name']),
             tags=dict(type='list'),
             show_connection_string=dict(type='bool'),
-            show_blob_cors=dict(type='bool')
+            show_blob_cors=dict(type='bool'),
+            concurrency=dict(type='int', default=8)
         )
 
         self.results = dict(
@@ -308,6 +316,7 @@ class AzureRMStorageAccountFacts(AzureRMModuleBase):
         self.tags = None
         self.show_connection_string = None
         self.show_blob_cors = None
+        self.concurrency = None
 
         super(AzureRMStorageAccountFacts, self).__init__(self.module_arg_spec,
                                                          supports_tags=False,
@@ -357,7 +366,7 @@ class AzureRMStorageAccountFacts(AzureRMModuleBase):
     def list_all(self):
         self.log('List all items')
         try:
-            response = self.storage_client.storage_accounts.list_by_resource_group(self.resource_group)
+            response = self.storage_client.storage_accounts.list()
         except Exception as exc:
             self.fail("Error listing all items - {0}".format(str(exc)))
 
@@ -370,9 +379,23 @@ class AzureRMStorageAccountFacts(AzureRMModuleBase):
         return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in raw]
 
     def format_to_dict(self, raw):
-        return [self.account_obj_to_dict(item) for item in raw]
-
-    def account_obj_to_dict(self, account_obj, blob_service_props=None):
+        concurrency = self.concurrency if self.show_connection_string or self.show_blob_cors else 1
+        extras = self.map_concurrently(self.get_account_extras, raw, concurrency)
+        return [self.account_obj_to_dict(item, account_key, blob_service_props)
+                for item, (account_key, blob_service_props) in zip(raw, extras)]
+
+    def get_account_extras(self, account_obj):
+        '''
+        Fetch the keys and blob service properties of an account. Runs on worker threads and never fails.
+
+        :param account_obj: StorageAccount object
+        :return: tuple of the account keys and the blob service properties
+        '''
+        resource_group = self.parse_resource_to_dict(account_obj.id).get('resource_group')
+        return (self.get_connectionstring(resource_group, account_obj.name),
+                self.get_blob_service_props(resource_group, account_obj.name))
+
+    def account_obj_to_dict(self, account_obj, account_key, blob_service_props):
         account_dict = dict(
             id=account_obj.id,
             name=account_obj.name,
@@ -393,7 +416,6 @@ class AzureRMStorageAccountFacts(AzureRMModuleBase):
 
         id_dict = self.parse_resource_to_dict(account_obj.id)
         account_dict['resource_group'] = id_dict.get('resource_group')
-        account_key = self.get_connectionstring(account_dict['resource_group'], account_dict['name'])
         account_dict['custom_domain'] = None
         if account_obj.custom_domain:
             account_dict['custom_domain'] = dict(
@@ -411,14 +433,13 @@ class AzureRMStorageAccountFacts(AzureRMModuleBase):
         account_dict['secondary_endpoints'] = None
         if account_obj.secondary_endpoints:
             account_dict['secondary_endpoints'] = dict(
-                blob=self.format_endpoint_dict(account_dict['name'], account_key[1], account_obj.primary_endpoints.blob, 'blob'),
-                queue=self.format_endpoint_dict(account_dict['name'], account_key[1], account_obj.primary_endpoints.queue, 'queue'),
-                table=self.format_endpoint_dict(account_dict['name'], account_key[1], account_obj.primary_endpoints.table, 'table'),
+                blob=self.format_endpoint_dict(account_dict['name'], account_key[1], account_obj.secondary_endpoints.blob, 'blob'),
+                queue=self.format_endpoint_dict(account_dict['name'], account_key[1], account_obj.secondary_endpoints.queue, 'queue'),
+                table=self.format_endpoint_dict(account_dict['name'], account_key[1], account_obj.secondary_endpoints.table, 'table'),
             )
         account_dict['tags'] = None
         if account_obj.tags:
             account_dict['tags'] = account_obj.tags
-        blob_service_props = self.get_blob_service_props(account_dict['resource_group'], account_dict['name'])
         if blob_service_props and blob_service_props.cors and blob_service_props.cors.cors_rules:
             account_dict['blob_cors'] = [dict(
                 allowed_origins=to_native(x.allowed_origins),
@@ -253,7 +253,10 @@ class AzureRMStorageBlob(AzureRMModuleBase):
 
         # add file path validation
 
-        self.blob_client = self.get_blob_client(self.resource_group, self.storage_account_name, self.blob_type)
+        try:
+            self.blob_client = self.get_blob_client(self.resource_group, self.storage_account_name, self.blob_type)
+        except Exception as exc:
+            self.fail(str(exc))
         self.container_obj = self.get_container()
 
         if self.blob is not None:
@@ -42,7 +42,7 @@ options:
     name:
         description:
             - Name of the virtual machine.
-        required: true
+            - Required unless I(vms) is given.
     custom_data:
         description:
             - Data which is made available to the virtual machine and used by e.g., cloud-init.
@@ -312,6 +312,31 @@ options:
             - A list of Availability Zones for your virtual machine
         type: list
         version_added: "2.8"
+    refresh_lookup_cache:
+        description:
+            - Look up the VM size, the image version and custom images again instead of using the cached results.
+            - Lookups are cached in C(~/.azure/ansible_lookup_cache.json) for an hour. Set the environment variable
+              C(ANSIBLE_AZURE_LOOKUP_CACHE=false) to disable the cache.
+        type: bool
+        default: no
+        version_added: "2.8"
+    vms:
+        description:
+            - List of virtual machines managed by this task, instead of the single one named by I(name).
+            - Every item is a dictionary of the options of this module, at least I(name). Options missing from an item
+              take the value given to the module.
+            - Items are validated like the module options, and I(admin_password) is kept out of the logs.
+            - The virtual machines are managed concurrently, each one creating its public IP, network interface and
+              other default resources as soon as it can, so their long running operations overlap.
+        type: list
+        elements: dict
+        version_added: "2.8"
+    concurrency:
+        description:
+            - Maximum number of virtual machines of I(vms) managed at the same time.
+        type: int
+        default: 8
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -515,9 +540,52 @@ EXAMPLES = '''
     admin_password: password01
     image: customimage001
     zones: [1]
+
+- name: Create three VMs in one task
+  azure_rm_virtualmachine:
+    resource_group: Testing
+    vm_size: Standard_DS1_v2
+    admin_username: adminUser
+    ssh_password_enabled: false
+    ssh_public_keys:
+      - path: /home/adminUser/.ssh/authorized_keys
+        key_data: < insert yor ssh public key here... >
+    image:
+      offer: CentOS
+      publisher: OpenLogic
+      sku: '7.1'
+      version: latest
+    vms:
+      - name: node01
+      - name: node02
+      - name: node03
+        vm_size: Standard_DS2_v2
 '''
 
 RETURN = '''
+vms:
+    description: Result of every item of I(vms), in the same order.
+    returned: when I(vms) is given
+    type: complex
+    contains:
+        name:
+            description: Name of the virtual machine.
+            type: str
+        changed:
+            description: Whether the virtual machine was changed.
+            type: bool
+        powerstate_change:
+            description: Power state change applied to the virtual machine.
+            type: str
+        azure_vm:
+            description: Facts about the current state of the virtual machine, see I(azure_vm).
+            type: dict
+        failed:
+            description: Whether managing the virtual machine failed.
+            type: bool
+        msg:
+            description: Error message when managing the virtual machine failed.
+            type: str
 powerstate:
     description: Indicates if the state is running, stopped, deallocated, generalized
     returned: always
@@ -683,6 +751,7 @@ azure_vm:
 '''  # NOQA
 
 import base64
+import copy
 import random
 import re
 
@@ -702,6 +771,17 @@ AZURE_OBJECT_CLASS = 'VirtualMachine'
 
 AZURE_ENUM_MODULES = ['azure.mgmt.compute.models']
 
+# VHD blobs deleted at the same time
+AZURE_BLOB_DELETE_CONCURRENCY = 8
+
+
+class AzureRMVirtualMachineError(Exception):
+    pass
+
+
+def raise_vm_error(msg, **kwargs):
+    raise AzureRMVirtualMachineError(msg)
+
 
 def extract_names_from_blob_uri(blob_uri, storage_suffix):
     # HACK: ditch this once python SDK supports get by URI
@@ -719,7 +799,7 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
 
         self.module_arg_spec = dict(
             resource_group=dict(type='str', required=True),
-            name=dict(type='str', required=True),
+            name=dict(type='str'),
             custom_data=dict(type='str'),
             state=dict(choices=['present', 'absent'], default='present', type='str'),
             location=dict(type='str'),
@@ -755,9 +835,19 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
             data_disks=dict(type='list'),
             plan=dict(type='dict'),
             accept_terms=dict(type='bool', default=False),
-            zones=dict(type='list')
+            zones=dict(type='list'),
+            refresh_lookup_cache=dict(type='bool', default=False)
         )
 
+        # items of vms take the options of a single VM. Defaults are left out, so missing options keep the module
+        # values; Ansible still validates every item and masks its no_log values.
+        self.vm_arg_spec = dict((key, dict((k, v) for k, v in spec.items() if k not in ['default', 'required']))
+                                for key, spec in self.module_arg_spec.items())
+        self.vm_arg_spec['name']['required'] = True
+        self.vm_arg_spec['tags'] = dict(type='dict')
+        self.module_arg_spec['vms'] = dict(type='list', elements='dict', options=self.vm_arg_spec)
+        self.module_arg_spec['concurrency'] = dict(type='int', default=8)
+
         self.resource_group = None
         self.name = None
         self.custom_data = None
@@ -797,6 +887,9 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         self.plan = None
         self.accept_terms = None
         self.zones = None
+        self.refresh_lookup_cache = None
+        self.vms = None
+        self.concurrency = None
 
         self.results = dict(
             changed=False,
@@ -806,10 +899,15 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         )
 
         super(AzureRMVirtualMachine, self).__init__(derived_arg_spec=self.module_arg_spec,
-                                                    supports_check_mode=True)
+                                                    supports_check_mode=True,
+                                                    mutually_exclusive=[['name', 'vms']],
+                                                    required_one_of=[['name', 'vms']])
 
     def exec_module(self, **kwargs):
 
+        if kwargs.get('vms'):
+            return self.exec_vms(kwargs)
+
         for key in list(self.module_arg_spec.keys()) + ['tags']:
             setattr(self, key, kwargs[key])
 
@@ -864,7 +962,7 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
                 if all(key in self.image for key in ('publisher', 'offer', 'sku', 'version')):
                     marketplace_image = self.get_marketplace_image_version()
                     if self.image['version'] == 'latest':
-                        self.image['version'] = marketplace_image.name
+                        self.image['version'] = marketplace_image['name']
                         self.log("Using image version {0}".format(self.image['version']))
 
                     image_reference = self.compute_models.ImageReference(
@@ -956,7 +1054,8 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
                     changed = True
                     vm_dict['properties']['hardwareProfile']['vmSize'] = self.vm_size
 
-                update_tags, vm_dict['tags'] = self.update_tags(vm_dict.get('tags', dict()))
+                # an item of vms has its own tags, compare with them rather than the module parameter
+                update_tags, vm_dict['tags'] = self.update_tags(vm_dict.get('tags', dict()), self.tags, kwargs.get('append_tags'))
                 if update_tags:
                     differences.append('Tags')
                     changed = True
@@ -1045,16 +1144,25 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
                         if self.zones:
                             self.fail("Parameter error: you can't use Availability Set and Availability Zones at the same time")
 
-                    # Get defaults
-                    if not self.network_interface_names:
-                        default_nic = self.create_default_nic()
+                    # Get defaults, the default NIC and storage account are created at the same time
+                    create_nic = not self.network_interface_names
+                    create_storage_account = not self.storage_account_name and not self.managed_disk_type
+                    calls = []
+                    if create_nic:
+                        calls.append(('create_default_nic',))
+                    if create_storage_account:
+                        calls.append(('create_default_storage_account',))
+                    defaults = self.call_concurrently(calls)
+
+                    if create_nic:
+                        default_nic = defaults.pop(0)
                         self.log("network interface:")
                         self.log(self.serialize_obj(default_nic, 'NetworkInterface'), pretty_print=True)
                         network_interfaces = [default_nic.id]
 
                     # os disk
-                    if not self.storage_account_name and not self.managed_disk_type:
-                        storage_account = self.create_default_storage_account()
+                    if create_storage_account:
+                        storage_account = defaults.pop(0)
                         self.log("storage account:")
                         self.log(self.serialize_obj(storage_account, 'StorageAccount'), pretty_print=True)
                         requested_vhd_uri = 'https://{0}.blob.{1}/{2}/{3}'.format(
@@ -1377,6 +1485,62 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
 
         return self.results
 
+    def exec_vms(self, kwargs):
+        '''
+        Manage every virtual machine of vms on a bounded pool of threads. Each one runs exec_module on its own copy
+        of this module, whose failures raise instead of exiting.
+
+        :param kwargs: module parameters
+        :return: module results
+        '''
+        params = [self.get_vm_params(kwargs, item) for item in kwargs['vms']]
+        vms = self.map_concurrently(self.exec_vm, params, kwargs['concurrency'])
+
+        self.results = dict(changed=any(vm['changed'] for vm in vms), vms=vms)
+        failed = [vm['name'] for vm in vms if vm.get('failed')]
+        if failed:
+            self.fail("Error managing virtual machines {0}".format(', '.join(failed)), **self.results)
+        return self.results
+
+    def get_vm_params(self, kwargs, item):
+        '''
+        Module parameters of one item of vms. Ansible already validated the item against vm_arg_spec, options it
+        doesn't set keep the module values.
+        '''
+        params = dict(kwargs, vms=None)
+        for key in self.vm_arg_spec:
+            if item.get(key) is not None:
+                params[key] = item[key]
+        if item.get('tags'):
+            self.validate_tags(item['tags'])
+        # options are modified while a VM is managed, don't share them between the copies
+        return copy.deepcopy(params)
+
+    def exec_vm(self, params):
+        '''
+        Manage one virtual machine of vms. Runs on worker threads, so it never fails the module.
+
+        :param params: module parameters of the virtual machine
+        :return: per VM result
+        '''
+        vm = copy.copy(self)
+        vm.results = dict(
+            changed=False,
+            actions=[],
+            powerstate_change=None,
+            ansible_facts=dict(azure_vm=None)
+        )
+        vm.fail = raise_vm_error
+        result = dict(name=params['name'], changed=False)
+        try:
+            vm_results = vm.exec_module(**params)
+            result.update(changed=vm_results['changed'],
+                          powerstate_change=vm_results['powerstate_change'],
+                          azure_vm=vm_results['ansible_facts']['azure_vm'])
+        except Exception as exc:
+            result.update(failed=True, msg=str(exc), changed=bool(vm.results.get('actions')))
+        return result
+
     def get_vm(self):
         '''
         Get the VM with expanded instanceView
@@ -1550,25 +1714,52 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         except Exception as exc:
             self.fail("Error deleting virtual machine {0} - {1}".format(self.name, str(exc)))
 
-        # TODO: parallelize nic, vhd, and public ip deletions with begin_deleting
-        # TODO: best-effort to keep deleting other linked resources if we encounter an error
+        # disks and NICs only depend on the VM, public IPs on their NIC. The deletes of each stage are started
+        # together; a failure is recorded and the remaining resources are still deleted.
+        errors = []
+        pollers = []
         if self.remove_on_absent.intersection(set(['all', 'virtual_storage'])):
-            self.log('Deleting VHDs')
-            self.delete_vm_storage(vhd_uris)
             self.log('Deleting managed disks')
-            self.delete_managed_disks(managed_disk_ids)
+            pollers += self.delete_managed_disks(managed_disk_ids, errors)
 
         if self.remove_on_absent.intersection(set(['all', 'network_interfaces'])):
             self.log('Deleting network interfaces')
             for nic_dict in nic_names:
-                self.delete_nic(nic_dict['resource_group'], nic_dict['name'])
+                pollers.append(self.delete_nic(nic_dict['resource_group'], nic_dict['name'], errors))
+
+        if self.remove_on_absent.intersection(set(['all', 'virtual_storage'])):
+            self.log('Deleting VHDs')
+            self.delete_vm_storage(vhd_uris, errors)
+
+        self.wait_for_deletes(pollers, errors)
 
         if self.remove_on_absent.intersection(set(['all', 'public_ips'])):
             self.log('Deleting public IPs')
-            for pip_dict in pip_names:
-                self.delete_pip(pip_dict['resource_group'], pip_dict['name'])
+            self.wait_for_deletes([self.delete_pip(pip_dict['resource_group'], pip_dict['name'], errors)
+                                   for pip_dict in pip_names], errors)
+
+        if errors:
+            self.fail("Deleted virtual machine {0}, but failed to delete some of its resources: {1}".format(self.name,
+                                                                                                            '; '.join(errors)))
         return True
 
+    def wait_for_deletes(self, pollers, errors):
+        '''
+        Wait for delete operations started together. The SDK pollers make progress in their own threads, so this
+        takes as long as the slowest of them.
+
+        :param pollers: list of (description, poller) tuples, None items are skipped
+        :param errors: list collecting the error messages
+        '''
+        for item in pollers:
+            if item is None:
+                continue
+            description, poller = item
+            try:
+                self.get_poller_result(poller)
+            except Exception as exc:
+                errors.append("Error deleting {0} - {1}".format(description, str(exc)))
+
     def get_network_interface(self, resource_group, name):
         try:
             nic = self.network_client.network_interfaces.get(resource_group, name)
@@ -1576,62 +1767,90 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         except Exception as exc:
             self.fail("Error fetching network interface {0} - {1}".format(name, str(exc)))
 
-    def delete_nic(self, resource_group, name):
+    def delete_nic(self, resource_group, name, errors):
+        '''
+        Start deleting a network interface.
+
+        :return: (description, poller) tuple, or None if the delete could not be started
+        '''
         self.log("Deleting network interface {0}".format(name))
         self.results['actions'].append("Deleted network interface {0}".format(name))
         try:
-            poller = self.network_client.network_interfaces.delete(resource_group, name)
+            return ("network interface {0}".format(name), self.network_client.network_interfaces.delete(resource_group, name))
         except Exception as exc:
-            self.fail("Error deleting network interface {0} - {1}".format(name, str(exc)))
-        self.get_poller_result(poller)
-        # Delete doesn't return anything. If we get this far, assume success
-        return True
+            errors.append("Error deleting network interface {0} - {1}".format(name, str(exc)))
+
+    def delete_pip(self, resource_group, name, errors):
+        '''
+        Start deleting a public IP address.
 
-    def delete_pip(self, resource_group, name):
+        :return: (description, poller) tuple, or None if the delete could not be started
+        '''
         self.results['actions'].append("Deleted public IP {0}".format(name))
         try:
-            poller = self.network_client.public_ip_addresses.delete(resource_group, name)
-            self.get_poller_result(poller)
+            return ("public IP {0}".format(name), self.network_client.public_ip_addresses.delete(resource_group, name))
         except Exception as exc:
-            self.fail("Error deleting {0} - {1}".format(name, str(exc)))
-        # Delete returns nada. If we get here, assume that all is well.
-        return True
+            errors.append("Error deleting {0} - {1}".format(name, str(exc)))
 
-    def delete_managed_disks(self, managed_disk_ids):
+    def delete_managed_disks(self, managed_disk_ids, errors):
+        '''
+        Start deleting managed disks.
+
+        :return: list of (description, poller) tuples of the deletes that were started
+        '''
+        pollers = []
         for mdi in managed_disk_ids:
             try:
-                poller = self.rm_client.resources.delete_by_id(mdi, '2017-03-30')
-                self.get_poller_result(poller)
+                pollers.append(("managed disk {0}".format(mdi), self.rm_client.resources.delete_by_id(mdi, '2017-03-30')))
             except Exception as exc:
-                self.fail("Error deleting managed disk {0} - {1}".format(mdi, str(exc)))
+                errors.append("Error deleting managed disk {0} - {1}".format(mdi, str(exc)))
+        return pollers
 
-    def delete_vm_storage(self, vhd_uris):
+    def delete_vm_storage(self, vhd_uris, errors):
         # FUTURE: figure out a cloud_env indepdendent way to delete these
+        blobs = []
         for uri in vhd_uris:
             self.log("Extracting info from blob uri '{0}'".format(uri))
             try:
                 blob_parts = extract_names_from_blob_uri(uri, self._cloud_environment.suffixes.storage_endpoint)
             except Exception as exc:
-                self.fail("Error parsing blob URI {0}".format(str(exc)))
-            storage_account_name = blob_parts['accountname']
-            container_name = blob_parts['containername']
-            blob_name = blob_parts['blobname']
-
-            blob_client = self.get_blob_client(self.resource_group, storage_account_name)
-
-            self.log("Delete blob {0}:{1}".format(container_name, blob_name))
-            self.results['actions'].append("Deleted blob {0}:{1}".format(container_name, blob_name))
+                errors.append("Error parsing blob URI {0}".format(str(exc)))
+                continue
+            # one blob client, and so one list_keys call, per storage account
             try:
-                blob_client.delete_blob(container_name, blob_name)
+                blob_client = self.get_blob_client(self.resource_group, blob_parts['accountname'])
             except Exception as exc:
-                self.fail("Error deleting blob {0}:{1} - {2}".format(container_name, blob_name, str(exc)))
+                errors.append("Error deleting blob {0}:{1} - {2}".format(blob_parts['containername'], blob_parts['blobname'],
+                                                                         str(exc)))
+                continue
+            blobs.append((blob_client, blob_parts['containername'], blob_parts['blobname']))
+
+        for error in self.map_concurrently(self.delete_blob, blobs, AZURE_BLOB_DELETE_CONCURRENCY):
+            if error:
+                errors.append(error)
+
+    def delete_blob(self, blob):
+        '''
+        Delete a VHD blob. Runs on worker threads, so errors are returned instead of failing the module.
+
+        :param blob: (blob client, container name, blob name) tuple
+        :return: error message, or None
+        '''
+        blob_client, container_name, blob_name = blob
+        self.log("Delete blob {0}:{1}".format(container_name, blob_name))
+        self.results['actions'].append("Deleted blob {0}:{1}".format(container_name, blob_name))
+        try:
+            blob_client.delete_blob(container_name, blob_name)
+        except Exception as exc:
+            return "Error deleting blob {0}:{1} - {2}".format(container_name, blob_name, str(exc))
 
     def get_marketplace_image_version(self):
         try:
-            versions = self.compute_client.virtual_machine_images.list(self.location,
-                                                                       self.image['publisher'],
-                                                                       self.image['offer'],
-                                                                       self.image['sku'])
+            versions = self.list_vm_image_versions(self.location,
+                                                   self.image['publisher'],
+                                                   self.image['offer'],
+                                                   self.image['sku'],
+                                                   expect=self.has_image_version)
         except Exception as exc:
             self.fail("Error fetching image {0} {1} {2} - {3}".format(self.image['publisher'],
                                                                       self.image['offer'],
@@ -1641,7 +1860,7 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
             if self.image['version'] == 'latest':
                 return versions[len(versions) - 1]
             for version in versions:
-                if version.name == self.image['version']:
+                if version['name'] == self.image['version']:
                     return version
 
         self.fail("Error could not find image {0} {1} {2} {3}".format(self.image['publisher'],
@@ -1650,19 +1869,20 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
                                                                       self.image['version']))
         return None
 
+    def has_image_version(self, versions):
+        return self.image['version'] == 'latest' or any(version['name'] == self.image['version'] for version in versions)
+
     def get_custom_image_reference(self, name, resource_group=None):
         try:
-            if resource_group:
-                vm_images = self.compute_client.images.list_by_resource_group(resource_group)
-            else:
-                vm_images = self.compute_client.images.list()
+            vm_images = self.list_custom_images(resource_group,
+                                                expect=lambda images: any(image['name'] == name for image in images))
         except Exception as exc:
             self.fail("Error fetching custom images from subscription - {0}".format(str(exc)))
 
         for vm_image in vm_images:
-            if vm_image.name == name:
-                self.log("Using custom image id {0}".format(vm_image.id))
-                return self.compute_models.ImageReference(id=vm_image.id)
+            if vm_image['name'] == name:
+                self.log("Using custom image id {0}".format(vm_image['id']))
+                return self.compute_models.ImageReference(id=vm_image['id'])
 
         self.fail("Error could not find image with name {0}".format(name))
         return None
@@ -1695,13 +1915,10 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         :return: boolean
         '''
         try:
-            sizes = self.compute_client.virtual_machine_sizes.list(self.location)
+            sizes = self.list_vm_sizes(self.location, expect=lambda sizes: self.vm_size in sizes)
         except Exception as exc:
             self.fail("Error retrieving available machine sizes - {0}".format(str(exc)))
-        for size in sizes:
-            if size.name == self.vm_size:
-                return True
-        return False
+        return self.vm_size in sizes
 
     def create_default_storage_account(self):
         '''
@@ -1843,16 +2060,23 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
             if not subnet_id:
                 self.fail(no_subnets_msg)
 
+        # the security group and the public IP don't depend on each other, create them at the same time
+        self.results['actions'].append('Created default security group {0}'.format(self.name + '01'))
+        calls = [('create_default_securitygroup', self.resource_group, self.location, self.name + '01', self.os_type,
+                  self.open_ports)]
         pip = None
+        sku = None
         if self.public_ip_allocation_method != 'Disabled':
             self.results['actions'].append('Created default public IP {0}'.format(self.name + '01'))
             sku = self.network_models.PublicIPAddressSku(name="Standard") if self.zones else None
-            pip_info = self.create_default_pip(self.resource_group, self.location, self.name + '01', self.public_ip_allocation_method, sku=sku)
-            pip = self.network_models.PublicIPAddress(id=pip_info.id, location=pip_info.location, resource_guid=pip_info.resource_guid, sku=sku)
+            calls.append(('create_default_pip', self.resource_group, self.location, self.name + '01',
+                          self.public_ip_allocation_method, sku))
 
-        self.results['actions'].append('Created default security group {0}'.format(self.name + '01'))
-        group = self.create_default_securitygroup(self.resource_group, self.location, self.name + '01', self.os_type,
-                                                  self.open_ports)
+        created = self.call_concurrently(calls)
+        group = created[0]
+        if len(created) > 1:
+            pip_info = created[1]
+            pip = self.network_models.PublicIPAddress(id=pip_info.id, location=pip_info.location, resource_guid=pip_info.resource_guid, sku=sku)
 
         parameters = self.network_models.NetworkInterface(
             location=self.location,
@@ -1881,6 +2105,21 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
             self.fail("Error creating network interface {0} - {1}".format(network_interface_name, str(exc)))
         return new_nic
 
+    def call_concurrently(self, calls):
+        '''
+        Run independent calls of methods of this module at the same time. They run on a copy of the module whose
+        failures raise, the first failure fails the module once all calls finished.
+
+        :param calls: list of tuples of a method name followed by its arguments
+        :return: list of results, in the order of calls
+        '''
+        worker = copy.copy(self)
+        worker.fail = raise_vm_error
+        try:
+            return self.map_concurrently(lambda call: getattr(worker, call[0])(*call[1:]), calls, len(calls))
+        except Exception as exc:
+            self.fail(str(exc))
+
     def parse_network_interface(self, nic):
         nic = self.parse_resource_to_dict(nic)
         if 'name' not in nic:
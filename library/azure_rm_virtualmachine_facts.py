@@ -24,18 +24,34 @@ version_added: "2.7"
 short_description: Get virtual machine facts.
 
 description:
-  - Get facts for all virtual machines of a resource group.
+  - Get facts for all virtual machines of a resource group or of the whole subscription.
 
 options:
     resource_group:
         description:
         - Name of the resource group containing the virtual machines (required when filtering by vm name).
+        - Omit to list the virtual machines of the whole subscription.
     name:
         description:
         - Name of the virtual machine.
     tags:
         description:
         - Limit results by providing a list of tags. Format tags as 'key' or 'key:value'.
+    concurrency:
+        description:
+        - Maximum number of virtual machines whose details are retrieved at the same time.
+        default: 8
+        type: int
+        version_added: "2.8"
+    status_only:
+        description:
+        - Only return I(id), I(name), I(resource_group), I(location), I(tags) and I(power_state) of the virtual machines.
+        - The power state of all virtual machines of the subscription is read from a single paged list call
+          instead of one call per virtual machine.
+        - Cannot be combined with I(name).
+        type: bool
+        default: no
+        version_added: "2.8"
 
 extends_documentation_fragment:
   - azure
@@ -56,6 +72,10 @@ EXAMPLES = '''
       resource_group: Testing
       name: vm
 
+  - name: Get power state of all virtual machines of the subscription
+    azure_rm_virtualmachine_facts:
+      status_only: yes
+
   - name: Get facts by tags
     azure_rm_virtualmachine_facts:
       resource_group: Testing
@@ -195,6 +215,7 @@ except Exception:
     pass
 
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase, azure_id_to_dict
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
 from ansible.module_utils.common.dict_transformations import camel_dict_to_snake_dict
 from ansible.module_utils.six.moves.urllib.parse import urlparse
 import re
@@ -204,6 +225,9 @@ AZURE_OBJECT_CLASS = 'VirtualMachine'
 
 AZURE_ENUM_MODULES = ['azure.mgmt.compute.models']
 
+# first compute API version accepting statusOnly on the subscription-wide list
+STATUS_ONLY_API_VERSION = '2020-06-01'
+
 
 class AzureRMVirtualMachineFacts(AzureRMModuleBase):
 
@@ -212,7 +236,9 @@ class AzureRMVirtualMachineFacts(AzureRMModuleBase):
         self.module_arg_spec = dict(
             resource_group=dict(type='str'),
             name=dict(type='str'),
-            tags=dict(type='list')
+            tags=dict(type='list'),
+            concurrency=dict(type='int', default=8),
+            status_only=dict(type='bool', default=False)
         )
 
         self.results = dict(
@@ -223,9 +249,12 @@ class AzureRMVirtualMachineFacts(AzureRMModuleBase):
         self.resource_group = None
         self.name = None
         self.tags = None
+        self.concurrency = None
+        self.status_only = None
 
         super(AzureRMVirtualMachineFacts, self).__init__(self.module_arg_spec,
                                                          supports_tags=False,
+                                                         mutually_exclusive=[['name', 'status_only']],
                                                          facts_module=True)
 
     def exec_module(self, **kwargs):
@@ -237,6 +266,8 @@ class AzureRMVirtualMachineFacts(AzureRMModuleBase):
             self.fail("Parameter error: resource group required when filtering by name.")
         if self.name:
             self.results['vms'] = self.get_item()
+        elif self.status_only:
+            self.results['vms'] = self.list_status()
         else:
             self.results['vms'] = self.list_items()
 
@@ -248,7 +279,7 @@ class AzureRMVirtualMachineFacts(AzureRMModuleBase):
         result = []
 
         try:
-            item = self.compute_client.virtual_machines.get(self.resource_group, self.name)
+            item = self.get_vm(self.name)
         except CloudError as err:
             self.module.warn("Error getting virtual machine {0} - {1}".format(self.name, str(err)))
 
@@ -260,27 +291,79 @@ class AzureRMVirtualMachineFacts(AzureRMModuleBase):
     def list_items(self):
         self.log('List all items')
         try:
-            items = self.compute_client.virtual_machines.list(self.resource_group)
+            if self.resource_group:
+                items = self.compute_client.virtual_machines.list(self.resource_group)
+            else:
+                items = self.compute_client.virtual_machines.list_all()
+            items = [item for item in items if self.has_tags(item.tags, self.tags)]
         except CloudError as exc:
             self.fail("Failed to list all items - {0}".format(str(exc)))
 
+        try:
+            vms = self.map_concurrently(lambda item: self.get_vm(item.name, azure_id_to_dict(item.id).get('resourceGroups')),
+                                        items,
+                                        self.concurrency)
+        except Exception as exc:
+            self.fail("Error getting virtual machine - {0}".format(str(exc)))
+        return [self.serialize_vm(vm) for vm in vms]
+
+    def list_status(self):
+        '''
+        List id, name, tags and power state of the virtual machines from the statusOnly variant of the
+        subscription-wide list, which returns the instance views in the paged list itself.
+
+        :return: list of dict
+        '''
+        self.log('List power state of all items')
+        client = self.get_mgmt_svc_client(GenericRestClient, base_url=self._cloud_environment.endpoints.resource_manager)
+        url = '/subscriptions/{0}/providers/Microsoft.Compute/virtualMachines'.format(self.subscription_id)
+        query_parameters = {'api-version': STATUS_ONLY_API_VERSION, 'statusOnly': 'true'}
         results = []
-        for item in items:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_vm(self.get_vm(item.name)))
+        try:
+            for item in client.query_pages(url, query_parameters):
+                resource_group = azure_id_to_dict(item['id']).get('resourceGroups')
+                if self.resource_group and (resource_group or '').lower() != self.resource_group.lower():
+                    continue
+                if not self.has_tags(item.get('tags'), self.tags):
+                    continue
+                statuses = item.get('properties', {}).get('instanceView', {}).get('statuses', [])
+                results.append({
+                    'id': item['id'],
+                    'name': item.get('name'),
+                    'resource_group': resource_group,
+                    'location': item.get('location'),
+                    'tags': item.get('tags'),
+                    'state': 'present',
+                    'power_state': self.get_power_state([status.get('code', '') for status in statuses])
+                })
+        except Exception as exc:
+            self.fail("Failed to list virtual machine status - {0}".format(str(exc)))
         return results
 
-    def get_vm(self, name):
+    def get_vm(self, name, resource_group=None):
         '''
-        Get the VM with expanded instanceView
+        Get the VM with expanded instanceView. Called from worker threads, so errors are raised.
 
         :return: VirtualMachine object
         '''
-        try:
-            vm = self.compute_client.virtual_machines.get(self.resource_group, name, expand='instanceview')
-            return vm
-        except Exception as exc:
-            self.fail("Error getting virtual machine {0} - {1}".format(self.name, str(exc)))
+        return self.compute_client.virtual_machines.get(resource_group or self.resource_group, name, expand='instanceview')
+
+    @staticmethod
+    def get_power_state(codes):
+        '''
+        Get the power state from the status codes of an instance view.
+
+        :param codes: list of status codes such as 'PowerState/running'
+        :return: power state, 'generalized' for generalized VMs
+        '''
+        power_state = None
+        for code in codes:
+            code = code.split('/')
+            if code[0] == 'PowerState':
+                power_state = code[1]
+            elif code[0] == 'OSState' and code[1] == 'generalized':
+                return 'generalized'
+        return power_state
 
     def serialize_vm(self, vm):
         '''
@@ -292,22 +375,15 @@ class AzureRMVirtualMachineFacts(AzureRMModuleBase):
 
         result = self.serialize_obj(vm, AZURE_OBJECT_CLASS, enum_modules=AZURE_ENUM_MODULES)
         resource_group = re.sub('\\/.*', '', re.sub('.*resourceGroups\\/', '', result['id']))
-        instance = None
-        power_state = None
-
-        try:
-            instance = self.compute_client.virtual_machines.instance_view(resource_group, vm.name)
-            instance = self.serialize_obj(instance, AZURE_OBJECT_CLASS, enum_modules=AZURE_ENUM_MODULES)
-        except Exception as exc:
-            self.fail("Error getting virtual machine {0} instance view - {1}".format(vm.name, str(exc)))
-
-        for index in range(len(instance['statuses'])):
-            code = instance['statuses'][index]['code'].split('/')
-            if code[0] == 'PowerState':
-                power_state = code[1]
-            elif code[0] == 'OSState' and code[1] == 'generalized':
-                power_state = 'generalized'
-                break
+        # the VM is retrieved with the instance view expanded, only ask for it again if it is missing
+        instance = vm.instance_view
+        if instance is None:
+            try:
+                instance = self.compute_client.virtual_machines.instance_view(resource_group, vm.name)
+            except Exception as exc:
+                self.fail("Error getting virtual machine {0} instance view - {1}".format(vm.name, str(exc)))
+
+        power_state = self.get_power_state([status.code for status in instance.statuses or []])
 
         new_result = {}
         new_result['power_state'] = power_state
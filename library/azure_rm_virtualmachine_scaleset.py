@@ -208,6 +208,14 @@ options:
             - A list of Availability Zones for your virtual machine scale set
         type: list
         version_added: "2.8"
+    refresh_lookup_cache:
+        description:
+            - Look up the VM size, the image version and custom images again instead of using the cached results.
+            - Lookups are cached in C(~/.azure/ansible_lookup_cache.json) for an hour. Set the environment variable
+              C(ANSIBLE_AZURE_LOOKUP_CACHE=false) to disable the cache.
+        type: bool
+        default: no
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -416,7 +424,8 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
             enable_accelerated_networking=dict(type='bool'),
             security_group=dict(type='raw', aliases=['security_group_name']),
             overprovision=dict(type='bool', default=True),
-            zones=dict(type='list')
+            zones=dict(type='list'),
+            refresh_lookup_cache=dict(type='bool', default=False)
         )
 
         self.resource_group = None
@@ -447,6 +456,7 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
         self.security_group = None
         self.overprovision = None
         self.zones = None
+        self.refresh_lookup_cache = None
 
         self.results = dict(
             changed=False,
@@ -519,7 +529,7 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
                 if all(key in self.image for key in ('publisher', 'offer', 'sku', 'version')):
                     marketplace_image = self.get_marketplace_image_version()
                     if self.image['version'] == 'latest':
-                        self.image['version'] = marketplace_image.name
+                        self.image['version'] = marketplace_image['name']
                         self.log("Using image version {0}".format(self.image['version']))
 
                     image_reference = self.compute_models.ImageReference(
@@ -884,10 +894,11 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
 
     def get_marketplace_image_version(self):
         try:
-            versions = self.compute_client.virtual_machine_images.list(self.location,
-                                                                       self.image['publisher'],
-                                                                       self.image['offer'],
-                                                                       self.image['sku'])
+            versions = self.list_vm_image_versions(self.location,
+                                                   self.image['publisher'],
+                                                   self.image['offer'],
+                                                   self.image['sku'],
+                                                   expect=self.has_image_version)
         except CloudError as exc:
             self.fail("Error fetching image {0} {1} {2} - {3}".format(self.image['publisher'],
                                                                       self.image['offer'],
@@ -897,7 +908,7 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
             if self.image['version'] == 'latest':
                 return versions[len(versions) - 1]
             for version in versions:
-                if version.name == self.image['version']:
+                if version['name'] == self.image['version']:
                     return version
 
         self.fail("Error could not find image {0} {1} {2} {3}".format(self.image['publisher'],
@@ -905,19 +916,20 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
                                                                       self.image['sku'],
                                                                       self.image['version']))
 
+    def has_image_version(self, versions):
+        return self.image['version'] == 'latest' or any(version['name'] == self.image['version'] for version in versions)
+
     def get_custom_image_reference(self, name, resource_group=None):
         try:
-            if resource_group:
-                vm_images = self.compute_client.images.list_by_resource_group(resource_group)
-            else:
-                vm_images = self.compute_client.images.list()
+            vm_images = self.list_custom_images(resource_group,
+                                                expect=lambda images: any(image['name'] == name for image in images))
         except Exception as exc:
             self.fail("Error fetching custom images from subscription - {0}".format(str(exc)))
 
         for vm_image in vm_images:
-            if vm_image.name == name:
-                self.log("Using custom image id {0}".format(vm_image.id))
-                return self.compute_models.ImageReference(id=vm_image.id)
+            if vm_image['name'] == name:
+                self.log("Using custom image id {0}".format(vm_image['id']))
+                return self.compute_models.ImageReference(id=vm_image['id'])
 
         self.fail("Error could not find image with name {0}".format(name))
 
@@ -935,13 +947,10 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
         :return: boolean
         '''
         try:
-            sizes = self.compute_client.virtual_machine_sizes.list(self.location)
+            sizes = self.list_vm_sizes(self.location, expect=lambda sizes: self.vm_size in sizes)
         except CloudError as exc:
             self.fail("Error retrieving available machine sizes - {0}".format(str(exc)))
-        for size in sizes:
-            if size.name == self.vm_size:
-                return True
-        return False
+        return self.vm_size in sizes
 
     def parse_nsg(self):
         nsg = self.security_group
@@ -43,6 +43,14 @@ options:
     version:
         description:
             - Specific version number of an image.
+    refresh_lookup_cache:
+        description:
+            - List the images again instead of using the cached results.
+            - Image lists are cached in C(~/.azure/ansible_lookup_cache.json) for an hour. Set the environment
+              variable C(ANSIBLE_AZURE_LOOKUP_CACHE=false) to disable the cache.
+        type: bool
+        default: no
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -94,7 +102,7 @@ except Exception:
     # This is handled in azure_rm_common
     pass
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, normalize_location_name
 
 
 AZURE_ENUM_MODULES = ['azure.mgmt.compute.models']
@@ -109,7 +117,8 @@ class AzureRMVirtualMachineImageFacts(AzureRMModuleBase):
             publisher=dict(type='str'),
             offer=dict(type='str'),
             sku=dict(type='str'),
-            version=dict(type='str')
+            version=dict(type='str'),
+            refresh_lookup_cache=dict(type='bool', default=False)
         )
 
         self.results = dict(
@@ -122,6 +131,7 @@ class AzureRMVirtualMachineImageFacts(AzureRMModuleBase):
         self.offer = None
         self.sku = None
         self.version = None
+        self.refresh_lookup_cache = None
 
         super(AzureRMVirtualMachineImageFacts, self).__init__(self.module_arg_spec, supports_tags=False)
 
@@ -160,51 +170,42 @@ class AzureRMVirtualMachineImageFacts(AzureRMModuleBase):
         return result
 
     def list_images(self):
-        response = None
         results = []
         try:
-            response = self.compute_client.virtual_machine_images.list(self.location,
-                                                                       self.publisher,
-                                                                       self.offer,
-                                                                       self.sku,)
+            results = self.list_vm_image_versions(self.location, self.publisher, self.offer, self.sku)
         except CloudError:
             pass
         except Exception as exc:
             self.fail("Failed to list images: {0}".format(str(exc)))
-
-        if response:
-            for item in response:
-                results.append(self.serialize_obj(item, 'VirtualMachineImageResource',
-                                                  enum_modules=AZURE_ENUM_MODULES))
         return results
 
     def list_offers(self):
-        response = None
         results = []
         try:
-            response = self.compute_client.virtual_machine_images.list_offers(self.location,
-                                                                              self.publisher)
+            results = self.get_cached_lookup('vm_image_offers', [normalize_location_name(self.location), self.publisher],
+                                             lambda: self.serialize_resources(
+                                                 self.compute_client.virtual_machine_images.list_offers(self.location,
+                                                                                                        self.publisher)))
         except CloudError:
             pass
         except Exception as exc:
             self.fail("Failed to list offers: {0}".format(str(exc)))
-
-        if response:
-            for item in response:
-                results.append(self.serialize_obj(item, 'VirtualMachineImageResource',
-                                                  enum_modules=AZURE_ENUM_MODULES))
         return results
 
     def list_publishers(self):
-        response = None
         results = []
         try:
-            response = self.compute_client.virtual_machine_images.list_publishers(self.location)
+            results = self.get_cached_lookup('vm_image_publishers', [normalize_location_name(self.location)],
+                                             lambda: self.serialize_resources(
+                                                 self.compute_client.virtual_machine_images.list_publishers(self.location)))
         except CloudError:
             pass
         except Exception as exc:
             self.fail("Failed to list publishers: {0}".format(str(exc)))
+        return results
 
+    def serialize_resources(self, response):
+        results = []
         if response:
             for item in response:
                 results.append(self.serialize_obj(item, 'VirtualMachineImageResource',
@@ -33,7 +33,18 @@ options:
     instance_id:
         description:
             - The instance ID of the virtual machine.
-        required: True
+            - Mutually exclusive with I(instance_ids).
+    instance_ids:
+        description:
+            - List of instance IDs of the virtual machines, or C('*') for all instances of the scale set.
+            - All selected instances are changed with a single scale set level operation.
+            - Mutually exclusive with I(instance_id).
+        type: list
+        elements: str
+    filter_tags:
+        description:
+            - Only act on instances having these tags. Format tags as 'key' or 'key:value'.
+        type: list
     latest_model:
         type: bool
         description:
@@ -70,6 +81,15 @@ EXAMPLES = '''
       vmss_name: myVMSS
       instance_id: "2"
       latest_model: yes
+
+  - name: Deallocate all instances tagged for maintenance
+    azure_rm_computevirtualmachinescalesetinstance:
+      resource_group: myResourceGroup
+      vmss_name: myVMSS
+      instance_ids: '*'
+      filter_tags:
+        - maintenance
+      power_state: deallocated
 '''
 
 RETURN = '''
@@ -112,6 +132,13 @@ class AzureRMVirtualMachineScaleSetInstance(AzureRMModuleBase):
             instance_id=dict(
                 type='str'
             ),
+            instance_ids=dict(
+                type='list',
+                elements='str'
+            ),
+            filter_tags=dict(
+                type='list'
+            ),
             latest_model=dict(
                 type='bool'
             ),
@@ -133,10 +160,15 @@ class AzureRMVirtualMachineScaleSetInstance(AzureRMModuleBase):
         self.resource_group = None
         self.vmss_name = None
         self.instance_id = None
+        self.instance_ids = None
+        self.filter_tags = None
         self.latest_model = None
         self.power_state = None
         self.state = None
-        super(AzureRMVirtualMachineScaleSetInstance, self).__init__(self.module_arg_spec, supports_tags=False)
+        super(AzureRMVirtualMachineScaleSetInstance, self).__init__(self.module_arg_spec,
+                                                                    mutually_exclusive=[['instance_id', 'instance_ids']],
+                                                                    required_one_of=[['instance_id', 'instance_ids']],
+                                                                    supports_tags=False)
 
     def exec_module(self, **kwargs):
         for key in self.module_arg_spec:
@@ -144,111 +176,129 @@ class AzureRMVirtualMachineScaleSetInstance(AzureRMModuleBase):
         self.mgmt_client = self.get_mgmt_svc_client(ComputeManagementClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
-        instances = self.get()
+        if self.instance_id is not None:
+            self.instance_ids = [self.instance_id]
+
+        if len(self.instance_ids) == 1 and self.instance_ids[0] != '*' and not self.filter_tags:
+            instances = self.get(self.instance_ids[0])
+        else:
+            instances = self.list()
 
         if self.state == 'absent':
-            for item in instances:
+            to_delete = [item['instance_id'] for item in instances]
+            if to_delete:
                 if not self.check_mode:
-                    self.delete(item['instance_id'])
+                    self.delete(to_delete)
                 self.results['changed'] = True
             self.results['instances'] = []
         else:
             if self.latest_model is not None:
-                for item in instances:
-                    if not item.get('latest_model', None):
-                        if not self.check_mode:
-                            self.apply_latest_model(item['instance_id'])
+                to_update = [item for item in instances if not item.get('latest_model', None)]
+                if to_update:
+                    if not self.check_mode:
+                        self.apply_latest_model([item['instance_id'] for item in to_update])
+                    for item in to_update:
                         item['latest_model'] = True
-                        self.results['changed'] = True
+                    self.results['changed'] = True
 
             if self.power_state is not None:
-                for item in instances:
-                    if self.power_state == 'stopped' and item['power_state'] not in ['stopped', 'stopping']:
-                        if not self.check_mode:
-                            self.stop(item['instance_id'])
-                        self.results['changed'] = True
-                    elif self.power_state == 'deallocated' and item['power_state'] not in ['deallocated']:
-                        if not self.check_mode:
-                            self.deallocate(item['instance_id'])
-                        self.results['changed'] = True
-                    elif self.power_state == 'running' and item['power_state'] not in ['running']:
-                        if not self.check_mode:
-                            self.start(item['instance_id'])
-                        self.results['changed'] = True
+                if self.power_state == 'stopped':
+                    to_change = [item['instance_id'] for item in instances if item['power_state'] not in ['stopped', 'stopping']]
+                    operation = self.stop
+                elif self.power_state == 'deallocated':
+                    to_change = [item['instance_id'] for item in instances if item['power_state'] not in ['deallocated']]
+                    operation = self.deallocate
+                else:
+                    to_change = [item['instance_id'] for item in instances if item['power_state'] not in ['running']]
+                    operation = self.start
+                if to_change:
+                    if not self.check_mode:
+                        operation(to_change)
+                    self.results['changed'] = True
 
         self.results['instances'] = [{'id': item['id']} for item in instances]
         return self.results
 
-    def get(self):
+    def get(self, instance_id):
         response = None
         results = []
         try:
             response = self.mgmt_client.virtual_machine_scale_set_vms.get(resource_group_name=self.resource_group,
                                                                           vm_scale_set_name=self.vmss_name,
-                                                                          instance_id=self.instance_id)
+                                                                          instance_id=instance_id)
             self.log("Response : {0}".format(response))
         except CloudError as e:
             self.log('Could not get facts for Virtual Machine Scale Set VM.')
 
         if response:
-            results.append(self.format_response(response))
+            iv = self.mgmt_client.virtual_machine_scale_set_vms.get_instance_view(resource_group_name=self.resource_group,
+                                                                                  vm_scale_set_name=self.vmss_name,
+                                                                                  instance_id=instance_id)
+            results.append(self.format_response(response, iv))
 
         return results
 
-    def apply_latest_model(self, instance_id):
+    def list(self):
+        '''
+        List the selected instances with their instance views in a single paged call.
+        '''
+        results = []
         try:
-            poller = self.compute_client.virtual_machine_scale_sets.update_instances(resource_group_name=self.resource_group,
-                                                                                     vm_scale_set_name=self.vmss_name,
-                                                                                     instance_ids=[instance_id])
-            self.get_poller_result(poller)
+            items = self.mgmt_client.virtual_machine_scale_set_vms.list(resource_group_name=self.resource_group,
+                                                                        virtual_machine_scale_set_name=self.vmss_name,
+                                                                        expand='instanceView')
+            for item in items:
+                if '*' not in self.instance_ids and item.instance_id not in self.instance_ids:
+                    continue
+                if not self.has_tags(item.tags, self.filter_tags):
+                    continue
+                iv = item.instance_view
+                if iv is None:
+                    iv = self.mgmt_client.virtual_machine_scale_set_vms.get_instance_view(resource_group_name=self.resource_group,
+                                                                                          vm_scale_set_name=self.vmss_name,
+                                                                                          instance_id=item.instance_id)
+                results.append(self.format_response(item, iv))
         except CloudError as exc:
-            self.log("Error applying latest model {0} - {1}".format(self.name, str(exc)))
-            self.fail("Error applying latest model {0} - {1}".format(self.name, str(exc)))
+            self.fail('Could not list instances of Virtual Machine Scale Set - {0}'.format(str(exc)))
+        return results
 
-    def delete(self, instance_id):
-        try:
-            self.mgmt_client.virtual_machine_scale_set_vms.delete(resource_group_name=self.resource_group,
-                                                                  vm_scale_set_name=self.vmss_name,
-                                                                  instance_id=instance_id)
-        except CloudError as e:
-            self.log('Could not delete instance of Virtual Machine Scale Set VM.')
-            self.fail('Could not delete instance of Virtual Machine Scale Set VM.')
+    def run_batch(self, operation, instance_ids, action):
+        '''
+        Run a scale set level operation on all given instances and wait for the single long running operation.
 
-    def start(self, instance_id):
+        :param operation: virtual_machine_scale_sets operation taking instance_ids
+        :param instance_ids: non-empty list of instance IDs, an empty list would target the whole scale set
+        :param action: description used in error messages
+        '''
         try:
-            self.mgmt_client.virtual_machine_scale_set_vms.start(resource_group_name=self.resource_group,
-                                                                 vm_scale_set_name=self.vmss_name,
-                                                                 instance_id=instance_id)
-        except CloudError as e:
-            self.log('Could not start instance of Virtual Machine Scale Set VM.')
-            self.fail('Could not start instance of Virtual Machine Scale Set VM.')
+            poller = operation(resource_group_name=self.resource_group,
+                               vm_scale_set_name=self.vmss_name,
+                               instance_ids=instance_ids)
+            self.get_poller_result(poller)
+        except CloudError as exc:
+            self.log('Could not {0} instances {1} of Virtual Machine Scale Set VM.'.format(action, instance_ids))
+            self.fail('Could not {0} instances {1} of Virtual Machine Scale Set VM - {2}'.format(action, instance_ids, str(exc)))
 
-    def stop(self, instance_id):
-        try:
-            self.mgmt_client.virtual_machine_scale_set_vms.power_off(resource_group_name=self.resource_group,
-                                                                  vm_scale_set_name=self.vmss_name,
-                                                                  instance_id=instance_id)
-        except CloudError as e:
-            self.log('Could not stop instance of Virtual Machine Scale Set VM.')
-            self.fail('Could not stop instance of Virtual Machine Scale Set VM.')
+    def apply_latest_model(self, instance_ids):
+        self.run_batch(self.mgmt_client.virtual_machine_scale_sets.update_instances, instance_ids, 'apply latest model to')
 
-    def deallocate(self, instance_id):
-        try:
-            self.mgmt_client.virtual_machine_scale_set_vms.deallocate(resource_group_name=self.resource_group,
-                                                                      vm_scale_set_name=self.vmss_name,
-                                                                      instance_id=instance_id)
-        except CloudError as e:
-            self.log('Could not deallocate instance of Virtual Machine Scale Set VM.')
-            self.fail('Could not deallocate instance of Virtual Machine Scale Set VM.')
+    def delete(self, instance_ids):
+        self.run_batch(self.mgmt_client.virtual_machine_scale_sets.delete_instances, instance_ids, 'delete')
+
+    def start(self, instance_ids):
+        self.run_batch(self.mgmt_client.virtual_machine_scale_sets.start, instance_ids, 'start')
+
+    def stop(self, instance_ids):
+        self.run_batch(self.mgmt_client.virtual_machine_scale_sets.power_off, instance_ids, 'stop')
+
+    def deallocate(self, instance_ids):
+        self.run_batch(self.mgmt_client.virtual_machine_scale_sets.deallocate, instance_ids, 'deallocate')
 
-    def format_response(self, item):
+    def format_response(self, item, instance_view):
         d = item.as_dict()
-        iv = self.mgmt_client.virtual_machine_scale_set_vms.get_instance_view(resource_group_name=self.resource_group,
-                                                                              vm_scale_set_name=self.vmss_name,
-                                                                              instance_id=d.get('instance_id', None)).as_dict()
         power_state = ""
-        for index in range(len(iv['statuses'])):
-            code = iv['statuses'][index]['code'].split('/')
+        for status in instance_view.statuses or []:
+            code = status.code.split('/')
             if code[0] == 'PowerState':
                 power_state = code[1]
                 break
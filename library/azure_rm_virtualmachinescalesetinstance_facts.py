@@ -36,6 +36,12 @@ options:
     tags:
         description:
             - Limit results by providing a list of tags. Format tags as 'key' or 'key:value'.
+    concurrency:
+        description:
+            - Maximum number of instance views retrieved at the same time when the list does not return them.
+        default: 8
+        type: int
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -137,6 +143,10 @@ class AzureRMVirtualMachineScaleSetVMFacts(AzureRMModuleBase):
             ),
             tags=dict(
                 type='list'
+            ),
+            concurrency=dict(
+                type='int',
+                default=8
             )
         )
         # store the results of the module operation
@@ -148,6 +158,7 @@ class AzureRMVirtualMachineScaleSetVMFacts(AzureRMModuleBase):
         self.vmss_name = None
         self.instance_id = None
         self.tags = None
+        self.concurrency = None
         super(AzureRMVirtualMachineScaleSetVMFacts, self).__init__(self.module_arg_spec, supports_tags=False)
 
     def exec_module(self, **kwargs):
@@ -174,34 +185,46 @@ class AzureRMVirtualMachineScaleSetVMFacts(AzureRMModuleBase):
             self.log('Could not get facts for Virtual Machine Scale Set VM.')
 
         if response and self.has_tags(response.tags, self.tags):
-            results.append(self.format_response(response))
+            results.append(self.format_response(response, self.get_instance_view(response)))
 
         return results
 
     def list(self):
-        items = None
+        items = []
         try:
+            # instance views come back in the paged list itself, instead of one request per instance
             items = self.mgmt_client.virtual_machine_scale_set_vms.list(resource_group_name=self.resource_group,
-                                                                        virtual_machine_scale_set_name=self.vmss_name)
+                                                                        virtual_machine_scale_set_name=self.vmss_name,
+                                                                        expand='instanceView')
+            items = [item for item in items if self.has_tags(item.tags, self.tags)]
             self.log("Response : {0}".format(items))
         except CloudError as e:
             self.log('Could not get facts for Virtual Machine ScaleSet VM.')
 
-        results = []
-        for item in items:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.format_response(item))
-        return results
-
-    def format_response(self, item):
+        # API versions without $expand return no instance view, get the missing ones in parallel
+        missing = [item for item in items if item.instance_view is None]
+        try:
+            views = self.map_concurrently(self.get_instance_view, missing, self.concurrency)
+        except CloudError as exc:
+            self.fail('Could not get instance view of Virtual Machine ScaleSet VM - {0}'.format(str(exc)))
+        views = dict((item.instance_id, view) for item, view in zip(missing, views))
+
+        return [self.format_response(item, views.get(item.instance_id, item.instance_view)) for item in items]
+
+    def get_instance_view(self, item):
+        '''
+        Get the instance view of a scale set VM. Called from worker threads, so errors are raised.
+        '''
+        return self.mgmt_client.virtual_machine_scale_set_vms.get_instance_view(resource_group_name=self.resource_group,
+                                                                                vm_scale_set_name=self.vmss_name,
+                                                                                instance_id=item.instance_id)
+
+    def format_response(self, item, instance_view):
         d = item.as_dict()
 
-        iv = self.mgmt_client.virtual_machine_scale_set_vms.get_instance_view(resource_group_name=self.resource_group,
-                                                                              vm_scale_set_name=self.vmss_name,
-                                                                              instance_id=d.get('instance_id', None)).as_dict()
         power_state = ""
-        for index in range(len(iv['statuses'])):
-            code = iv['statuses'][index]['code'].split('/')
+        for status in instance_view.statuses or []:
+            code = status.code.split('/')
             if code[0] == 'PowerState':
                 power_state = code[1]
                 break
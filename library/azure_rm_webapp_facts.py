@@ -34,8 +34,28 @@ options:
     return_publish_profile:
         description:
             - Indicate whether to return publishing profile of the web app.
+            - Publishing credentials are only retrieved when this is set.
         default: False
         type: bool
+    detail:
+        description:
+            - Amount of detail retrieved for every web app.
+            - C(basic) only returns what the list or get call returns, without any additional request per web app.
+            - C(config) adds the frameworks and application settings from the site configuration.
+            - C(full) also adds the FTP publish URL from the publishing profile.
+        type: str
+        default: full
+        choices:
+            - basic
+            - config
+            - full
+        version_added: "2.8"
+    concurrency:
+        description:
+            - Maximum number of web apps whose details are retrieved at the same time.
+        type: int
+        default: 8
+        version_added: "2.8"
     tags:
         description:
             - Limit results by providing a list of tags. Format tags as 'key' or 'key:value'.
@@ -148,7 +168,6 @@ webapps:
 '''
 try:
     from msrestazure.azure_exceptions import CloudError
-    from msrestazure.azure_operation import AzureOperationPoller
     from azure.common import AzureMissingResourceHttpError, AzureHttpError
 except Exception:
     # This is handled in azure_rm_common
@@ -167,7 +186,9 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
             name=dict(type='str'),
             resource_group=dict(type='str'),
             tags=dict(type='list'),
-            return_publish_profile=dict(type=bool, default=False)
+            return_publish_profile=dict(type=bool, default=False),
+            detail=dict(type='str', default='full', choices=['basic', 'config', 'full']),
+            concurrency=dict(type='int', default=8)
         )
 
         self.results = dict(
@@ -179,6 +200,8 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
         self.resource_group = None
         self.tags = None
         self.return_publish_profile = False
+        self.detail = None
+        self.concurrency = None
 
         self.framework_names = ['net_framework', 'java', 'php', 'node', 'python', 'dotnetcore', 'ruby']
 
@@ -211,8 +234,7 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
             pass
 
         if item and self.has_tags(item.tags, self.tags):
-            curated_result = self.get_curated_webapp(self.resource_group, self.name, item)
-            result = [curated_result]
+            result = self.get_curated_webapps([item])
 
         return result
 
@@ -224,12 +246,7 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
             request_id = exc.request_id if exc.request_id else ''
             self.fail("Error listing web apps in resource groups {0}, request id: {1} - {2}".format(self.resource_group, request_id, str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                curated_output = self.get_curated_webapp(self.resource_group, item.name, item)
-                results.append(curated_output)
-        return results
+        return self.get_curated_webapps([item for item in response if self.has_tags(item.tags, self.tags)])
 
     def list_all(self):
         self.log('List web apps in current subscription')
@@ -239,48 +256,25 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
             request_id = exc.request_id if exc.request_id else ''
             self.fail("Error listing web apps, request id {0} - {1}".format(request_id, str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                curated_output = self.get_curated_webapp(item.resource_group, item.name, item)
-                results.append(curated_output)
-        return results
+        return self.get_curated_webapps([item for item in response if self.has_tags(item.tags, self.tags)])
+
+    # the methods below run on worker threads: they raise on errors instead of calling self.fail
 
     def list_webapp_configuration(self, resource_group, name):
         self.log('Get web app {0} configuration'.format(name))
-
-        response = []
-
-        try:
-            response = self.web_client.web_apps.get_configuration(resource_group_name=resource_group, name=name)
-        except CloudError as ex:
-            request_id = ex.request_id if ex.request_id else ''
-            self.fail('Error getting web app {0} configuration, request id {1} - {2}'.format(name, request_id, str(ex)))
-
+        response = self.web_client.web_apps.get_configuration(resource_group_name=resource_group, name=name)
         return response.as_dict()
 
     def list_webapp_appsettings(self, resource_group, name):
         self.log('Get web app {0} app settings'.format(name))
-
-        response = []
-
-        try:
-            response = self.web_client.web_apps.list_application_settings(resource_group_name=resource_group, name=name)
-        except CloudError as ex:
-            request_id = ex.request_id if ex.request_id else ''
-            self.fail('Error getting web app {0} app settings, request id {1} - {2}'.format(name, request_id, str(ex)))
-
+        response = self.web_client.web_apps.list_application_settings(resource_group_name=resource_group, name=name)
         return response.as_dict()
 
     def get_publish_credentials(self, resource_group, name):
         self.log('Get web app {0} publish credentials'.format(name))
-        try:
-            poller = self.web_client.web_apps.list_publishing_credentials(resource_group, name)
-            if isinstance(poller, AzureOperationPoller):
-                response = self.get_poller_result(poller)
-        except CloudError as ex:
-            request_id = ex.request_id if ex.request_id else ''
-            self.fail('Error getting web app {0} publishing credentials - {1}'.format(request_id, str(ex)))
+        response = self.web_client.web_apps.list_publishing_credentials(resource_group, name)
+        if hasattr(response, 'done') and hasattr(response, 'result'):
+            response = self.get_poller_result(response)
         return response
 
     def get_webapp_ftp_publish_url(self, resource_group, name):
@@ -289,44 +283,63 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
         self.log('Get web app {0} app publish profile'.format(name))
 
         url = None
-        try:
-            content = self.web_client.web_apps.list_publishing_profile_xml_with_secrets(resource_group_name=resource_group, name=name)
-            if not content:
-                return url
+        content = self.web_client.web_apps.list_publishing_profile_xml_with_secrets(resource_group_name=resource_group, name=name)
+        if not content:
+            return url
 
-            full_xml = ''
-            for f in content:
-                full_xml += f.decode()
-            profiles = xmltodict.parse(full_xml, xml_attribs=True)['publishData']['publishProfile']
+        full_xml = ''
+        for f in content:
+            full_xml += f.decode()
+        profiles = xmltodict.parse(full_xml, xml_attribs=True)['publishData']['publishProfile']
 
-            if not profiles:
-                return url
+        if not profiles:
+            return url
 
-            for profile in profiles:
-                if profile['@publishMethod'] == 'FTP':
-                    url = profile['@publishUrl']
-
-        except CloudError as ex:
-            self.fail('Error getting web app {0} app settings'.format(name))
+        for profile in profiles:
+            if profile['@publishMethod'] == 'FTP':
+                url = profile['@publishUrl']
 
         return url
 
-    def get_curated_webapp(self, resource_group, name, webapp):
-        pip = self.serialize_obj(webapp, AZURE_OBJECT_CLASS)
+    def get_webapp_details(self, webapp):
+        '''
+        Retrieve the per web app details selected by detail and return_publish_profile.
 
+        :param webapp: Site object
+        :return: dict of keyword arguments for construct_curated_webapp
+        '''
+        resource_group = webapp.resource_group
+        name = webapp.name
+        details = dict()
         try:
-            site_config = self.list_webapp_configuration(resource_group, name)
-            app_settings = self.list_webapp_appsettings(resource_group, name)
-            publish_cred = self.get_publish_credentials(resource_group, name)
-            ftp_publish_url = self.get_webapp_ftp_publish_url(resource_group, name)
+            if self.detail in ['config', 'full']:
+                details['configuration'] = self.list_webapp_configuration(resource_group, name)
+                details['app_settings'] = self.list_webapp_appsettings(resource_group, name)
+            if self.detail == 'full':
+                details['ftp_publish_url'] = self.get_webapp_ftp_publish_url(resource_group, name)
+            if self.return_publish_profile:
+                details['publish_credentials'] = self.get_publish_credentials(resource_group, name)
         except CloudError as ex:
-            pass
-        return self.construct_curated_webapp(webapp=pip,
-                                             configuration=site_config,
-                                             app_settings=app_settings,
-                                             deployment_slot=None,
-                                             ftp_publish_url=ftp_publish_url,
-                                             publish_credentials=publish_cred)
+            request_id = ex.request_id if ex.request_id else ''
+            raise Exception('Error getting web app {0} details, request id {1} - {2}'.format(name, request_id, str(ex)))
+        return details
+
+    def get_curated_webapps(self, webapps):
+        '''
+        Curate a list of web apps, retrieving their details concurrently.
+
+        :param webapps: list of Site objects
+        :return: list of curated dicts, in the order of webapps
+        '''
+        try:
+            details = self.map_concurrently(self.get_webapp_details, webapps, self.concurrency)
+        except Exception as ex:
+            self.fail(str(ex))
+
+        return [self.construct_curated_webapp(webapp=self.serialize_obj(webapp, AZURE_OBJECT_CLASS),
+                                              deployment_slot=None,
+                                              **detail)
+                for webapp, detail in zip(webapps, details)]
 
     def construct_curated_webapp(self,
                                  webapp,
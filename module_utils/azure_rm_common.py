@@ -10,8 +10,13 @@ import copy
 import inspect
 import traceback
 import json
+import time
+import random
+import hashlib
+import threading
 
 from os.path import expanduser
+from multiprocessing.pool import ThreadPool
 
 from ansible.module_utils.basic import AnsibleModule
 try:
@@ -19,6 +24,8 @@ try:
 except:
     ANSIBLE_VERSION='unknown'
 from ansible.module_utils.six.moves import configparser
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.azure_rm_common_cache import AzureRMFileCache, cache_key
 import ansible.module_utils.six.moves.urllib.parse as urlparse
 
 AZURE_COMMON_ARGS = dict(
@@ -96,6 +103,46 @@ VSCODEEXT_USER_AGENT_KEY = 'VSCODEEXT_USER_AGENT'
 CIDR_PATTERN = re.compile(r"(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1"
                           r"[0-9]{2}|2[0-4][0-9]|25[0-5])(/([0-9]|[1-2][0-9]|3[0-2]))")
 
+# AAD tokens are shared between module invocations through this file; set ANSIBLE_AZURE_TOKEN_CACHE=false to disable
+AZURE_TOKEN_CACHE_PATH = '~/.azure/ansible_token_cache.json'
+AZURE_TOKEN_CACHE_ENV = 'ANSIBLE_AZURE_TOKEN_CACHE'
+# stop using a cached token this many seconds before it expires
+AZURE_TOKEN_REFRESH_MARGIN = 300
+# how long the subscription discovered through MSI is reused, override with ANSIBLE_AZURE_MSI_SUBSCRIPTION_TTL (0 disables).
+# A cached subscription that gets rejected (401, 403, SubscriptionNotFound) is discovered again right away.
+AZURE_MSI_SUBSCRIPTION_TTL = 3600
+AZURE_MSI_SUBSCRIPTION_TTL_ENV = 'ANSIBLE_AZURE_MSI_SUBSCRIPTION_TTL'
+
+# results of slow, rarely changing lookups (VM sizes, image versions, custom images) are shared between module
+# invocations through this file for AZURE_LOOKUP_CACHE_TTL seconds; set ANSIBLE_AZURE_LOOKUP_CACHE=false to disable
+AZURE_LOOKUP_CACHE_PATH = '~/.azure/ansible_lookup_cache.json'
+AZURE_LOOKUP_CACHE_ENV = 'ANSIBLE_AZURE_LOOKUP_CACHE'
+AZURE_LOOKUP_CACHE_TTL = 3600
+
+# long running operations: the first status check happens after AZURE_POLL_INITIAL_DELAY seconds (the client
+# long_running_operation_timeout), then get_poller_result backs off by AZURE_POLL_BACKOFF up to AZURE_POLL_MAX_DELAY.
+# A Retry-After header on the last response always wins.
+AZURE_POLL_INITIAL_DELAY = 0.5
+AZURE_POLL_MAX_DELAY = 15
+AZURE_POLL_BACKOFF = 2
+
+# waiting for a deleted resource to disappear: jittered backoff between existence checks, bounded by a timeout
+AZURE_DELETE_INITIAL_DELAY = 1
+AZURE_DELETE_MAX_DELAY = 20
+AZURE_DELETE_TIMEOUT = 1800
+
+# clients of one endpoint share an HTTP session keeping up to AZURE_HTTP_POOL_SIZE connections per host open, override
+# with ANSIBLE_AZURE_HTTP_POOL_SIZE. ANSIBLE_AZURE_HTTP_KEEP_ALIVE=false closes the connections after every request.
+AZURE_HTTP_POOL_SIZE = 16
+AZURE_HTTP_POOL_SIZE_ENV = 'ANSIBLE_AZURE_HTTP_POOL_SIZE'
+AZURE_HTTP_KEEP_ALIVE_ENV = 'ANSIBLE_AZURE_HTTP_KEEP_ALIVE'
+
+# facts modules filtering by tag list the matching resources of any type server side. Up to AZURE_TAGGED_GET_LIMIT
+# matches are fetched one by one, AZURE_LIST_CONCURRENCY at the same time; beyond that, listing the resource type page
+# by page takes fewer requests.
+AZURE_LIST_CONCURRENCY = 8
+AZURE_TAGGED_GET_LIMIT = 20
+
 AZURE_SUCCESS_STATE = "Succeeded"
 AZURE_FAILED_STATE = "Failed"
 
@@ -136,37 +183,50 @@ try:
     from msrestazure.azure_active_directory import MSIAuthentication
     from msrestazure.tools import parse_resource_id, resource_id, is_valid_resource_id
     from msrestazure import azure_cloud
+    import requests
+    from requests.adapters import HTTPAdapter
     from azure.common.credentials import ServicePrincipalCredentials, UserPassCredentials
-    from azure.mgmt.monitor.version import VERSION as monitor_client_version
-    from azure.mgmt.network.version import VERSION as network_client_version
-    from azure.mgmt.storage.version import VERSION as storage_client_version
-    from azure.mgmt.compute.version import VERSION as compute_client_version
-    from azure.mgmt.resource.version import VERSION as resource_client_version
-    from azure.mgmt.dns.version import VERSION as dns_client_version
-    from azure.mgmt.web.version import VERSION as web_client_version
-    from azure.mgmt.network import NetworkManagementClient
-    from azure.mgmt.resource.resources import ResourceManagementClient
-    from azure.mgmt.resource.subscriptions import SubscriptionClient
-    from azure.mgmt.storage import StorageManagementClient
-    from azure.mgmt.compute import ComputeManagementClient
-    from azure.mgmt.dns import DnsManagementClient
-    from azure.mgmt.monitor import MonitorManagementClient
-    from azure.mgmt.web import WebSiteManagementClient
-    from azure.mgmt.containerservice import ContainerServiceClient
-    from azure.mgmt.marketplaceordering import MarketplaceOrderingAgreements
-    from azure.mgmt.trafficmanager import TrafficManagerManagementClient
-    from azure.storage.cloudstorageaccount import CloudStorageAccount
-    from azure.storage.blob import PageBlobService, BlockBlobService
-    from adal.authentication_context import AuthenticationContext
-    from azure.mgmt.sql import SqlManagementClient
-    from azure.mgmt.rdbms.postgresql import PostgreSQLManagementClient
-    from azure.mgmt.rdbms.mysql import MySQLManagementClient
-    from azure.mgmt.containerregistry import ContainerRegistryManagementClient
-    from azure.mgmt.containerinstance import ContainerInstanceManagementClient
 except ImportError as exc:
     HAS_AZURE_EXC = exc
     HAS_AZURE = False
 
+# Management SDKs are imported the first time a module asks for them (see AzureRMModuleBase.import_azure_type),
+# so a module only pays the import cost, and only needs the package installed, for the clients it uses.
+# name -> (python module, pip package)
+AZURE_LAZY_IMPORTS = dict(
+    NetworkManagementClient=('azure.mgmt.network', 'azure-mgmt-network'),
+    ResourceManagementClient=('azure.mgmt.resource.resources', 'azure-mgmt-resource'),
+    SubscriptionClient=('azure.mgmt.resource.subscriptions', 'azure-mgmt-resource'),
+    StorageManagementClient=('azure.mgmt.storage', 'azure-mgmt-storage'),
+    ComputeManagementClient=('azure.mgmt.compute', 'azure-mgmt-compute'),
+    DnsManagementClient=('azure.mgmt.dns', 'azure-mgmt-dns'),
+    MonitorManagementClient=('azure.mgmt.monitor', 'azure-mgmt-monitor'),
+    WebSiteManagementClient=('azure.mgmt.web', 'azure-mgmt-web'),
+    ContainerServiceClient=('azure.mgmt.containerservice', 'azure-mgmt-containerservice'),
+    MarketplaceOrderingAgreements=('azure.mgmt.marketplaceordering', 'azure-mgmt-marketplaceordering'),
+    TrafficManagerManagementClient=('azure.mgmt.trafficmanager', 'azure-mgmt-trafficmanager'),
+    SqlManagementClient=('azure.mgmt.sql', 'azure-mgmt-sql'),
+    PostgreSQLManagementClient=('azure.mgmt.rdbms.postgresql', 'azure-mgmt-rdbms'),
+    MySQLManagementClient=('azure.mgmt.rdbms.mysql', 'azure-mgmt-rdbms'),
+    ContainerRegistryManagementClient=('azure.mgmt.containerregistry', 'azure-mgmt-containerregistry'),
+    ContainerInstanceManagementClient=('azure.mgmt.containerinstance', 'azure-mgmt-containerinstance'),
+    PageBlobService=('azure.storage.blob', 'azure-storage'),
+    BlockBlobService=('azure.storage.blob', 'azure-storage'),
+    AuthenticationContext=('adal.authentication_context', 'adal'),
+)
+
+
+def import_azure_type(name):
+    '''
+    Import a type listed in AZURE_LAZY_IMPORTS. Raises ImportError if its package is not installed.
+
+    :param name: name of the type, eg. 'NetworkManagementClient'
+    :return: the type
+    '''
+    module_name = AZURE_LAZY_IMPORTS[name][0]
+    return getattr(importlib.import_module(module_name), name)
+
+
 try:
     from azure.cli.core.util import CLIError
     from azure.common.credentials import get_azure_cli_credentials, get_cli_profile
@@ -198,6 +258,30 @@ def normalize_location_name(name):
     return name.replace(' ', '').lower()
 
 
+def select_fields(obj, paths):
+    '''
+    Project a dict onto a list of dotted field paths, keeping the nesting of the selected fields.
+
+    :param obj: dict, eg. a serialized resource
+    :param paths: list of paths, eg. ['name', 'properties.provisioningState']
+    :return: dict holding only the selected fields; missing fields are left out
+    '''
+    result = dict()
+    for path in paths:
+        keys = path.split('.')
+        value = obj
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = result
+            for key in keys[:-1]:
+                target = target.setdefault(key, dict())
+            target[keys[-1]] = value
+    return result
+
+
 # FUTURE: either get this from the requirements file (if we can be sure it's always available at runtime)
 # or generate the requirements files from this so we only have one source of truth to maintain...
 AZURE_PKG_VERSIONS = {
@@ -238,6 +322,153 @@ AZURE_PKG_VERSIONS = {
 
 AZURE_MIN_RELEASE = '2.0.0'
 
+# Serializer per tuple of enum module names, see AzureRMModuleBase.get_serializer
+_SERIALIZER_CACHE = dict()
+
+# Management clients per client type, API version or profile, endpoint and identity, see get_mgmt_svc_client
+_CLIENT_CACHE = dict()
+
+# Constructor argspec per client type, filled once its version has been checked
+_CLIENT_ARGSPEC_CACHE = dict()
+
+# HTTP adapter (urllib3 connection pools) per endpoint, and per http_adapter_scope of the client if it has one, shared
+# by all clients and threads talking to it
+_ADAPTER_CACHE = dict()
+
+
+def share_session(client, base_url):
+    '''
+    Make an msrest based client send its requests through the HTTP adapter shared by all clients of base_url, and
+    keep its connections open between requests.
+
+    msrest keeps one requests session per client and thread. The shared adapter is mounted on each of these sessions
+    when it is created, so requests sent from worker threads reuse the connections of the main thread and of the
+    other clients of the endpoint.
+
+    :param client: management client or GenericRestClient
+    :param base_url: endpoint of the client
+    :return: True if the adapter is shared, False if the msrest version does not expose its sessions
+    '''
+    try:
+        config = client._client.config
+        driver = config.pipeline._sender.driver
+        init_session = driver._init_session
+        sessions = driver._session_mapping
+    except AttributeError:
+        return False
+
+    # the adapter carries the urllib3 retry policy, clients with a policy of their own get an adapter of their own
+    adapter_key = base_url
+    if getattr(client, 'http_adapter_scope', None):
+        adapter_key = (base_url, client.http_adapter_scope)
+    adapter = _ADAPTER_CACHE.get(adapter_key)
+    if adapter is None:
+        pool_size = http_pool_size()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        _ADAPTER_CACHE[adapter_key] = adapter
+
+    def init_shared_session(session):
+        for prefix in ['http://', 'https://']:
+            session.mount(prefix, adapter)
+        init_session(session)
+
+    # msrest calls _init_session on the session of every thread the first time the thread sends a request
+    driver._init_session = init_shared_session
+    session = getattr(sessions, 'session', None)
+    if session is not None:
+        init_shared_session(session)
+    # without keep_alive msrest closes the session after every request
+    config.keep_alive = os.environ.get(AZURE_HTTP_KEEP_ALIVE_ENV, 'true').lower() not in ['false', 'no', '0']
+    return True
+
+
+def http_pool_size():
+    try:
+        return max(1, int(os.environ.get(AZURE_HTTP_POOL_SIZE_ENV, AZURE_HTTP_POOL_SIZE)))
+    except ValueError:
+        return AZURE_HTTP_POOL_SIZE
+
+
+def get_connection_stats():
+    '''
+    Count the requests sent through the shared adapters, from any thread, and how many of them needed a new
+    connection.
+
+    :return: dict of counter name to value, empty if no request was sent
+    '''
+    requests = connections = 0
+    for adapter in _ADAPTER_CACHE.values():
+        pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+        if pools is None:
+            continue
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests += getattr(pool, 'num_requests', 0)
+                connections += getattr(pool, 'num_connections', 0)
+    if not requests:
+        return dict()
+    return dict(http_requests=requests, http_connections_new=connections,
+                http_connections_reused=max(0, requests - connections))
+
+
+class AzureRMPollingTimeout(Exception):
+    pass
+
+
+class AzureRMPollingBackoff(object):
+    '''
+    Exponential backoff delay for the polling thread of an LROPoller or AzureOperationPoller.
+
+    Replaces the fixed long_running_operation_timeout sleep of the SDK polling method from its next iteration on. The
+    polling thread starts with the SDK call, so its first sleep uses the AZURE_POLL_INITIAL_DELAY set on the client
+    configuration by get_mgmt_svc_client. A Retry-After header on the last response is honoured as-is; the status URL
+    itself (Azure-AsyncOperation or Location) is still chosen by the SDK.
+    '''
+
+    def __init__(self, polling, initial_delay=AZURE_POLL_INITIAL_DELAY, max_delay=AZURE_POLL_MAX_DELAY,
+                 backoff=AZURE_POLL_BACKOFF):
+        self._polling = polling
+        self.delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.polls = 0
+
+    @classmethod
+    def install(cls, poller):
+        '''
+        Attach a backoff to a poller, return it or None if the poller has no polling thread to tune.
+        '''
+        # msrest LROPoller delegates to a polling method (ARMPolling), AzureOperationPoller polls by itself
+        polling = getattr(poller, '_polling_method', poller)
+        if not hasattr(polling, '_delay'):
+            return None
+        backoff = polling.__dict__.get('_delay')
+        if not isinstance(backoff, cls):
+            backoff = cls(polling)
+            # the polling thread looks up _delay on every iteration, the instance attribute shadows the method
+            polling._delay = backoff
+        return backoff
+
+    def retry_after(self):
+        response = getattr(self._polling, '_response', None)
+        if response is None:
+            return None
+        try:
+            return int(response.headers.get('retry-after'))
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    def __call__(self):
+        if getattr(self._polling, '_response', None) is None:
+            return
+        delay = self.retry_after()
+        if delay is None:
+            delay = self.delay
+            self.delay = min(self.delay * self.backoff, self.max_delay)
+        self.polls += 1
+        time.sleep(delay)
+
 
 class AzureRMModuleBase(object):
     def __init__(self, derived_arg_spec, bypass_checks=False, no_log=False,
@@ -296,10 +527,17 @@ class AzureRMModuleBase(object):
         self._traffic_manager_management_client = None
         self._monitor_client = None
         self._resource = None
+        self._blob_clients = dict()
+        self._lookup_cache = None
+        if os.environ.get(AZURE_LOOKUP_CACHE_ENV, 'true').lower() not in ['false', 'no', '0']:
+            self._lookup_cache = AzureRMFileCache(AZURE_LOOKUP_CACHE_PATH)
 
         self.check_mode = self.module.check_mode
         self.api_profile = self.module.params.get('api_profile')
         self.facts_module = facts_module
+        # counters reported back in the module result as azure_stats, updated with _count from any thread
+        self.azure_stats = dict()
+        self._azure_stats_lock = threading.Lock()
         # self.debug = self.module.params.get('debug')
 
         # delegate auth to AzureRMAuth class (shared with all plugin types)
@@ -311,8 +549,33 @@ class AzureRMModuleBase(object):
 
         if not skip_exec:
             res = self.exec_module(**self.module.params)
+            azure_stats = self.get_azure_stats()
+            if azure_stats and isinstance(res, dict):
+                res['azure_stats'] = azure_stats
             self.module.exit_json(**res)
 
+    def _count(self, name, value=1):
+        '''
+        Add value to the azure_stats counter name. Long running operations are awaited from worker threads too, so
+        the update holds a lock.
+        '''
+        with self._azure_stats_lock:
+            self.azure_stats[name] = round(self.azure_stats.get(name, 0) + value, 3)
+
+    def get_azure_stats(self):
+        '''
+        Collect the counters gathered by this module and its AzureRMAuth instance.
+
+        :return: dict of counter name to value
+        '''
+        stats = dict(self.azure_auth.stats)
+        stats.update(self.azure_stats)
+        for client in _CLIENT_CACHE.values():
+            for name, value in getattr(client, 'stats', {}).items():
+                stats[name] = stats.get(name, 0) + value
+        stats.update(get_connection_stats())
+        return stats
+
     def check_client_version(self, client_type):
         # Ensure Azure modules are at least 2.0.0rc5.
         package_version = AZURE_PKG_VERSIONS.get(client_type.__name__, None)
@@ -332,6 +595,19 @@ class AzureRMModuleBase(object):
                 self.module.warn("Installed azure-mgmt-{0} client version is {1}. The expected version is {2}. Try "
                                  "`pip install ansible[azure]`".format(client_name, client_version, expected_version))
 
+    def import_azure_type(self, name):
+        '''
+        Import an Azure SDK type on first use, failing the module if its package is missing.
+
+        :param name: name of the type, eg. 'NetworkManagementClient'
+        :return: the type
+        '''
+        try:
+            return import_azure_type(name)
+        except ImportError as exc:
+            self.fail("Do you have {0} installed? Try `pip install ansible[azure]`"
+                      "- {1}".format(AZURE_LAZY_IMPORTS[name][1], exc))
+
     def exec_module(self, **kwargs):
         self.fail("Error: {0} failed to implement exec_module method.".format(self.__class__.__name__))
 
@@ -368,18 +644,24 @@ class AzureRMModuleBase(object):
                 if not isinstance(value, str):
                     self.fail("Tags values must be strings. Found {0}:{1}".format(str(key), str(value)))
 
-    def update_tags(self, tags):
+    def update_tags(self, tags, param_tags=None, append_tags=None):
         '''
         Call from the module to update metadata tags. Returns tuple
         with bool indicating if there was a change and dict of new
         tags to assign to the object.
 
         :param tags: metadata tags from the object
+        :param param_tags: requested tags, defaults to the tags module parameter
+        :param append_tags: whether to keep the other tags, defaults to the append_tags module parameter
         :return: bool, dict
         '''
         new_tags = copy.copy(tags) if isinstance(tags, dict) else dict()
-        param_tags = self.module.params.get('tags') if isinstance(self.module.params.get('tags'), dict) else dict()
-        append_tags = self.module.params.get('append_tags') if self.module.params.get('append_tags') is not None else True
+        if param_tags is None:
+            param_tags = self.module.params.get('tags')
+        param_tags = param_tags if isinstance(param_tags, dict) else dict()
+        if append_tags is None:
+            append_tags = self.module.params.get('append_tags')
+        append_tags = append_tags if append_tags is not None else True
         changed = False
         # check add or update
         for key, value in param_tags.items():
@@ -459,35 +741,222 @@ class AzureRMModuleBase(object):
         :param enum_modules: List of module names to build enum dependencies from.
         :return: serialized result
         '''
-        enum_modules = [] if enum_modules is None else enum_modules
+        serializer = self.get_serializer(enum_modules)
+        return serializer.body(obj, class_name, keep_readonly=True)
+
+    def serialize_fields(self, obj, class_name, paths, enum_modules=None):
+        '''
+        Return a JSON representation of the selected fields of an Azure object. Only the attributes holding a selected
+        field are serialized, which is much cheaper than serialize_obj for big objects like security groups.
 
-        dependencies = dict()
-        if enum_modules:
-            for module_name in enum_modules:
+        :param obj: Azure object
+        :param class_name: Name of the object's class
+        :param paths: list of dotted paths of the serialized form, eg. ['name', 'properties.securityRules']. All
+                      fields are returned when empty.
+        :param enum_modules: List of module names to build enum dependencies from.
+        :return: serialized result holding only the selected fields
+        '''
+        if not paths:
+            return self.serialize_obj(obj, class_name, enum_modules)
+        partial = copy.copy(obj)
+        for attr, attr_desc in obj._attribute_map.items():
+            key = attr_desc['key'].replace('\\.', '.')
+            if obj._validation.get(attr, dict()).get('required'):
+                continue
+            if not any(path == key or path.startswith(key + '.') or key.startswith(path + '.') for path in paths):
+                setattr(partial, attr, None)
+        return select_fields(self.serialize_obj(partial, class_name, enum_modules), paths)
+
+    def get_serializer(self, enum_modules=None):
+        '''
+        Return a Serializer knowing the classes of the given modules. Serializers are built once per process for
+        each combination of modules, facts modules serializing thousands of objects reuse the same instance.
+
+        :param enum_modules: List of module names to build enum dependencies from.
+        :return: msrest Serializer
+        '''
+        key = tuple(enum_modules or [])
+        serializer = _SERIALIZER_CACHE.get(key)
+        if serializer is None:
+            dependencies = dict()
+            for module_name in key:
                 mod = importlib.import_module(module_name)
                 for mod_class_name, mod_class_obj in inspect.getmembers(mod, predicate=inspect.isclass):
                     dependencies[mod_class_name] = mod_class_obj
-            self.log("dependencies: ")
-            self.log(str(dependencies))
-        serializer = Serializer(classes=dependencies)
-        return serializer.body(obj, class_name, keep_readonly=True)
+            if dependencies:
+                self.log("dependencies: ")
+                self.log(str(dependencies))
+            serializer = Serializer(classes=dependencies)
+            _SERIALIZER_CACHE[key] = serializer
+        return serializer
+
+    def map_concurrently(self, func, items, concurrency):
+        '''
+        Call func for every item on a bounded pool of threads.
+
+        func runs outside the main thread, so it must raise on errors instead of calling self.fail. The first
+        exception raised by func is re-raised here once all calls finished.
+
+        :param func: callable taking one item
+        :param items: iterable of items
+        :param concurrency: maximum number of calls running at the same time
+        :return: list of results, in the order of items
+        '''
+        items = list(items)
+        if not concurrency or concurrency <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        pool = ThreadPool(min(concurrency, len(items)))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def list_resources(self, list_fn, resource_type=None, get_fn=None, resource_group=None, tags=None):
+        '''
+        Generator over the resources carrying the given tags, for facts modules. Resources are streamed page by
+        page, only the matching ones are kept by the caller.
+
+        When resource_type and get_fn are given, the first tag is pushed to the server as a $filter on the generic
+        resources list and, if only a few resources of that type match, they are fetched with get_fn. Otherwise
+        list_fn lists all candidates. Every resource is checked against all tags with has_tags either way.
+
+        :param list_fn: callable returning an iterator over all candidate resources
+        :param resource_type: resource type, eg. Microsoft.Network/networkInterfaces
+        :param get_fn: callable taking a resource group and a resource name, returning the resource
+        :param resource_group: name of the resource group the resources are listed in, None for the subscription
+        :param tags: list of tag keys or tag key:value pairs
+        :return: generator of resources
+        '''
+        items = None
+        if tags and isinstance(tags, list) and resource_type and get_fn:
+            items = self.list_tagged_resources(resource_type, get_fn, resource_group, tags[0])
+        if items is None:
+            items = list_fn()
+        for item in items:
+            if self.has_tags(item.tags, tags):
+                yield item
+
+    def list_tagged_resources(self, resource_type, get_fn, resource_group, tag, limit=AZURE_TAGGED_GET_LIMIT):
+        '''
+        Resources of a type carrying a tag, found with the tag filter of the generic resources list. The generic
+        resources don't have all properties, so the matching ones are fetched with get_fn, one request each. That
+        only beats listing the resource type page by page (about 100 resources per request) for a few matches, so
+        nothing is fetched when more than limit resources match.
+
+        :param resource_type: resource type, eg. Microsoft.Network/networkInterfaces
+        :param get_fn: callable taking a resource group and a resource name, returning the resource
+        :param resource_group: name of the resource group the resources are listed in, None for the subscription
+        :param tag: tag key or tag key:value pair
+        :param limit: maximum number of resources fetched one by one
+        :return: list of resources, or None when more than limit resources match
+        '''
+        tag_key, tag_value = tag.split(':', 1) if ':' in tag else (tag, None)
+        query_filter = "tagName eq '{0}'".format(tag_key.replace("'", "''"))
+        if tag_value:
+            query_filter += " and tagValue eq '{0}'".format(tag_value.replace("'", "''"))
+        self.log("Listing {0} with filter {1}".format(resource_type, query_filter))
+
+        if resource_group:
+            resources = self.rm_client.resources.list_by_resource_group(resource_group, filter=query_filter)
+        else:
+            resources = self.rm_client.resources.list(filter=query_filter)
+
+        # the tag filter can't be combined with a resourceType filter, the type is checked here instead
+        ids = []
+        for resource in resources:
+            if resource.type.lower() == resource_type.lower():
+                ids.append(resource.id)
+                if len(ids) > limit:
+                    self.log("More than {0} tagged {1}, listing them instead".format(limit, resource_type))
+                    return None
+
+        def get_item(resource_id):
+            resource = parse_resource_id(resource_id)
+            try:
+                return get_fn(resource['resource_group'], resource['name'])
+            except CloudError as exc:
+                # deleted since it was listed
+                if exc.status_code == 404:
+                    return None
+                raise
 
-    def get_poller_result(self, poller, wait=5):
+        return [item for item in self.map_concurrently(get_item, ids, AZURE_LIST_CONCURRENCY) if item]
+
+    def get_poller_result(self, poller, wait=5, timeout=None):
         '''
         Consistent method of waiting on and retrieving results from Azure's long poller
 
         :param poller Azure poller object
+        :param wait: maximum number of seconds between two checks of the deadline
+        :param timeout: deadline in seconds for the operation, None waits until it finishes. The module fails
+                        when the deadline passes.
         :return object resulting from the original request
         '''
         try:
-            delay = wait
+            return self._wait_for_poller(poller, wait, timeout)
+        except AzureRMPollingTimeout as exc:
+            self.fail(str(exc))
+
+    def _wait_for_poller(self, poller, wait=5, timeout=None):
+        '''
+        Wait on a poller like get_poller_result, but raise AzureRMPollingTimeout when the deadline passes.
+        '''
+        backoff = AzureRMPollingBackoff.install(poller)
+        start = time.time()
+        try:
             while not poller.done():
+                delay = wait
+                if timeout is not None:
+                    remaining = start + timeout - time.time()
+                    if remaining <= 0:
+                        raise AzureRMPollingTimeout("Long running operation did not finish within {0} seconds".format(timeout))
+                    delay = min(wait, remaining)
                 self.log("Waiting for {0} sec".format(delay))
                 poller.wait(timeout=delay)
             return poller.result()
         except Exception as exc:
             self.log(str(exc))
             raise
+        finally:
+            self._count('lro_count')
+            self._count('lro_polls', backoff.polls if backoff else 0)
+            self._count('lro_wait_seconds', time.time() - start)
+
+    def wait_for_deletion(self, exists, poller=None, timeout=AZURE_DELETE_TIMEOUT, delay=AZURE_DELETE_INITIAL_DELAY,
+                          max_delay=AZURE_DELETE_MAX_DELAY):
+        '''
+        Wait until a deleted resource is gone. Some resources keep showing up for a while after their delete
+        operation finished, so the delete poller (when the SDK returns one) is awaited first and then the resource
+        is checked with a jittered exponential backoff.
+
+        :param exists: callable returning a truthy value while the resource still exists
+        :param poller: result of the SDK delete call, awaited if it is a poller
+        :param timeout: seconds to wait in total before failing the module
+        :param delay: seconds before the first existence check after the poller finished
+        :param max_delay: upper bound of the delay between two existence checks
+        :return: None
+        '''
+        start = time.time()
+        if poller is not None and hasattr(poller, 'done') and hasattr(poller, 'result'):
+            try:
+                self._wait_for_poller(poller, timeout=timeout)
+            except AzureRMPollingTimeout:
+                self.fail("Resource still exists {0} seconds after it was deleted".format(timeout))
+            except Exception as exc:
+                self.fail("Error deleting resource: {0}".format(str(exc)))
+        checks = 0
+        while exists():
+            elapsed = time.time() - start
+            if elapsed >= timeout:
+                self.fail("Resource still exists {0} seconds after it was deleted".format(timeout))
+            # full jitter keeps many concurrent tasks from checking in lock step
+            sleep = min(random.uniform(delay / 2.0, delay), timeout - elapsed)
+            self.log("Resource still exists, checking again in {0:.1f} sec".format(sleep))
+            time.sleep(sleep)
+            delay = min(delay * 2, max_delay)
+            checks += 1
+        self._count('delete_checks', checks)
 
     def check_provisioning_state(self, azure_object, requested_state='present'):
         '''
@@ -524,30 +993,97 @@ class AzureRMModuleBase(object):
                 self.fail("Error {0} has a provisioning state of {1}. Expecting state to be {2}.".format(
                     azure_object.name, azure_object.provisioning_state, AZURE_SUCCESS_STATE))
 
+    def get_cached_lookup(self, kind, parts, fetch, expect=None):
+        '''
+        Return the result of a slow lookup, from the lookup cache while it is fresh. Modules offering a
+        refresh_lookup_cache option bypass the cached value when it is set.
+
+        :param kind: name of the lookup, eg. 'vm_sizes'
+        :param parts: list of values identifying the query within the subscription, eg. the location
+        :param fetch: callable returning the JSON serializable result of the lookup
+        :param expect: optional callable telling whether a result has what the caller looks for; a cached result
+                       failing it is looked up again, eg. to find an image created after it was cached
+        :return: result of the lookup
+        '''
+        if self._lookup_cache is None:
+            return fetch()
+
+        key = cache_key('lookup', kind, self.subscription_id, *parts)
+        if not getattr(self, 'refresh_lookup_cache', False):
+            value = self._lookup_cache.get(key)
+            if value is not None and (expect is None or expect(value)):
+                self._count('lookup_cache_hits')
+                return value
+
+        self._count('lookup_cache_misses')
+        value = fetch()
+        self._lookup_cache.set(key, value, time.time() + AZURE_LOOKUP_CACHE_TTL)
+        return value
+
+    def list_vm_sizes(self, location, expect=None):
+        '''
+        Names of the virtual machine sizes available in a location.
+        '''
+        return self.get_cached_lookup('vm_sizes', [normalize_location_name(location)],
+                                      lambda: [size.name for size in self.compute_client.virtual_machine_sizes.list(location)],
+                                      expect)
+
+    def list_vm_image_versions(self, location, publisher, offer, sku, expect=None):
+        '''
+        Versions of a marketplace image, oldest first, as dicts with name, location and id.
+        '''
+        return self.get_cached_lookup('vm_image_versions', [normalize_location_name(location), publisher, offer, sku],
+                                      lambda: [version.as_dict() for version in
+                                               self.compute_client.virtual_machine_images.list(location, publisher, offer, sku)],
+                                      expect)
+
+    def list_custom_images(self, resource_group=None, expect=None):
+        '''
+        Custom images of a resource group, or of the subscription, as dicts with name and id.
+        '''
+        def fetch():
+            if resource_group:
+                images = self.compute_client.images.list_by_resource_group(resource_group)
+            else:
+                images = self.compute_client.images.list()
+            return [dict(name=image.name, id=image.id) for image in images]
+
+        return self.get_cached_lookup('custom_images', [resource_group or ''], fetch, expect)
+
     def get_blob_client(self, resource_group_name, storage_account_name, storage_blob_type='block'):
-        keys = dict()
+        '''
+        Return a blob service client of a storage account, built once per account and blob type.
+
+        Raises instead of failing the module, so best effort callers like VM deletion can carry on.
+        '''
+        # listing the keys is a management call, build one client per storage account
+        client_key = (resource_group_name, storage_account_name, storage_blob_type)
+        if client_key in self._blob_clients:
+            return self._blob_clients[client_key]
+
         try:
             # Get keys from the storage account
             self.log('Getting keys')
             account_keys = self.storage_client.storage_accounts.list_keys(resource_group_name, storage_account_name)
         except Exception as exc:
-            self.fail("Error getting keys for account {0} - {1}".format(storage_account_name, str(exc)))
+            raise Exception("Error getting keys for account {0} - {1}".format(storage_account_name, str(exc)))
 
         try:
             self.log('Create blob service')
             if storage_blob_type == 'page':
-                return PageBlobService(endpoint_suffix=self._cloud_environment.suffixes.storage_endpoint,
-                                       account_name=storage_account_name,
-                                       account_key=account_keys.keys[0].value)
+                blob_service_type = self.import_azure_type('PageBlobService')
             elif storage_blob_type == 'block':
-                return BlockBlobService(endpoint_suffix=self._cloud_environment.suffixes.storage_endpoint,
-                                        account_name=storage_account_name,
-                                        account_key=account_keys.keys[0].value)
+                blob_service_type = self.import_azure_type('BlockBlobService')
             else:
                 raise Exception("Invalid storage blob type defined.")
+            blob_client = blob_service_type(endpoint_suffix=self._cloud_environment.suffixes.storage_endpoint,
+                                            account_name=storage_account_name,
+                                            account_key=account_keys.keys[0].value)
         except Exception as exc:
-            self.fail("Error creating blob service client for storage account {0} - {1}".format(storage_account_name,
-                                                                                                str(exc)))
+            raise Exception("Error creating blob service client for storage account {0} - {1}".format(storage_account_name,
+                                                                                                      str(exc)))
+        self._blob_clients[client_key] = blob_client
+        return blob_client
 
     def create_default_pip(self, resource_group, location, public_ip_name, allocation_method='Dynamic', sku=None):
         '''
@@ -711,11 +1247,64 @@ class AzureRMModuleBase(object):
         # wrap basic strings in a dict that just defines the default
         return dict(default_api_version=profile_raw)
 
+    def get_client_argspec(self, client_type):
+        '''
+        Check the installed version of a client type and return its constructor argspec, once per process.
+
+        :param client_type: management client type
+        :return: argspec of client_type.__init__
+        '''
+        client_argspec = _CLIENT_ARGSPEC_CACHE.get(client_type)
+        if client_argspec is None:
+            self.check_client_version(client_type)
+            client_argspec = inspect.getargspec(client_type.__init__)
+            _CLIENT_ARGSPEC_CACHE[client_type] = client_argspec
+        return client_argspec
+
+    def _check_msi_subscription(self, response, *args, **kwargs):
+        '''
+        Response hook of the management clients while the subscription comes from the MSI subscription cache.
+
+        A 401, 403 or SubscriptionNotFound answer for that subscription may mean the MSI lost access to it, so the
+        subscription is discovered again, once. When another one is found, the clients move to it and the request
+        is sent again; otherwise the original response is returned.
+        '''
+        cached = self.azure_auth.cached_msi_subscription_id
+        if not cached or response.status_code not in [401, 403, 404]:
+            return None
+        request = response.request
+        prefix = '/subscriptions/{0}'.format(cached).lower()
+        if not urlparse.urlparse(request.url).path.lower().startswith(prefix):
+            return None
+        if response.status_code == 404 and 'SubscriptionNotFound' not in response.text:
+            return None
+        self.azure_auth.rediscover_msi_subscription()
+        subscription_id = self.azure_auth.subscription_id
+        if subscription_id.lower() == cached.lower():
+            return None
+        self.log('MSI subscription {0} was rejected, using {1}'.format(cached, subscription_id))
+        for client in list(_CLIENT_CACHE.values()):
+            if getattr(client.config, 'subscription_id', None) == cached:
+                client.config.subscription_id = subscription_id
+        request = request.copy()
+        request.url = re.sub(re.escape(prefix), '/subscriptions/' + subscription_id, request.url, count=1, flags=re.IGNORECASE)
+        return kwargs['msrest']['session'].send(request)
+
     def get_mgmt_svc_client(self, client_type, base_url=None, api_version=None):
-        self.log('Getting management service client {0}'.format(client_type.__name__))
-        self.check_client_version(client_type)
+        '''
+        Return the management client of a type for the current identity, built once per process and API version.
+
+        Cached clients are used from worker threads too. msrest gives every thread its own requests session, so
+        the connections are only reused across threads because share_session mounts the adapter of the endpoint
+        on each of these sessions.
 
-        client_argspec = inspect.getargspec(client_type.__init__)
+        :param client_type: management client type
+        :param base_url: endpoint, defaults to the resource manager of the cloud
+        :param api_version: API version, defaults to the one of the API profile
+        :return: management client
+        '''
+        self.log('Getting management service client {0}'.format(client_type.__name__))
+        client_argspec = self.get_client_argspec(client_type)
 
         if not base_url:
             # most things are resource_manager, don't make everyone specify
@@ -743,6 +1332,14 @@ class AzureRMModuleBase(object):
                     # remove profile; only pass API version if specified
                     client_kwargs.pop('profile')
 
+        # clients are reused for the lifetime of the process, eg. compute_client and a module's own compute client
+        # with another API version are built once. Connections are shared by share_session, not by the cache.
+        client_key = (client_type, client_kwargs.get('api_version'), str(client_kwargs.get('profile')), base_url,
+                      self.azure_auth.subscription_id, id(self.azure_auth.azure_credentials))
+        client = _CLIENT_CACHE.get(client_key)
+        if client is not None:
+            return client
+
         client = client_type(**client_kwargs)
 
         # FUTURE: remove this once everything exposes models directly (eg, containerinstance)
@@ -764,9 +1361,20 @@ class AzureRMModuleBase(object):
         if VSCODEEXT_USER_AGENT_KEY in os.environ:
             client.config.add_user_agent(os.environ[VSCODEEXT_USER_AGENT_KEY])
 
+        # the polling thread of a long running operation starts before get_poller_result sees the poller, the first
+        # status check uses this delay. Every long running operation started through this client must be awaited by
+        # get_poller_result or wait_for_deletion, which back off from there. A poller nobody waits for keeps checking
+        # every AZURE_POLL_INITIAL_DELAY seconds until the module exits.
+        client.config.long_running_operation_timeout = AZURE_POLL_INITIAL_DELAY
+
+        if self.azure_auth.cached_msi_subscription_id and hasattr(client.config, 'hooks'):
+            client.config.hooks.append(self._check_msi_subscription)
+
         if self.azure_auth._cert_validation_mode == 'ignore':
             client.config.session_configuration_callback = self._validation_ignore_callback
 
+        share_session(client, base_url)
+        _CLIENT_CACHE[client_key] = client
         return client
 
     # passthru methods to AzureAuth instance for backcompat
@@ -786,20 +1394,20 @@ class AzureRMModuleBase(object):
     def storage_client(self):
         self.log('Getting storage client...')
         if not self._storage_client:
-            self._storage_client = self.get_mgmt_svc_client(StorageManagementClient,
+            self._storage_client = self.get_mgmt_svc_client(self.import_azure_type('StorageManagementClient'),
                                                             base_url=self._cloud_environment.endpoints.resource_manager,
                                                             api_version='2018-07-01')
         return self._storage_client
 
     @property
     def storage_models(self):
-        return StorageManagementClient.models("2018-07-01")
+        return self.import_azure_type('StorageManagementClient').models("2018-07-01")
 
     @property
     def network_client(self):
         self.log('Getting network client')
         if not self._network_client:
-            self._network_client = self.get_mgmt_svc_client(NetworkManagementClient,
+            self._network_client = self.get_mgmt_svc_client(self.import_azure_type('NetworkManagementClient'),
                                                             base_url=self._cloud_environment.endpoints.resource_manager,
                                                             api_version='2018-08-01')
         return self._network_client
@@ -807,13 +1415,13 @@ class AzureRMModuleBase(object):
     @property
     def network_models(self):
         self.log("Getting network models...")
-        return NetworkManagementClient.models("2018-08-01")
+        return self.import_azure_type('NetworkManagementClient').models("2018-08-01")
 
     @property
     def rm_client(self):
         self.log('Getting resource manager client')
         if not self._resource_client:
-            self._resource_client = self.get_mgmt_svc_client(ResourceManagementClient,
+            self._resource_client = self.get_mgmt_svc_client(self.import_azure_type('ResourceManagementClient'),
                                                              base_url=self._cloud_environment.endpoints.resource_manager,
                                                              api_version='2017-05-10')
         return self._resource_client
@@ -821,13 +1429,13 @@ class AzureRMModuleBase(object):
     @property
     def rm_models(self):
         self.log("Getting resource manager models")
-        return ResourceManagementClient.models("2017-05-10")
+        return self.import_azure_type('ResourceManagementClient').models("2017-05-10")
 
     @property
     def compute_client(self):
         self.log('Getting compute client')
         if not self._compute_client:
-            self._compute_client = self.get_mgmt_svc_client(ComputeManagementClient,
+            self._compute_client = self.get_mgmt_svc_client(self.import_azure_type('ComputeManagementClient'),
                                                             base_url=self._cloud_environment.endpoints.resource_manager,
                                                             api_version='2017-03-30')
         return self._compute_client
@@ -835,13 +1443,13 @@ class AzureRMModuleBase(object):
     @property
     def compute_models(self):
         self.log("Getting compute models")
-        return ComputeManagementClient.models("2017-03-30")
+        return self.import_azure_type('ComputeManagementClient').models("2017-03-30")
 
     @property
     def dns_client(self):
         self.log('Getting dns client')
         if not self._dns_client:
-            self._dns_client = self.get_mgmt_svc_client(DnsManagementClient,
+            self._dns_client = self.get_mgmt_svc_client(self.import_azure_type('DnsManagementClient'),
                                                         base_url=self._cloud_environment.endpoints.resource_manager,
                                                         api_version='2018-05-01')
         return self._dns_client
@@ -849,13 +1457,13 @@ class AzureRMModuleBase(object):
     @property
     def dns_models(self):
         self.log("Getting dns models...")
-        return DnsManagementClient.models('2018-05-01')
+        return self.import_azure_type('DnsManagementClient').models('2018-05-01')
 
     @property
     def web_client(self):
         self.log('Getting web client')
         if not self._web_client:
-            self._web_client = self.get_mgmt_svc_client(WebSiteManagementClient,
+            self._web_client = self.get_mgmt_svc_client(self.import_azure_type('WebSiteManagementClient'),
                                                         base_url=self._cloud_environment.endpoints.resource_manager,
                                                         api_version='2016-08-01')
         return self._web_client
@@ -864,7 +1472,7 @@ class AzureRMModuleBase(object):
     def containerservice_client(self):
         self.log('Getting container service client')
         if not self._containerservice_client:
-            self._containerservice_client = self.get_mgmt_svc_client(ContainerServiceClient,
+            self._containerservice_client = self.get_mgmt_svc_client(self.import_azure_type('ContainerServiceClient'),
                                                                      base_url=self._cloud_environment.endpoints.resource_manager)
         return self._containerservice_client
 
@@ -872,7 +1480,7 @@ class AzureRMModuleBase(object):
     def sql_client(self):
         self.log('Getting SQL client')
         if not self._sql_client:
-            self._sql_client = self.get_mgmt_svc_client(SqlManagementClient,
+            self._sql_client = self.get_mgmt_svc_client(self.import_azure_type('SqlManagementClient'),
                                                         base_url=self._cloud_environment.endpoints.resource_manager)
         return self._sql_client
 
@@ -880,7 +1488,7 @@ class AzureRMModuleBase(object):
     def postgresql_client(self):
         self.log('Getting PostgreSQL client')
         if not self._postgresql_client:
-            self._postgresql_client = self.get_mgmt_svc_client(PostgreSQLManagementClient,
+            self._postgresql_client = self.get_mgmt_svc_client(self.import_azure_type('PostgreSQLManagementClient'),
                                                                base_url=self._cloud_environment.endpoints.resource_manager)
         return self._postgresql_client
 
@@ -888,7 +1496,7 @@ class AzureRMModuleBase(object):
     def mysql_client(self):
         self.log('Getting MySQL client')
         if not self._mysql_client:
-            self._mysql_client = self.get_mgmt_svc_client(MySQLManagementClient,
+            self._mysql_client = self.get_mgmt_svc_client(self.import_azure_type('MySQLManagementClient'),
                                                           base_url=self._cloud_environment.endpoints.resource_manager)
         return self._mysql_client
 
@@ -896,7 +1504,7 @@ class AzureRMModuleBase(object):
     def sql_client(self):
         self.log('Getting SQL client')
         if not self._sql_client:
-            self._sql_client = self.get_mgmt_svc_client(SqlManagementClient,
+            self._sql_client = self.get_mgmt_svc_client(self.import_azure_type('SqlManagementClient'),
                                                         base_url=self._cloud_environment.endpoints.resource_manager)
         return self._sql_client
 
@@ -904,7 +1512,7 @@ class AzureRMModuleBase(object):
     def containerregistry_client(self):
         self.log('Getting container registry mgmt client')
         if not self._containerregistry_client:
-            self._containerregistry_client = self.get_mgmt_svc_client(ContainerRegistryManagementClient,
+            self._containerregistry_client = self.get_mgmt_svc_client(self.import_azure_type('ContainerRegistryManagementClient'),
                                                                       base_url=self._cloud_environment.endpoints.resource_manager,
                                                                       api_version='2017-10-01')
 
@@ -914,7 +1522,7 @@ class AzureRMModuleBase(object):
     def containerinstance_client(self):
         self.log('Getting container instance mgmt client')
         if not self._containerinstance_client:
-            self._containerinstance_client = self.get_mgmt_svc_client(ContainerInstanceManagementClient,
+            self._containerinstance_client = self.get_mgmt_svc_client(self.import_azure_type('ContainerInstanceManagementClient'),
                                                                       base_url=self._cloud_environment.endpoints.resource_manager,
                                                                       api_version='2018-06-01')
 
@@ -924,7 +1532,7 @@ class AzureRMModuleBase(object):
     def marketplace_client(self):
         self.log('Getting marketplace agreement client')
         if not self._marketplace_client:
-            self._marketplace_client = self.get_mgmt_svc_client(MarketplaceOrderingAgreements,
+            self._marketplace_client = self.get_mgmt_svc_client(self.import_azure_type('MarketplaceOrderingAgreements'),
                                                                 base_url=self._cloud_environment.endpoints.resource_manager)
         return self._marketplace_client
 
@@ -932,7 +1540,7 @@ class AzureRMModuleBase(object):
     def traffic_manager_management_client(self):
         self.log('Getting traffic manager client')
         if not self._traffic_manager_management_client:
-            self._traffic_manager_management_client = self.get_mgmt_svc_client(TrafficManagerManagementClient,
+            self._traffic_manager_management_client = self.get_mgmt_svc_client(self.import_azure_type('TrafficManagerManagementClient'),
                                                                                base_url=self._cloud_environment.endpoints.resource_manager)
         return self._traffic_manager_management_client
 
@@ -940,11 +1548,59 @@ class AzureRMModuleBase(object):
     def monitor_client(self):
         self.log('Getting monitor client')
         if not self._monitor_client:
-            self._monitor_client = self.get_mgmt_svc_client(MonitorManagementClient,
+            self._monitor_client = self.get_mgmt_svc_client(self.import_azure_type('MonitorManagementClient'),
                                                             base_url=self._cloud_environment.endpoints.resource_manager)
         return self._monitor_client
 
 
+class AzureRMCachedTokenCredentials(object):
+    '''
+    Credentials signing requests with a cached AAD token.
+
+    A cached token can't be refreshed by itself. Once it gets within AZURE_TOKEN_REFRESH_MARGIN of its expiry, eg.
+    while waiting on a long running operation, the credentials it stands for are created with create_credentials
+    and sign all further requests, refreshing their own token.
+    '''
+
+    def __init__(self, token, create_credentials, on_refresh=None):
+        self.scheme = 'Bearer'
+        self.token = token
+        self._create_credentials = create_credentials
+        self._on_refresh = on_refresh
+        self._credentials = None
+        self._lock = threading.Lock()
+
+    def _expiring(self):
+        try:
+            return float(self.token.get('expires_on')) - AZURE_TOKEN_REFRESH_MARGIN <= time.time()
+        except (AttributeError, TypeError, ValueError):
+            return True
+
+    def _get_credentials(self, force=False):
+        with self._lock:
+            if self._credentials is None and (force or self._expiring()):
+                self._credentials = self._create_credentials()
+                self.token = self._credentials.token
+                if self._on_refresh:
+                    self._on_refresh(self.token)
+            return self._credentials
+
+    def signed_session(self, session=None):
+        credentials = self._get_credentials()
+        if credentials is not None:
+            return credentials.signed_session(session)
+        session = session or requests.Session()
+        session.headers['Authorization'] = "{0} {1}".format(self.scheme, self.token['access_token'])
+        return session
+
+    def refresh_session(self, session=None):
+        # the token was rejected, stop using it
+        credentials = self._get_credentials(force=True)
+        if hasattr(credentials, 'refresh_session'):
+            return credentials.refresh_session(session)
+        return credentials.signed_session(session)
+
+
 class AzureRMAuthException(Exception):
     pass
 
@@ -961,6 +1617,14 @@ class AzureRMAuth(object):
 
         self._cloud_environment = None
         self._adfs_authority_url = None
+        self._token_cache = None
+        # set while the subscription comes from the MSI subscription cache, until it is discovered again
+        self.cached_msi_subscription_id = None
+        self._msi_lock = threading.Lock()
+        # counters reported back in the module result as azure_stats
+        self.stats = dict()
+        if os.environ.get(AZURE_TOKEN_CACHE_ENV, 'true').lower() not in ['false', 'no', '0']:
+            self._token_cache = AzureRMFileCache(AZURE_TOKEN_CACHE_PATH)
 
         # authenticate
         self.credentials = self._get_credentials(
@@ -987,23 +1651,8 @@ class AzureRMAuth(object):
         raw_cloud_env = self.credentials.get('cloud_environment')
         if self.credentials.get('credentials') is not None and raw_cloud_env is not None:
             self._cloud_environment = raw_cloud_env
-        elif not raw_cloud_env:
-            self._cloud_environment = azure_cloud.AZURE_PUBLIC_CLOUD  # SDK default
         else:
-            # try to look up "well-known" values via the name attribute on azure_cloud members
-            all_clouds = [x[1] for x in inspect.getmembers(azure_cloud) if isinstance(x[1], azure_cloud.Cloud)]
-            matched_clouds = [x for x in all_clouds if x.name == raw_cloud_env]
-            if len(matched_clouds) == 1:
-                self._cloud_environment = matched_clouds[0]
-            elif len(matched_clouds) > 1:
-                self.fail("Azure SDK failure: more than one cloud matched for cloud_environment name '{0}'".format(raw_cloud_env))
-            else:
-                if not urlparse.urlparse(raw_cloud_env).scheme:
-                    self.fail("cloud_environment must be an endpoint discovery URL or one of {0}".format([x.name for x in all_clouds]))
-                try:
-                    self._cloud_environment = azure_cloud.get_cloud_from_metadata_endpoint(raw_cloud_env)
-                except Exception as e:
-                    self.fail("cloud_environment {0} could not be resolved: {1}".format(raw_cloud_env, e.message), exception=traceback.format_exc())
+            self._cloud_environment = self._get_cloud_environment(raw_cloud_env)
 
         if self.credentials.get('subscription_id', None) is None and self.credentials.get('credentials') is None:
             self.fail("Credentials did not include a subscription_id value.")
@@ -1027,11 +1676,14 @@ class AzureRMAuth(object):
         elif self.credentials.get('client_id') is not None and \
                 self.credentials.get('secret') is not None and \
                 self.credentials.get('tenant') is not None:
-                self.azure_credentials = ServicePrincipalCredentials(client_id=self.credentials['client_id'],
-                                                                     secret=self.credentials['secret'],
-                                                                     tenant=self.credentials['tenant'],
-                                                                     cloud_environment=self._cloud_environment,
-                                                                     verify=self._cert_validation_mode == 'validate')
+                self.azure_credentials = self._get_cached_aad_credentials(
+                    cache_key('sp', self.credentials['tenant'], self.credentials['client_id'], self._secret_hash(self.credentials['secret']),
+                              self._resource, self._cloud_environment.name),
+                    lambda: ServicePrincipalCredentials(client_id=self.credentials['client_id'],
+                                                        secret=self.credentials['secret'],
+                                                        tenant=self.credentials['tenant'],
+                                                        cloud_environment=self._cloud_environment,
+                                                        verify=self._cert_validation_mode == 'validate'))
 
         elif self.credentials.get('ad_user') is not None and \
                 self.credentials.get('password') is not None and \
@@ -1051,11 +1703,14 @@ class AzureRMAuth(object):
             if not tenant:
                 tenant = 'common'  # SDK default
 
-            self.azure_credentials = UserPassCredentials(self.credentials['ad_user'],
-                                                         self.credentials['password'],
-                                                         tenant=tenant,
-                                                         cloud_environment=self._cloud_environment,
-                                                         verify=self._cert_validation_mode == 'validate')
+            self.azure_credentials = self._get_cached_aad_credentials(
+                cache_key('user', tenant, self.credentials['ad_user'], self._secret_hash(self.credentials['password']),
+                          self._resource, self._cloud_environment.name),
+                lambda: UserPassCredentials(self.credentials['ad_user'],
+                                            self.credentials['password'],
+                                            tenant=tenant,
+                                            cloud_environment=self._cloud_environment,
+                                            verify=self._cert_validation_mode == 'validate'))
         else:
             self.fail("Failed to authenticate with provided credentials. Some attributes were missing. "
                       "Credentials must include client_id, secret and tenant or ad_user and password, or "
@@ -1065,6 +1720,24 @@ class AzureRMAuth(object):
     def fail(self, msg, exception=None, **kwargs):
         self._fail_impl(msg)
 
+    def _get_cloud_environment(self, raw_cloud_env):
+        if not raw_cloud_env:
+            return azure_cloud.AZURE_PUBLIC_CLOUD  # SDK default
+        # try to look up "well-known" values via the name attribute on azure_cloud members
+        all_clouds = [x[1] for x in inspect.getmembers(azure_cloud) if isinstance(x[1], azure_cloud.Cloud)]
+        matched_clouds = [x for x in all_clouds if x.name == raw_cloud_env]
+        if len(matched_clouds) == 1:
+            return matched_clouds[0]
+        elif len(matched_clouds) > 1:
+            self.fail("Azure SDK failure: more than one cloud matched for cloud_environment name '{0}'".format(raw_cloud_env))
+        else:
+            if not urlparse.urlparse(raw_cloud_env).scheme:
+                self.fail("cloud_environment must be an endpoint discovery URL or one of {0}".format([x.name for x in all_clouds]))
+            try:
+                return azure_cloud.get_cloud_from_metadata_endpoint(raw_cloud_env)
+            except Exception as e:
+                self.fail("cloud_environment {0} could not be resolved: {1}".format(raw_cloud_env, e.message), exception=traceback.format_exc())
+
     def _default_fail_impl(self, msg, exception=None, **kwargs):
         raise AzureRMAuthException(msg)
 
@@ -1088,23 +1761,118 @@ class AzureRMAuth(object):
 
         return None
 
-    def _get_msi_credentials(self, subscription_id_param=None):
-        credentials = MSIAuthentication()
+    @staticmethod
+    def _secret_hash(secret):
+        # tokens are cached per secret so that a wrong secret never reuses a token obtained with the right one
+        return hashlib.sha256(to_bytes(secret)).hexdigest()
+
+    def _cache_token(self, key, token):
+        if not self._token_cache or not token:
+            return
+        try:
+            expires_on = float(token.get('expires_on'))
+        except (TypeError, ValueError):
+            return
+        self._token_cache.set(key, token, expires_on - AZURE_TOKEN_REFRESH_MARGIN)
+
+    def _get_cached_aad_credentials(self, key, create_credentials):
+        '''
+        Return credentials signing with a cached token, or create them and cache their token.
+
+        :param key: token cache key
+        :param create_credentials: callable authenticating against AAD on a cache miss or once the cached token expires
+        :return: credentials object
+        '''
+        token = self._token_cache.get(key) if self._token_cache else None
+        if token:
+            self.log('Using cached AAD token')
+            return AzureRMCachedTokenCredentials(token, create_credentials, lambda new_token: self._cache_token(key, new_token))
+        credentials = create_credentials()
+        self._cache_token(key, credentials.token)
+        return credentials
+
+    def _get_msi_credentials(self, subscription_id_param=None, cloud_environment_param=None):
+        cloud_environment = self._get_cloud_environment(
+            cloud_environment_param or os.environ.get(AZURE_CREDENTIAL_ENV_MAPPING['cloud_environment'], None))
+        token_key = cache_key('msi', None, None, cloud_environment.endpoints.active_directory_resource_id,
+                              cloud_environment.name)
+        credentials = self._get_cached_aad_credentials(token_key,
+                                                       lambda: MSIAuthentication(cloud_environment=cloud_environment))
         subscription_id = subscription_id_param or os.environ.get(AZURE_CREDENTIAL_ENV_MAPPING['subscription_id'], None)
         if not subscription_id:
-            try:
-                # use the first subscription of the MSI
-                subscription_client = SubscriptionClient(credentials)
-                subscription = next(subscription_client.subscriptions.list())
-                subscription_id = str(subscription.subscription_id)
-            except Exception as exc:
-                self.fail("Failed to get MSI token: {0}. "
-                          "Please check whether your machine enabled MSI or grant access to any subscription.".format(str(exc)))
+            subscription_id = self._get_msi_subscription(credentials, cloud_environment)
         return {
             'credentials': credentials,
-            'subscription_id': subscription_id
+            'subscription_id': subscription_id,
+            'cloud_environment': cloud_environment
         }
 
+    def _msi_subscription_ttl(self):
+        try:
+            return int(os.environ.get(AZURE_MSI_SUBSCRIPTION_TTL_ENV, AZURE_MSI_SUBSCRIPTION_TTL))
+        except ValueError:
+            return AZURE_MSI_SUBSCRIPTION_TTL
+
+    def _get_msi_subscription(self, credentials, cloud_environment):
+        '''
+        Return the first subscription the MSI has access to in cloud_environment, from the token cache when possible.
+        '''
+        ttl = self._msi_subscription_ttl()
+        key = cache_key('msi_subscription', cloud_environment.name)
+        if self._token_cache and ttl > 0:
+            subscription_id = self._token_cache.get(key)
+            if subscription_id:
+                self.log('Using cached MSI subscription')
+                self.stats['msi_subscription_cache_hits'] = self.stats.get('msi_subscription_cache_hits', 0) + 1
+                self.cached_msi_subscription_id = subscription_id
+                return subscription_id
+        self.stats['msi_subscription_cache_misses'] = self.stats.get('msi_subscription_cache_misses', 0) + 1
+        try:
+            subscription_id = self._list_msi_subscription(credentials, cloud_environment)
+        except Exception as exc:
+            self.fail("Failed to get MSI token: {0}. "
+                      "Please check whether your machine enabled MSI or grant access to any subscription.".format(str(exc)))
+        if self._token_cache and ttl > 0:
+            self._token_cache.set(key, subscription_id, time.time() + ttl)
+        return subscription_id
+
+    def _list_msi_subscription(self, credentials, cloud_environment):
+        # use the first subscription of the MSI
+        subscription_client = import_azure_type('SubscriptionClient')(credentials,
+                                                                      base_url=cloud_environment.endpoints.resource_manager)
+        subscription = next(subscription_client.subscriptions.list())
+        return str(subscription.subscription_id)
+
+    def invalidate_msi_subscription(self):
+        '''
+        Forget the cached MSI subscription, the next MSI authentication without subscription_id lists subscriptions again.
+        '''
+        if self._token_cache:
+            self._token_cache.delete(cache_key('msi_subscription', self._cloud_environment.name))
+
+    def rediscover_msi_subscription(self):
+        '''
+        Called when the cached MSI subscription was rejected. Forget it and list the subscriptions of the MSI again,
+        once per process; subscription_id is updated when another subscription is found. Safe to call from worker
+        threads, a failure to list the subscriptions keeps the current subscription_id.
+        '''
+        with self._msi_lock:
+            if not self.cached_msi_subscription_id:
+                return
+            self.cached_msi_subscription_id = None
+            self.invalidate_msi_subscription()
+            self.stats['msi_subscription_rejected'] = self.stats.get('msi_subscription_rejected', 0) + 1
+            try:
+                subscription_id = self._list_msi_subscription(self.azure_credentials, self._cloud_environment)
+            except Exception as exc:
+                self.log('Failed to list MSI subscriptions: {0}'.format(str(exc)))
+                return
+            ttl = self._msi_subscription_ttl()
+            if self._token_cache and ttl > 0:
+                self._token_cache.set(cache_key('msi_subscription', self._cloud_environment.name), subscription_id,
+                                      time.time() + ttl)
+            self.subscription_id = subscription_id
+
     def _get_azure_cli_credentials(self):
         credentials, subscription_id = get_azure_cli_credentials()
         cloud_environment = get_cli_active_cloud()
@@ -1145,7 +1913,7 @@ class AzureRMAuth(object):
 
         if auth_source == 'msi':
             self.log('Retrieving credenitals from MSI')
-            return self._get_msi_credentials(arg_credentials['subscription_id'])
+            return self._get_msi_credentials(arg_credentials['subscription_id'], arg_credentials['cloud_environment'])
 
         if auth_source == 'cli':
             if not HAS_AZURE_CLI_CORE:
@@ -1207,7 +1975,10 @@ class AzureRMAuth(object):
         if tenant is not None:
             authority_uri = authority + '/' + tenant
 
-        context = AuthenticationContext(authority_uri)
+        try:
+            context = import_azure_type('AuthenticationContext')(authority_uri)
+        except ImportError as exc:
+            self.fail("Do you have adal installed? Try `pip install ansible[azure]`- {0}".format(exc))
         token_response = context.acquire_token_with_username_password(resource, username, password, client_id)
 
         return AADTokenCredentials(token_response)
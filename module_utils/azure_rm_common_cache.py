@@ -0,0 +1,230 @@
+# Copyright (c) 2018 Ansible Project
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+
+from contextlib import contextmanager
+from os.path import expanduser
+
+from ansible.module_utils._text import to_bytes
+
+try:
+    import fcntl
+except ImportError:
+    # no advisory locking available (eg. Windows); writes are still atomic
+    fcntl = None
+
+
+def cache_key(*parts):
+    '''
+    Build a cache key from a tuple of values.
+
+    :param parts: values identifying the cached item
+    :return: string key
+    '''
+    return '|'.join('' if part is None else str(part) for part in parts)
+
+
+def _ensure_dir(directory):
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, 0o700)
+
+
+def _write_json(path, data):
+    # readers see either the old or the new file, never a partial one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.ansible_cache')
+    try:
+        os.chmod(tmp_path, 0o600)
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump(data, tmp_file)
+        # rename is atomic on POSIX
+        os.rename(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class AzureRMFileCache(object):
+    '''
+    Small JSON key/value store kept in a single permission-restricted file.
+
+    Every entry carries an absolute expiry time. Readers never lock, writers take an exclusive lock on a side
+    file and replace the cache file atomically, so many forked workers can share one cache safely. Any I/O or
+    parse error is treated as a cache miss; the cache never fails a module.
+    '''
+
+    def __init__(self, path):
+        self.path = expanduser(path)
+        self.lock_path = self.path + '.lock'
+
+    def get(self, key):
+        '''
+        Return the value stored for key, or None if it is missing or expired.
+        '''
+        entry = self._read().get(key)
+        if not isinstance(entry, dict) or entry.get('expires_at', 0) <= time.time():
+            return None
+        return entry.get('value')
+
+    def set(self, key, value, expires_at):
+        '''
+        Store value for key until the absolute time expires_at (seconds since the epoch).
+        '''
+        try:
+            with self._lock():
+                data = self._read()
+                data[key] = dict(value=value, expires_at=expires_at)
+                self._write(data)
+        except (IOError, OSError, TypeError, ValueError):
+            pass
+
+    def delete(self, key):
+        '''
+        Drop key from the cache.
+        '''
+        try:
+            with self._lock():
+                data = self._read()
+                if data.pop(key, None) is not None:
+                    self._write(data)
+        except (IOError, OSError, TypeError, ValueError):
+            pass
+
+    def update(self, key, update_fn, expires_at):
+        '''
+        Atomically read, modify and store the value for key while holding the cache lock.
+
+        :param key: cache key
+        :param update_fn: called with the current value (None if missing or expired), returns the new value
+        :param expires_at: absolute expiry of the new value
+        :return: the new value, or the result of update_fn(None) if the cache file could not be used
+        '''
+        try:
+            with self._lock():
+                data = self._read()
+                entry = data.get(key)
+                current = entry.get('value') if isinstance(entry, dict) and entry.get('expires_at', 0) > time.time() else None
+                value = update_fn(current)
+                data[key] = dict(value=value, expires_at=expires_at)
+                self._write(data)
+                return value
+        except (IOError, OSError, TypeError, ValueError):
+            return update_fn(None)
+
+    @contextmanager
+    def _lock(self):
+        self._ensure_dir()
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _ensure_dir(self):
+        _ensure_dir(os.path.dirname(self.path))
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as cache_file:
+                data = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return dict()
+        return data if isinstance(data, dict) else dict()
+
+    def _write(self, data):
+        now = time.time()
+        data = dict((k, v) for k, v in data.items() if isinstance(v, dict) and v.get('expires_at', 0) > now)
+        _write_json(self.path, data)
+
+
+class AzureRMDirectoryCache(object):
+    '''
+    JSON key/value store keeping every entry in its own permission-restricted file of a directory.
+
+    Meant for large values such as response bodies: reading, writing or deleting an entry only touches the file of
+    that key and takes no lock. Files are replaced atomically, the last writer of a key wins. Like AzureRMFileCache,
+    any I/O or parse error is treated as a cache miss.
+    '''
+
+    # share of set calls that also remove the expired files of the directory
+    prune_rate = 0.01
+
+    def __init__(self, path):
+        self.path = expanduser(path)
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, hashlib.sha256(to_bytes(key)).hexdigest() + '.json')
+
+    def get(self, key):
+        '''
+        Return the value stored for key, or None if it is missing or expired.
+        '''
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r') as entry_file:
+                entry = json.load(entry_file)
+        except (IOError, OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('key') != key:
+            return None
+        if entry.get('expires_at', 0) <= time.time():
+            self._remove(path)
+            return None
+        return entry.get('value')
+
+    def set(self, key, value, expires_at):
+        '''
+        Store value for key until the absolute time expires_at (seconds since the epoch).
+        '''
+        try:
+            _ensure_dir(self.path)
+            _write_json(self._entry_path(key), dict(key=key, value=value, expires_at=expires_at))
+        except (IOError, OSError, TypeError, ValueError):
+            return
+        if random.random() < self.prune_rate:
+            self.prune()
+
+    def delete(self, key):
+        '''
+        Drop key from the cache.
+        '''
+        self._remove(self._entry_path(key))
+
+    def prune(self):
+        '''
+        Remove the expired entries.
+        '''
+        now = time.time()
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                with open(path, 'r') as entry_file:
+                    expires_at = json.load(entry_file).get('expires_at', 0)
+            except (IOError, OSError, ValueError, AttributeError):
+                continue
+            if expires_at <= now:
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
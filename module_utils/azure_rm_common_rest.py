@@ -2,7 +2,14 @@
 #
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import os
+import random
+import re
+import time
+
 from ansible.module_utils.ansible_release import __version__ as ANSIBLE_VERSION
+from ansible.module_utils.azure_rm_common_cache import AzureRMDirectoryCache, AzureRMFileCache, cache_key
+from ansible.module_utils.six.moves.urllib.parse import urlencode
 
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -19,6 +26,36 @@ except ImportError:
 
 ANSIBLE_USER_AGENT = 'Ansible/{0}'.format(ANSIBLE_VERSION)
 
+# GET responses carrying an ETag are kept in this directory, one file (mode 0600) per URL, when the response cache is
+# enabled, and dropped after the TTL. Responses of paths that may return keys or secrets are never stored.
+AZURE_REST_CACHE_PATH = '~/.azure/ansible_rest_cache'
+AZURE_REST_CACHE_TTL = 3600
+# requests changing the resource at their URL, POST actions and /batch leave the cache alone
+AZURE_REST_CACHE_INVALIDATING_METHODS = ['PUT', 'PATCH', 'DELETE', 'MERGE']
+AZURE_REST_CACHE_EXCLUDE = re.compile(r'/(list\w*(keys|secrets|credentials)|secrets)(/|$)', re.IGNORECASE)
+
+# ARM accepts up to AZURE_BATCH_SIZE sub-requests per /batch call
+AZURE_BATCH_API_VERSION = '2015-11-01'
+AZURE_BATCH_SIZE = 20
+
+# throttled requests, and failed idempotent ones, are retried up to AZURE_REST_RETRIES times, with jittered exponential
+# backoff from AZURE_REST_RETRY_DELAY seconds unless the service sends Retry-After
+AZURE_REST_RETRIES = 4
+AZURE_REST_RETRY_DELAY = 1
+AZURE_REST_RETRY_MAX_DELAY = 60
+AZURE_REST_RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+AZURE_REST_IDEMPOTENT_METHODS = ['GET', 'HEAD', 'PUT', 'DELETE']
+
+# with ANSIBLE_AZURE_RATE_LIMIT=true, the subscription quota ARM reports back is shared by all forks through this file.
+# Below the threshold, all forks together send one request per interval until the quota recovers.
+AZURE_RATE_LIMIT_PATH = '~/.azure/ansible_rate_limit.json'
+AZURE_RATE_LIMIT_ENV = 'ANSIBLE_AZURE_RATE_LIMIT'
+AZURE_RATE_LIMIT_THRESHOLD = dict(reads=1000, writes=100)
+AZURE_RATE_LIMIT_INTERVAL = dict(reads=0.3, writes=3)
+# a reported quota is trusted this long, and rewritten at most this often while above the threshold
+AZURE_RATE_LIMIT_TTL = 300
+AZURE_RATE_LIMIT_RECORD_INTERVAL = 30
+
 
 class GenericRestClientConfiguration(AzureConfiguration):
 
@@ -39,12 +76,125 @@ class GenericRestClientConfiguration(AzureConfiguration):
         self.subscription_id = subscription_id
 
 
+class AzureRMRateLimiter(object):
+    '''
+    Client side token bucket for the ARM subscription quota, shared by all processes through a file. Only used when
+    ANSIBLE_AZURE_RATE_LIMIT is set to true, as every request near the threshold takes the file lock.
+
+    ARM reports the requests left in x-ms-ratelimit-remaining-subscription-reads and -writes. While the last reported
+    value is above the threshold requests go out freely; below it every request takes the next free slot of a shared
+    schedule, so the forks slow down together before the service starts answering 429.
+    '''
+
+    def __init__(self, subscription_id, path=AZURE_RATE_LIMIT_PATH):
+        self.subscription_id = subscription_id
+        self.cache = AzureRMFileCache(path)
+        self._recorded = dict()
+
+    def _key(self, kind):
+        return cache_key('ratelimit', self.subscription_id, kind)
+
+    def acquire(self, kind):
+        '''
+        Reserve a slot for a request.
+
+        :param kind: 'reads' or 'writes'
+        :return: seconds to wait before sending the request
+        '''
+        state = self.cache.get(self._key(kind))
+        if not state or state['remaining'] > AZURE_RATE_LIMIT_THRESHOLD[kind]:
+            return 0
+
+        now = time.time()
+        slot = [now]
+
+        def reserve(state):
+            state = state or dict(remaining=AZURE_RATE_LIMIT_THRESHOLD[kind], next_slot=now)
+            slot[0] = max(now, state.get('next_slot', now))
+            state['next_slot'] = slot[0] + AZURE_RATE_LIMIT_INTERVAL[kind]
+            state['remaining'] -= 1
+            return state
+
+        self.cache.update(self._key(kind), reserve, now + AZURE_RATE_LIMIT_TTL)
+        return slot[0] - now
+
+    def record(self, kind, remaining):
+        '''
+        Store the quota reported with a response.
+
+        :param kind: 'reads' or 'writes'
+        :param remaining: value of the x-ms-ratelimit-remaining-subscription header
+        '''
+        try:
+            remaining = int(remaining)
+        except (TypeError, ValueError):
+            return
+        now = time.time()
+        if remaining > 2 * AZURE_RATE_LIMIT_THRESHOLD[kind] and now - self._recorded.get(kind, 0) < AZURE_RATE_LIMIT_RECORD_INTERVAL:
+            return
+        self._recorded[kind] = now
+
+        def store(state):
+            state = state or dict(next_slot=now)
+            state['remaining'] = remaining
+            return state
+
+        self.cache.update(self._key(kind), store, now + AZURE_RATE_LIMIT_TTL)
+
+
+class GenericRestCachedResponse(object):
+    '''
+    Stands in for the response of a GET answered with 304 Not Modified, carrying the body stored in the response cache.
+    '''
+
+    def __init__(self, headers, text):
+        self.status_code = 200
+        self.headers = headers
+        self.text = text
+
+
 class GenericRestClient(object):
 
+    # the retry policy of the HTTP adapter differs from the one of the SDK clients, share_session doesn't mix them
+    http_adapter_scope = 'rest'
+
     def __init__(self, credentials, subscription_id, base_url=None):
         self.config = GenericRestClientConfiguration(credentials, subscription_id, base_url)
         self._client = ServiceClient(self.config.credentials, self.config)
+        self._disable_http_retries()
         self.models = None
+        self.response_cache = None
+        self.response_cache_ttl = AZURE_REST_CACHE_TTL
+        self.retries = AZURE_REST_RETRIES
+        self.rate_limiter = None
+        if os.environ.get(AZURE_RATE_LIMIT_ENV, 'false').lower() in ['true', 'yes', '1']:
+            self.rate_limiter = AzureRMRateLimiter(subscription_id)
+        # counters reported back in the module result as azure_stats
+        self.stats = dict()
+
+    def _disable_http_retries(self):
+        # send() retries these status codes itself, urllib3 retrying them too would multiply the attempts and delays
+        retry_policy = getattr(self.config, 'retry_policy', None)
+        policy = getattr(retry_policy, 'policy', None)
+        if policy is None:
+            return
+        policy.status_forcelist = [code for code in policy.status_forcelist or [] if code not in AZURE_REST_RETRY_STATUS_CODES]
+        # urllib3 also retries 429 and 503 carrying Retry-After whatever the forcelist
+        policy.respect_retry_after_header = False
+
+    def enable_response_cache(self, path=AZURE_REST_CACHE_PATH, ttl=AZURE_REST_CACHE_TTL):
+        '''
+        Keep the body and ETag of GET responses on disk. Later GETs of the same URL send If-None-Match and reuse the
+        stored body when the service answers 304 Not Modified. Paths matching AZURE_REST_CACHE_EXCLUDE are not cached.
+
+        :param path: cache directory
+        :param ttl: seconds a response is kept
+        '''
+        self.response_cache = AzureRMDirectoryCache(path)
+        self.response_cache_ttl = ttl
+
+    def _count(self, name):
+        self.stats[name] = self.stats.get(name, 0) + 1
 
     def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes, polling_timeout, polling_interval):
         # Construct and send request
@@ -57,6 +207,16 @@ class GenericRestClient(object):
 
         header_parameters['x-ms-client-request-id'] = str(uuid.uuid1())
 
+        response_key = None
+        cached = None
+        if self.response_cache is not None and not AZURE_REST_CACHE_EXCLUDE.search(url):
+            response_key = cache_key('rest', self.config.base_url, url,
+                                     '&'.join('{0}={1}'.format(k, v) for k, v in sorted((query_parameters or {}).items())))
+            if method == 'GET':
+                cached = self.response_cache.get(response_key)
+                if cached:
+                    header_parameters['If-None-Match'] = cached['etag']
+
         if method == 'GET':
             request = self._client.get(url, query_parameters)
         elif method == 'PUT':
@@ -72,7 +232,21 @@ class GenericRestClient(object):
         elif method == 'MERGE':
             request = self._client.merge(url, query_parameters)
 
-        response = self._client.send(request, header_parameters, body, **operation_config)
+        response = self.send(request, method, header_parameters, body, expected_status_codes, operation_config)
+
+        if response_key is not None:
+            if cached and response.status_code == 304:
+                self._count('rest_cache_hits')
+                return GenericRestCachedResponse(response.headers, cached['text'])
+            if method == 'GET' and response.status_code == 200 and response.headers.get('ETag'):
+                if cached:
+                    self._count('rest_cache_misses')
+                self.response_cache.set(response_key,
+                                        dict(etag=response.headers['ETag'], text=response.text),
+                                        time.time() + self.response_cache_ttl)
+            elif cached or method in AZURE_REST_CACHE_INVALIDATING_METHODS:
+                # the resource is gone or being changed, its stored body is stale
+                self.response_cache.delete(response_key)
 
         if response.status_code not in expected_status_codes:
             exp = CloudError(response)
@@ -89,6 +263,111 @@ class GenericRestClient(object):
 
         return response
 
+    def send(self, request, method, header_parameters, body, expected_status_codes, operation_config):
+        '''
+        Send a request, pacing it by the subscription quota and retrying it when throttled or, for idempotent methods,
+        when the service fails.
+
+        :return: the last response
+        '''
+        kind = 'reads' if method in ['GET', 'HEAD'] else 'writes'
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.acquire(kind)
+                if delay > 0:
+                    self._count('rest_paced_requests')
+                    time.sleep(delay)
+
+            response = self._client.send(request, header_parameters, body, **operation_config)
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(kind, response.headers.get('x-ms-ratelimit-remaining-subscription-' + kind))
+
+            status_code = response.status_code
+            if (attempt >= self.retries or status_code in expected_status_codes or
+                    status_code not in AZURE_REST_RETRY_STATUS_CODES or
+                    (status_code != 429 and method not in AZURE_REST_IDEMPOTENT_METHODS)):
+                return response
+
+            attempt += 1
+            self._count('rest_retries')
+            time.sleep(self.get_retry_delay(response, attempt))
+
+    @staticmethod
+    def get_retry_delay(response, attempt):
+        try:
+            return min(AZURE_REST_RETRY_MAX_DELAY, int(response.headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            # full jitter: spread the retries of all forks over the backoff window
+            return random.uniform(0, min(AZURE_REST_RETRY_MAX_DELAY, AZURE_REST_RETRY_DELAY * 2 ** attempt))
+
+    def query_pages(self, url, query_parameters, header_parameters=None):
+        '''
+        Generator over the items of a paged collection, following nextLink until the last page.
+
+        :param url: collection URL
+        :param query_parameters: query parameters of the first request, nextLink already carries them
+        :param header_parameters: headers sent with every request
+        :return: generator of item dicts
+        '''
+        while url:
+            response = self.query(url, 'GET', query_parameters, dict(header_parameters or {}), None, [200], 0, 0)
+            page = json.loads(response.text)
+            # keep only the parsed page while its items are consumed
+            response = None
+            for item in page.get('value', []):
+                yield item
+            url = page.get('nextLink')
+            query_parameters = {}
+
+    def batch(self, requests, polling_timeout=600):
+        '''
+        Send requests through the ARM batch API, in calls of up to AZURE_BATCH_SIZE sub-requests.
+
+        :param requests: list of dicts with method, url, query_parameters and an optional body
+        :param polling_timeout: seconds to wait for the results of a batch the service completes asynchronously
+        :return: list of dicts with status_code, headers and body (parsed JSON), in the order of requests
+        '''
+        results = []
+        for start in range(0, len(requests), AZURE_BATCH_SIZE):
+            chunk = requests[start:start + AZURE_BATCH_SIZE]
+            body = dict(requests=[self._batch_request(str(index), request) for index, request in enumerate(chunk)])
+            response = self.query('/batch', 'POST', {'api-version': AZURE_BATCH_API_VERSION},
+                                  {'Content-Type': 'application/json; charset=utf-8'}, body, [200, 202], 0, 0)
+            responses = dict((item.get('name'), item) for item in self._batch_responses(response, polling_timeout))
+            for index in range(len(chunk)):
+                item = responses.get(str(index), {})
+                results.append(dict(status_code=item.get('httpStatusCode'),
+                                    headers=item.get('headers', {}),
+                                    body=item.get('content')))
+        return results
+
+    def _batch_request(self, name, request):
+        url = request['url']
+        if '://' not in url:
+            url = self.config.base_url.rstrip('/') + '/' + url.lstrip('/')
+        if request.get('query_parameters'):
+            url += '?' + urlencode(sorted(request['query_parameters'].items()))
+        sub_request = dict(name=name, httpMethod=request['method'], url=url)
+        if request.get('body') is not None:
+            sub_request['content'] = request['body']
+        return sub_request
+
+    def _batch_responses(self, response, timeout):
+        # a batch taking long is answered with 202, its results are then polled from the Location header
+        deadline = time.time() + timeout
+        while response.status_code == 202 and response.headers.get('Location'):
+            if time.time() > deadline:
+                raise Exception('Timed out after {0} seconds waiting for batch results'.format(timeout))
+            try:
+                delay = int(response.headers.get('Retry-After', 5))
+            except ValueError:
+                delay = 5
+            time.sleep(delay)
+            response = self.query(response.headers['Location'], 'GET', {}, None, None, [200, 202], 0, 0)
+        return json.loads(response.text).get('responses', [])
+
     def get_poller_result(self, poller, timeout):
         try:
             poller.wait(timeout=timeout)
@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+
+import pytest
+
+import ansible.module_utils
+from ansible.module_utils.six.moves import BaseHTTPServer, socketserver
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+# the module utils of this repository take precedence over the ones shipped with Ansible
+ansible.module_utils.__path__.insert(0, os.path.join(ROOT, 'module_utils'))
+# modules are imported by name from the library directory
+sys.path.insert(0, os.path.join(ROOT, 'library'))
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def http_server():
+    '''
+    Start local HTTP stand-ins for Azure endpoints, called with a request handler class, returns the server.
+    The base URL of a server is in its base_url attribute.
+    '''
+    servers = []
+
+    def start(handler):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        server.base_url = 'http://127.0.0.1:{0}'.format(server.server_address[1])
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,610 @@
+import inspect
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+from ansible.module_utils.six.moves import BaseHTTPServer
+from ansible.module_utils import azure_rm_common
+from ansible.module_utils.azure_rm_common import share_session, get_connection_stats, AzureRMCachedTokenCredentials
+from ansible.module_utils.azure_rm_common import AZURE_TOKEN_REFRESH_MARGIN, AzureRMModuleBase, AzureRMAuth, select_fields
+from ansible.module_utils.azure_rm_common_cache import AzureRMFileCache, cache_key
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+
+from msrest import Configuration
+from msrest.authentication import Authentication
+from msrest.polling import LROPoller
+from msrest.service_client import ServiceClient
+from msrestazure.azure_cloud import AZURE_PUBLIC_CLOUD
+from msrestazure.azure_configuration import AzureConfiguration
+from msrestazure.polling.arm_polling import ARMPolling
+from multiprocessing.pool import ThreadPool
+
+
+class JSONHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeManagementClient(object):
+    def __init__(self, base_url):
+        self._client = ServiceClient(None, Configuration(base_url))
+
+    def get(self, url):
+        # like the SDK operations, read the body so the connection goes back to the pool
+        response = self._client.send(self._client.get(url))
+        response.json()
+        return response.status_code
+
+
+@pytest.fixture
+def base_url(http_server):
+    return http_server(JSONHandler).base_url
+
+
+@pytest.fixture(autouse=True)
+def adapter_cache(monkeypatch):
+    monkeypatch.setattr(azure_rm_common, '_ADAPTER_CACHE', dict())
+    monkeypatch.delenv(azure_rm_common.AZURE_HTTP_KEEP_ALIVE_ENV, raising=False)
+
+
+def test_share_session_reuses_connections_from_worker_threads(base_url):
+    client = FakeManagementClient(base_url)
+    other_client = FakeManagementClient(base_url)
+    assert share_session(client, base_url)
+    assert share_session(other_client, base_url)
+
+    assert client.get('/') == 200
+
+    pool = ThreadPool(2)
+    try:
+        assert pool.map(lambda c: c.get('/'), [client, other_client]) == [200, 200]
+        sessions = pool.map(lambda c: c._client.config.pipeline._sender.driver.session, [client, client])
+    finally:
+        pool.close()
+        pool.join()
+
+    main_session = client._client.config.pipeline._sender.driver.session
+    adapter = azure_rm_common._ADAPTER_CACHE[base_url]
+    for session in sessions:
+        assert session is not main_session
+        assert session.get_adapter(base_url) is adapter
+
+    stats = get_connection_stats()
+    assert stats['http_requests'] == 3
+    assert stats['http_connections_new'] <= 2
+    assert stats['http_connections_reused'] >= 1
+    assert stats['http_connections_new'] + stats['http_connections_reused'] == 3
+
+
+def test_rest_client_keeps_its_retry_policy_on_its_own_adapter(base_url):
+    client = FakeManagementClient(base_url)
+    rest_client = GenericRestClient(Authentication(), 'sub', base_url)
+    assert share_session(client, base_url)
+    assert share_session(rest_client, base_url)
+
+    assert client.get('/') == 200
+    assert rest_client.query('/', 'GET', {}, None, None, [200], 0, 0).status_code == 200
+
+    adapter = azure_rm_common._ADAPTER_CACHE[base_url]
+    rest_adapter = azure_rm_common._ADAPTER_CACHE[(base_url, 'rest')]
+    assert 503 in adapter.max_retries.status_forcelist
+    assert 503 not in rest_adapter.max_retries.status_forcelist
+
+
+def test_share_session_without_msrest_sessions():
+    assert not share_session(object(), 'https://management.azure.com')
+    assert get_connection_stats() == dict()
+
+
+class FakeCredentials(object):
+    def __init__(self, access_token):
+        self.token = dict(access_token=access_token, expires_on=str(time.time() + 3600))
+        self.refreshed = 0
+
+    def signed_session(self, session=None):
+        session = session or requests.Session()
+        session.headers['Authorization'] = 'Bearer {0}'.format(self.token['access_token'])
+        return session
+
+    def refresh_session(self, session=None):
+        self.refreshed += 1
+        return self.signed_session(session)
+
+
+class CredentialsFactory(object):
+    def __init__(self):
+        self.created = []
+        self.cached = []
+
+    def create(self):
+        self.created.append(FakeCredentials('fresh'))
+        return self.created[-1]
+
+    def cache(self, token):
+        self.cached.append(token)
+
+
+def cached_token(expires_in):
+    return dict(access_token='cached', expires_on=str(time.time() + expires_in))
+
+
+def test_cached_token_signs_while_valid():
+    factory = CredentialsFactory()
+    credentials = AzureRMCachedTokenCredentials(cached_token(AZURE_TOKEN_REFRESH_MARGIN + 600), factory.create, factory.cache)
+
+    session = credentials.signed_session(requests.Session())
+
+    assert session.headers['Authorization'] == 'Bearer cached'
+    assert factory.created == []
+
+
+def test_expiring_cached_token_falls_back_to_new_credentials():
+    factory = CredentialsFactory()
+    credentials = AzureRMCachedTokenCredentials(cached_token(AZURE_TOKEN_REFRESH_MARGIN - 1), factory.create, factory.cache)
+
+    assert credentials.signed_session(requests.Session()).headers['Authorization'] == 'Bearer fresh'
+    assert credentials.signed_session(requests.Session()).headers['Authorization'] == 'Bearer fresh'
+
+    assert len(factory.created) == 1
+    assert factory.cached == [factory.created[0].token]
+    assert credentials.token is factory.created[0].token
+
+
+def test_rejected_cached_token_is_replaced_on_refresh():
+    factory = CredentialsFactory()
+    credentials = AzureRMCachedTokenCredentials(cached_token(AZURE_TOKEN_REFRESH_MARGIN + 600), factory.create, factory.cache)
+
+    session = credentials.refresh_session(requests.Session())
+
+    assert session.headers['Authorization'] == 'Bearer fresh'
+    assert factory.created[0].refreshed == 1
+
+
+class FakeModuleFailure(Exception):
+    pass
+
+
+class FakeModule(object):
+    # skips the argument parsing and authentication of AzureRMModuleBase.__init__
+    def __init__(self):
+        self.module = self
+        self.azure_stats = dict()
+        self._azure_stats_lock = threading.Lock()
+        self.api_profile = None
+
+    def debug(self, msg):
+        pass
+
+    def fail(self, msg, **kwargs):
+        raise FakeModuleFailure(msg)
+
+
+for name in ['log', 'get_serializer', 'serialize_obj', 'serialize_fields', 'get_poller_result', '_wait_for_poller', 'wait_for_deletion', 'get_client_argspec',
+             'get_mgmt_svc_client', '_check_msi_subscription', 'list_resources', 'list_tagged_resources',
+             'map_concurrently', 'has_tags', '_count']:
+    setattr(FakeModule, name, getattr(AzureRMModuleBase, name))
+
+
+class FakePoller(object):
+    def __init__(self, polls=1, error=None):
+        self.polls = polls
+        self.error = error
+        self.waits = 0
+
+    def done(self):
+        return self.waits >= self.polls
+
+    def wait(self, timeout=None):
+        self.waits += 1
+
+    def result(self):
+        if self.error:
+            raise self.error
+        return None
+
+
+class FakeResource(object):
+    def __init__(self, lingering_checks):
+        self.lingering_checks = lingering_checks
+        self.checks = 0
+
+    def exists(self):
+        self.checks += 1
+        return self.checks <= self.lingering_checks
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(azure_rm_common.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def test_get_poller_result_fails_on_timeout(sleeps):
+    module = FakeModule()
+    poller = FakePoller(polls=1000)
+
+    with pytest.raises(FakeModuleFailure) as exc:
+        module.get_poller_result(poller, timeout=0)
+
+    assert str(exc.value) == 'Long running operation did not finish within 0 seconds'
+    assert module.azure_stats['lro_count'] == 1
+
+
+def test_wait_for_deletion_awaits_poller_then_lingering_resource(sleeps):
+    module = FakeModule()
+    poller = FakePoller(polls=2)
+    resource = FakeResource(lingering_checks=3)
+
+    module.wait_for_deletion(resource.exists, poller, delay=1, max_delay=3)
+
+    assert poller.waits == 2
+    assert resource.checks == 4
+    assert len(sleeps) == 3
+    assert 0.5 <= sleeps[0] <= 1
+    assert 1 <= sleeps[1] <= 2
+    assert 1.5 <= sleeps[2] <= 3
+    assert module.azure_stats['delete_checks'] == 3
+    assert module.azure_stats['lro_count'] == 1
+
+
+def test_wait_for_deletion_without_poller(sleeps):
+    module = FakeModule()
+    resource = FakeResource(lingering_checks=0)
+
+    module.wait_for_deletion(resource.exists)
+
+    assert resource.checks == 1
+    assert sleeps == []
+
+
+def test_wait_for_deletion_times_out_on_lingering_resource(monkeypatch):
+    module = FakeModule()
+    resource = FakeResource(lingering_checks=1000)
+    now = [1000.0]
+    monkeypatch.setattr(azure_rm_common.time, 'time', lambda: now[0])
+    monkeypatch.setattr(azure_rm_common.time, 'sleep', lambda seconds: now.__setitem__(0, now[0] + seconds))
+
+    with pytest.raises(FakeModuleFailure) as exc:
+        module.wait_for_deletion(resource.exists, timeout=30, delay=1, max_delay=4)
+
+    assert str(exc.value) == 'Resource still exists 30 seconds after it was deleted'
+    assert now[0] == 1030.0
+
+
+def test_wait_for_deletion_times_out_on_poller(sleeps):
+    module = FakeModule()
+    poller = FakePoller(polls=1000)
+
+    with pytest.raises(FakeModuleFailure) as exc:
+        module.wait_for_deletion(lambda: False, poller, timeout=0)
+
+    assert str(exc.value) == 'Resource still exists 0 seconds after it was deleted'
+
+
+def test_wait_for_deletion_fails_on_delete_error(sleeps):
+    module = FakeModule()
+    poller = FakePoller(error=ValueError('Conflict'))
+
+    with pytest.raises(FakeModuleFailure) as exc:
+        module.wait_for_deletion(lambda: False, poller)
+
+    assert str(exc.value) == 'Error deleting resource: Conflict'
+
+
+class LROHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # a PUT starts an operation that succeeds 0.2 seconds later, reported through Azure-AsyncOperation
+    protocol_version = 'HTTP/1.1'
+
+    def send_json(self, status, body, headers=None):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.started = time.time()
+        status_url = 'http://{0}:{1}/status'.format(*self.server.server_address)
+        self.send_json(201, dict(properties=dict(provisioningState='Creating')), {'Azure-AsyncOperation': status_url})
+
+    def do_GET(self):
+        if self.path == '/status':
+            done = time.time() - self.server.started >= 0.2
+            self.send_json(200, dict(status='Succeeded' if done else 'InProgress'))
+        else:
+            self.send_json(200, dict(properties=dict(provisioningState='Succeeded')))
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeLROClient(object):
+    def __init__(self, credentials, subscription_id, base_url=None):
+        self.config = AzureConfiguration(base_url)
+        self._client = ServiceClient(credentials, self.config)
+        self.models = None
+
+    def create(self):
+        # like the SDK operations, the polling thread starts with the configured delay before the poller is returned
+        request = self._client.put('/resource')
+        response = self._client.send(request, {'Content-Type': 'application/json', 'x-ms-client-request-id': 'test'}, {})
+        return LROPoller(self._client, response, lambda response: response.json(),
+                         ARMPolling(self.config.long_running_operation_timeout))
+
+
+class FakeAuth(object):
+    azure_credentials = None
+    subscription_id = 'sub'
+    cached_msi_subscription_id = None
+    _cert_validation_mode = 'validate'
+
+
+@pytest.fixture
+def lro_url(http_server):
+    return http_server(LROHandler).base_url
+
+
+def test_fast_long_running_operation_is_not_delayed(lro_url, monkeypatch):
+    monkeypatch.setattr(azure_rm_common, '_CLIENT_CACHE', dict())
+    monkeypatch.setitem(azure_rm_common._CLIENT_ARGSPEC_CACHE, FakeLROClient, inspect.getfullargspec(FakeLROClient.__init__))
+    module = FakeModule()
+    module.azure_auth = FakeAuth()
+    client = module.get_mgmt_svc_client(FakeLROClient, base_url=lro_url)
+
+    start = time.time()
+    result = module.get_poller_result(client.create())
+
+    assert result == dict(properties=dict(provisioningState='Succeeded'))
+    assert time.time() - start < 1.5
+    assert module.azure_stats['lro_count'] == 1
+
+
+class SubscriptionHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # the MSI has lost access to subscription "old"
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        status, content = (403, b'{"error": {"code": "AuthorizationFailed"}}') if self.path.startswith('/subscriptions/old/') \
+            else (200, b'{"value": []}')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeResourceGroupsClient(object):
+    def __init__(self, credentials, subscription_id, base_url=None):
+        self.config = AzureConfiguration(base_url)
+        self.config.subscription_id = subscription_id
+        self._client = ServiceClient(credentials, self.config)
+        self.models = None
+
+    def list(self):
+        request = self._client.get('/subscriptions/{0}/resourceGroups'.format(self.config.subscription_id))
+        response = self._client.send(request)
+        response.json()
+        return response.status_code
+
+
+@pytest.fixture
+def msi_module(http_server, monkeypatch, tmp_path):
+    server = http_server(SubscriptionHandler)
+    server.paths = []
+    monkeypatch.setattr(azure_rm_common, '_CLIENT_CACHE', dict())
+    monkeypatch.setitem(azure_rm_common._CLIENT_ARGSPEC_CACHE, FakeResourceGroupsClient,
+                        inspect.getfullargspec(FakeResourceGroupsClient.__init__))
+    # skips the authentication of AzureRMAuth.__init__, the subscription came from the MSI subscription cache
+    auth = AzureRMAuth.__new__(AzureRMAuth)
+    auth._token_cache = AzureRMFileCache(str(tmp_path / 'tokens.json'))
+    auth._token_cache.set(cache_key('msi_subscription', AZURE_PUBLIC_CLOUD.name), 'old', time.time() + 3600)
+    auth._msi_lock = threading.Lock()
+    auth._cloud_environment = AZURE_PUBLIC_CLOUD
+    auth._cert_validation_mode = 'validate'
+    auth.stats = dict()
+    auth.azure_credentials = None
+    auth.subscription_id = auth.cached_msi_subscription_id = 'old'
+    auth.listed = 0
+
+    module = FakeModule()
+    module.azure_auth = auth
+    return module, server
+
+
+def test_rejected_msi_subscription_is_discovered_again(msi_module, monkeypatch):
+    module, server = msi_module
+
+    def list_msi_subscription(credentials, cloud_environment):
+        module.azure_auth.listed += 1
+        return 'new'
+    monkeypatch.setattr(module.azure_auth, '_list_msi_subscription', list_msi_subscription)
+    client = module.get_mgmt_svc_client(FakeResourceGroupsClient, base_url=server.base_url)
+
+    assert client.list() == 200
+    assert client.list() == 200
+
+    assert server.paths == ['/subscriptions/old/resourceGroups', '/subscriptions/new/resourceGroups',
+                            '/subscriptions/new/resourceGroups']
+    assert module.azure_auth.listed == 1
+    assert module.azure_auth.subscription_id == 'new'
+    assert client.config.subscription_id == 'new'
+    assert module.azure_auth._token_cache.get(cache_key('msi_subscription', AZURE_PUBLIC_CLOUD.name)) == 'new'
+
+
+def test_msi_subscription_rejection_without_other_subscription(msi_module, monkeypatch):
+    module, server = msi_module
+
+    def list_msi_subscription(credentials, cloud_environment):
+        module.azure_auth.listed += 1
+        return 'old'
+    monkeypatch.setattr(module.azure_auth, '_list_msi_subscription', list_msi_subscription)
+    client = module.get_mgmt_svc_client(FakeResourceGroupsClient, base_url=server.base_url)
+
+    assert client.list() == 403
+    assert client.list() == 403
+
+    assert len(server.paths) == 2
+    assert module.azure_auth.listed == 1
+    assert module.azure_auth.subscription_id == 'old'
+
+
+class FakeNetworkInterface(object):
+    def __init__(self, name, tags):
+        self.id = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Network/networkInterfaces/{0}'.format(name)
+        self.name = name
+        self.type = 'Microsoft.Network/networkInterfaces'
+        self.tags = tags
+
+
+class FakeResources(object):
+    def __init__(self, resources):
+        self.resources = resources
+
+    def list(self, filter=None):
+        return iter(self.resources)
+
+
+class FakeResourceClient(object):
+    def __init__(self, resources):
+        self.resources = FakeResources(resources)
+
+
+def tagged_nics(count):
+    return [FakeNetworkInterface('nic{0}'.format(index), dict(env='prod')) for index in range(count)]
+
+
+def list_tagged_nics(nics):
+    module = FakeModule()
+    module.rm_client = FakeResourceClient(nics)
+    calls = dict(get=0, list=0)
+
+    def get_nic(resource_group, name):
+        calls['get'] += 1
+        return next(nic for nic in nics if nic.name == name)
+
+    def list_nics():
+        calls['list'] += 1
+        return iter(nics + [FakeNetworkInterface('untagged', None)])
+
+    items = module.list_resources(list_nics, 'Microsoft.Network/networkInterfaces', get_nic, tags=['env:prod'])
+    return sorted(item.name for item in items), calls
+
+
+def test_few_tagged_resources_are_fetched_one_by_one():
+    names, calls = list_tagged_nics(tagged_nics(3))
+
+    assert names == ['nic0', 'nic1', 'nic2']
+    assert calls == dict(get=3, list=0)
+
+
+def test_many_tagged_resources_are_listed_by_type():
+    names, calls = list_tagged_nics(tagged_nics(azure_rm_common.AZURE_TAGGED_GET_LIMIT + 1))
+
+    assert len(names) == azure_rm_common.AZURE_TAGGED_GET_LIMIT + 1
+    assert calls == dict(get=0, list=1)
+
+
+def test_stats_of_concurrent_pollers_are_all_counted(sleeps):
+    module = FakeModule()
+    module.map_concurrently(module.get_poller_result, [FakePoller() for index in range(200)], 16)
+
+    assert module.azure_stats['lro_count'] == 200
+
+
+# run in a fresh interpreter, the other tests already imported SDK packages
+IMPORT_SCRIPT = """
+import json, os, sys, time
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, sys.argv[1])
+start = time.time()
+from ansible.module_utils import azure_rm_common
+elapsed = time.time() - start
+# adal is imported by msrestazure anyway, the SDK packages are the costly ones
+lazy = sorted(set(module for module, package in azure_rm_common.AZURE_LAZY_IMPORTS.values() if module.startswith('azure.')))
+loaded = [module for module in lazy if module in sys.modules]
+start = time.time()
+azure_rm_common.import_azure_type('ComputeManagementClient')
+print(json.dumps(dict(elapsed=elapsed, compute_elapsed=time.time() - start, loaded=loaded)))
+"""
+
+
+def test_management_sdks_are_not_imported_with_azure_rm_common():
+    module_utils = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'module_utils')
+    output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT, os.path.abspath(module_utils)])
+    timing = json.loads(output.decode('utf-8').splitlines()[-1])
+
+    assert timing['loaded'] == []
+    # what every module paid at startup for each SDK before, now only paid by the modules using it
+    print('azure_rm_common import: {0:.3f}s, ComputeManagementClient on first use: {1:.3f}s'.format(
+        timing['elapsed'], timing['compute_elapsed']))
+
+
+COMPUTE_MODELS = 'azure.mgmt.compute.v2018_06_01.models'
+
+
+@pytest.fixture
+def serializers(monkeypatch):
+    monkeypatch.setattr(azure_rm_common, '_SERIALIZER_CACHE', dict())
+    built = []
+    serializer_type = azure_rm_common.Serializer
+
+    def build(classes=None):
+        built.append(classes)
+        return serializer_type(classes=classes)
+    monkeypatch.setattr(azure_rm_common, 'Serializer', build)
+    return built
+
+
+def compute_vm():
+    models = pytest.importorskip(COMPUTE_MODELS)
+    return models.VirtualMachine(location='westus', tags=dict(env='prod'),
+                                 hardware_profile=models.HardwareProfile(vm_size='Standard_A0'),
+                                 os_profile=models.OSProfile(computer_name='vm', admin_username='admin'))
+
+
+def test_serializer_is_built_once_per_model_set(serializers):
+    vm = compute_vm()
+    module = FakeModule()
+
+    for index in range(1000):
+        module.serialize_obj(vm, 'VirtualMachine', [COMPUTE_MODELS])
+    module.serialize_obj(vm, 'VirtualMachine')
+
+    assert module.get_serializer([COMPUTE_MODELS]) is module.get_serializer([COMPUTE_MODELS])
+    assert module.get_serializer([COMPUTE_MODELS]) is not module.get_serializer()
+    assert len(serializers) == 2
+
+
+def test_serialize_fields_matches_serialize_obj(serializers):
+    vm = compute_vm()
+    module = FakeModule()
+    paths = ['location', 'properties.hardwareProfile', 'properties.osProfile.computerName', 'missing']
+
+    full = module.serialize_obj(vm, 'VirtualMachine', [COMPUTE_MODELS])
+
+    assert module.serialize_fields(vm, 'VirtualMachine', paths, [COMPUTE_MODELS]) == select_fields(full, paths)
+    assert module.serialize_fields(vm, 'VirtualMachine', [], [COMPUTE_MODELS]) == full
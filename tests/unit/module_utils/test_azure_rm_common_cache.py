@@ -0,0 +1,32 @@
+import os
+import time
+
+from ansible.module_utils.azure_rm_common_cache import AzureRMDirectoryCache
+
+
+def test_directory_cache_keeps_one_file_per_key(tmp_path):
+    cache = AzureRMDirectoryCache(str(tmp_path / 'cache'))
+    cache.set('a', dict(text='body a'), time.time() + 60)
+    cache.set('b', dict(text='body b'), time.time() + 60)
+
+    assert len(os.listdir(cache.path)) == 2
+    assert cache.get('a') == dict(text='body a')
+    assert cache.get('c') is None
+
+    cache.delete('a')
+    cache.delete('c')
+    assert cache.get('a') is None
+    assert cache.get('b') == dict(text='body b')
+
+
+def test_directory_cache_drops_expired_entries(tmp_path):
+    cache = AzureRMDirectoryCache(str(tmp_path / 'cache'))
+    cache.set('a', 'expired', time.time() - 1)
+    cache.set('b', 'expired', time.time() - 1)
+    cache.set('c', 'valid', time.time() + 60)
+
+    assert cache.get('a') is None
+    assert len(os.listdir(cache.path)) == 2
+    cache.prune()
+    assert len(os.listdir(cache.path)) == 1
+    assert cache.get('c') == 'valid'
@@ -0,0 +1,236 @@
+import json
+import os
+import stat
+
+import pytest
+
+from ansible.module_utils.six.moves import BaseHTTPServer
+from ansible.module_utils import azure_rm_common_rest
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+
+from msrest.authentication import Authentication
+from msrestazure.azure_exceptions import CloudError
+
+
+class FakeResponse(object):
+    def __init__(self, text):
+        self.status_code = 200
+        self.headers = {'ETag': '"1"'}
+        self.text = text
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.delenv(azure_rm_common_rest.AZURE_RATE_LIMIT_ENV, raising=False)
+    client = GenericRestClient(object(), 'sub')
+    client.enable_response_cache(path=str(tmp_path / 'cache'))
+    monkeypatch.setattr(client, 'send', lambda *args: FakeResponse('{"value": "secret"}'))
+    return client
+
+
+def test_rate_limiter_is_opt_in(client, monkeypatch):
+    assert client.rate_limiter is None
+    monkeypatch.setenv(azure_rm_common_rest.AZURE_RATE_LIMIT_ENV, 'true')
+    assert GenericRestClient(object(), 'sub').rate_limiter is not None
+
+
+def test_response_cache_skips_keys_and_secrets(client):
+    urls = ['/subscriptions/sub/providers/Microsoft.Storage/storageAccounts/acct',
+            '/subscriptions/sub/providers/Microsoft.Storage/storageAccounts/acct/listKeys',
+            '/subscriptions/sub/providers/Microsoft.KeyVault/vaults/vault/secrets/password']
+    for url in urls:
+        client.query(url, 'GET', {'api-version': '1'}, None, None, [200], 0, 0)
+
+    names = os.listdir(client.response_cache.path)
+    assert len(names) == 1
+    path = os.path.join(client.response_cache.path, names[0])
+    with open(path) as entry_file:
+        assert json.load(entry_file)['key'].endswith('/acct|api-version=1')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_response_cache_is_invalidated_by_writes_only(client):
+    url = '/subscriptions/sub/resourceGroups/rg'
+    client.query(url, 'GET', {'api-version': '1'}, None, None, [200], 0, 0)
+    assert len(os.listdir(client.response_cache.path)) == 1
+
+    client.query(url, 'POST', {'api-version': '1'}, None, {}, [200], 0, 0)
+    assert len(os.listdir(client.response_cache.path)) == 1
+
+    client.query(url, 'PUT', {'api-version': '1'}, None, {}, [200], 0, 0)
+    assert os.listdir(client.response_cache.path) == []
+
+
+class ETagHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # answers 304 when the client already has the current ETag
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.if_none_match.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"1"':
+            self.send_response(304)
+            self.send_header('ETag', '"1"')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        content = b'{"name": "rg"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', '"1"')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def etag_client(http_server, monkeypatch, tmp_path):
+    monkeypatch.delenv(azure_rm_common_rest.AZURE_RATE_LIMIT_ENV, raising=False)
+    server = http_server(ETagHandler)
+    server.if_none_match = []
+    client = GenericRestClient(Authentication(), 'sub', server.base_url)
+    client.enable_response_cache(path=str(tmp_path / 'cache'))
+    return client, server
+
+
+def test_not_modified_response_reuses_cached_body(etag_client):
+    client, server = etag_client
+    url = '/subscriptions/sub/resourceGroups/rg'
+
+    first = client.query(url, 'GET', {'api-version': '1'}, None, None, [200], 0, 0)
+    second = client.query(url, 'GET', {'api-version': '1'}, None, None, [200], 0, 0)
+
+    assert server.if_none_match == [None, '"1"']
+    assert first.status_code == second.status_code == 200
+    assert json.loads(second.text) == json.loads(first.text) == dict(name='rg')
+    assert client.stats['rest_cache_hits'] == 1
+
+
+def test_expired_response_is_fetched_again(etag_client):
+    client, server = etag_client
+    client.response_cache_ttl = -1
+    url = '/subscriptions/sub/resourceGroups/rg'
+
+    client.query(url, 'GET', {'api-version': '1'}, None, None, [200], 0, 0)
+    response = client.query(url, 'GET', {'api-version': '1'}, None, None, [200], 0, 0)
+
+    assert server.if_none_match == [None, None]
+    assert json.loads(response.text) == dict(name='rg')
+    assert 'rest_cache_hits' not in client.stats
+
+
+class ThrottlingHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # answers with the statuses of server.statuses in turn, then 200
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests += 1
+        status, headers = self.server.statuses.pop(0) if self.server.statuses else (200, {})
+        content = b'{}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def throttled(http_server, monkeypatch):
+    monkeypatch.delenv(azure_rm_common_rest.AZURE_RATE_LIMIT_ENV, raising=False)
+    sleeps = []
+    # urllib3 sleeps through the same module, its retries would show up here too
+    monkeypatch.setattr(azure_rm_common_rest.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(azure_rm_common_rest.random, 'uniform', lambda low, high: high)
+    server = http_server(ThrottlingHandler)
+    server.requests = 0
+    server.statuses = []
+    client = GenericRestClient(Authentication(), 'sub', server.base_url)
+    return client, server, sleeps
+
+
+def test_throttled_request_waits_for_retry_after(throttled):
+    client, server, sleeps = throttled
+    server.statuses = [(429, {'Retry-After': '7'})]
+
+    response = client.query('/subscriptions/sub', 'GET', {}, None, None, [200], 0, 0)
+
+    assert response.status_code == 200
+    assert server.requests == 2
+    assert sleeps == [7]
+    assert client.stats['rest_retries'] == 1
+
+
+def test_failed_request_backs_off_up_to_max_delay(throttled):
+    client, server, sleeps = throttled
+    client.retries = 7
+    server.statuses = [(503, {})] * 7
+
+    response = client.query('/subscriptions/sub', 'GET', {}, None, None, [200], 0, 0)
+
+    assert response.status_code == 200
+    assert server.requests == 8
+    assert sleeps == [2, 4, 8, 16, 32, 60, 60]
+
+
+def test_last_failure_is_raised_once_retries_run_out(throttled):
+    client, server, sleeps = throttled
+    server.statuses = [(503, {'Retry-After': '1'})] * 10
+
+    with pytest.raises(CloudError) as exc:
+        client.query('/subscriptions/sub', 'GET', {}, None, None, [200], 0, 0)
+
+    assert exc.value.status_code == 503
+    # one request per attempt, msrest doesn't retry on top of them
+    assert server.requests == client.retries + 1
+    assert sleeps == [1] * client.retries
+
+
+class BatchHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # answers every sub-request with 200 and its URL, except the ones for missing resources
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        self.server.batches.append(body['requests'])
+        responses = [dict(name=request['name'],
+                          httpStatusCode=404 if 'missing' in request['url'] else 200,
+                          headers={},
+                          content=dict(url=request['url']))
+                     for request in body['requests']]
+        # the service doesn't keep the order of the sub-requests
+        content = json.dumps(dict(responses=list(reversed(responses)))).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_batch_is_sent_in_chunks_and_mapped_back_to_requests(http_server, monkeypatch):
+    monkeypatch.delenv(azure_rm_common_rest.AZURE_RATE_LIMIT_ENV, raising=False)
+    server = http_server(BatchHandler)
+    server.batches = []
+    client = GenericRestClient(Authentication(), 'sub', server.base_url)
+    names = ['missing{0}'.format(index) if index % 10 == 3 else 'rg{0}'.format(index) for index in range(45)]
+    requests = [dict(method='GET', url='/subscriptions/sub/resourceGroups/{0}'.format(name),
+                     query_parameters={'api-version': '1'})
+                for name in names]
+
+    results = client.batch(requests)
+
+    assert [len(batch) for batch in server.batches] == [azure_rm_common_rest.AZURE_BATCH_SIZE] * 2 + [5]
+    assert server.batches[0][0] == dict(name='0', httpMethod='GET',
+                                        url=server.base_url + '/subscriptions/sub/resourceGroups/rg0?api-version=1')
+    assert [result['body']['url'] for result in results] == [server.base_url + request['url'] + '?api-version=1'
+                                                             for request in requests]
+    assert [index for index, result in enumerate(results) if result['status_code'] == 404] == [3, 13, 23, 33, 43]
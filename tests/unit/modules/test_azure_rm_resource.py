@@ -0,0 +1,87 @@
+import pytest
+
+from azure_rm_resource import AzureRMResource
+
+URL = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Network/networkSecurityGroups/{0}'
+
+
+class FakeBatchClient(object):
+    # answers sub-requests from a table of existing resources, PUT to a URL of conflicts fails with 409
+    def __init__(self, resources, conflicts=()):
+        self.resources = resources
+        self.conflicts = conflicts
+        self.batches = []
+
+    def batch(self, requests):
+        self.batches.append([(request['method'], request['url']) for request in requests])
+        results = []
+        for request in requests:
+            if request['method'] == 'GET':
+                exists = request['url'] in self.resources
+                results.append(dict(status_code=200 if exists else 404, headers={},
+                                    body=self.resources.get(request['url'])))
+            elif request['url'] in self.conflicts:
+                results.append(dict(status_code=409, headers={}, body=dict(error=dict(code='Conflict'))))
+            else:
+                results.append(dict(status_code=200, headers={}, body=request['body']))
+        return results
+
+
+class FakeModuleFailure(Exception):
+    def __init__(self, msg, **kwargs):
+        super(FakeModuleFailure, self).__init__(msg)
+        self.kwargs = kwargs
+
+
+def batch_module(client, requests):
+    # skips the argument parsing and authentication of AzureRMModuleBase.__init__
+    module = AzureRMResource.__new__(AzureRMResource)
+    module.mgmt_client = client
+    module.requests = requests
+    module.provider = module.resource_group = module.resource_type = module.resource_name = None
+    module.subresource = []
+    module.api_version = '2018-02-01'
+    module.method = 'PUT'
+    module.body = None
+    module.status_code = [200, 201, 202]
+    module.idempotency = True
+    module.state = 'present'
+
+    def fail(msg, **kwargs):
+        raise FakeModuleFailure(msg, **kwargs)
+    module.fail = fail
+    return module
+
+
+def test_batch_sends_only_the_changed_items():
+    client = FakeBatchClient({URL.format('same'): dict(tags=dict(a='1')),
+                              URL.format('other'): dict(tags=dict(a='1')),
+                              URL.format('gone'): dict(tags=dict(a='1'))})
+    requests = [dict(url=URL.format('same'), body=dict(tags=dict(a='1'))),
+                dict(url=URL.format('other'), body=dict(tags=dict(a='2'))),
+                dict(url=URL.format('new'), body=dict(tags=dict(a='1'))),
+                dict(url=URL.format('absent'), state='absent'),
+                dict(url=URL.format('gone'), state='absent')]
+
+    results = batch_module(client, requests).exec_batch()
+
+    assert [result['changed'] for result in results] == [False, True, True, False, True]
+    assert [result['status_code'] for result in results] == [200, 200, 200, 404, 200]
+    assert results[1]['response'] == dict(tags=dict(a='2'))
+    assert results[4]['response'] is None
+    assert len(client.batches) == 2
+    assert client.batches[1] == [('PUT', URL.format('other')), ('PUT', URL.format('new')), ('DELETE', URL.format('gone'))]
+
+
+def test_batch_reports_failed_items():
+    client = FakeBatchClient({}, conflicts=[URL.format('conflict')])
+    requests = [dict(url=URL.format('new'), body=dict()),
+                dict(url=URL.format('conflict'), body=dict())]
+
+    with pytest.raises(FakeModuleFailure) as exc:
+        batch_module(client, requests).exec_batch()
+
+    assert str(exc.value) == 'Batch request failed for {0}'.format(URL.format('conflict'))
+    responses = exc.value.kwargs['responses']
+    assert [response['status_code'] for response in responses] == [200, 409]
+    assert responses[1]['response'] == dict(error=dict(code='Conflict'))
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from ansible.module_utils.six.moves import BaseHTTPServer
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from azure_rm_resource_facts import AzureRMResourceFacts
+
+from msrest.authentication import Authentication
+from msrestazure.azure_cloud import AZURE_PUBLIC_CLOUD
+
+URL = '/subscriptions/sub/resourceGroups'
+
+
+class PagedHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # two pages of two resource groups, the first one links to the second
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if 'page=2' in self.path:
+            body = dict(value=[dict(name='rg3'), dict(name='rg4')])
+        else:
+            body = dict(value=[dict(name='rg1'), dict(name='rg2')],
+                        nextLink='{0}{1}?api-version=1&page=2'.format(self.server.base_url, URL))
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeAuth(object):
+    _cloud_environment = AZURE_PUBLIC_CLOUD
+    subscription_id = 'sub'
+
+
+class FakeModuleFailure(Exception):
+    pass
+
+
+def list_resource_groups(http_server, max_items):
+    server = http_server(PagedHandler)
+    server.requests = []
+    client = GenericRestClient(Authentication(), 'sub', server.base_url)
+    # skips the argument parsing and authentication of AzureRMModuleBase.__init__
+    module = AzureRMResourceFacts.__new__(AzureRMResourceFacts)
+    module.results = dict(response=None)
+    module.azure_auth = FakeAuth()
+    module.get_mgmt_svc_client = lambda client_type, base_url: client
+
+    def fail(msg, **kwargs):
+        raise FakeModuleFailure(msg)
+    module.fail = fail
+    kwargs = dict(url=URL, provider=None, resource_group=None, resource_type=None, resource_name=None, subresource=[],
+                  api_version='1', response_cache=False, max_items=max_items, select=None)
+    module.module_arg_spec = kwargs
+
+    results = module.exec_module(**kwargs)
+    return [item['name'] for item in results['response']], server.requests
+
+
+def test_all_pages_are_listed_without_max_items(http_server):
+    names, requests = list_resource_groups(http_server, None)
+
+    assert names == ['rg1', 'rg2', 'rg3', 'rg4']
+    assert len(requests) == 2
+
+
+@pytest.mark.parametrize('max_items, expected', [(1, ['rg1']), (2, ['rg1', 'rg2'])])
+def test_listing_stops_at_max_items(http_server, max_items, expected):
+    names, requests = list_resource_groups(http_server, max_items)
+
+    assert names == expected
+    # the next page is not requested once the first one holds enough items
+    assert len(requests) == 1
+
+
+@pytest.mark.parametrize('max_items', [0, -1])
+def test_max_items_below_one_is_rejected(http_server, max_items):
+    with pytest.raises(FakeModuleFailure) as exc:
+        list_resource_groups(http_server, max_items)
+
+    assert str(exc.value) == 'max_items must be at least 1, got {0}'.format(max_items)
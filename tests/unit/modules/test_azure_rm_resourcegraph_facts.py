@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from ansible.module_utils.six.moves import BaseHTTPServer
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from azure_rm_resourcegraph_facts import AzureRMResourceGraphFacts
+
+from msrest.authentication import Authentication
+from msrestazure.azure_cloud import AZURE_PUBLIC_CLOUD
+
+# Resource Graph pages replayed by the stand-in, keyed by the $skipToken of the request. The last page is a table,
+# like the answer of API versions that ignore resultFormat.
+PAGES = {
+    None: {'totalRecords': 5, '$skipToken': 'page2', 'data': [{'name': 'vm1'}, {'name': 'vm2'}]},
+    'page2': {'totalRecords': 5, '$skipToken': 'page3', 'data': [{'name': 'vm3'}, {'name': 'vm4'}]},
+    'page3': {'totalRecords': 5, 'data': {'columns': [{'name': 'name', 'type': 'string'}], 'rows': [['vm5']]}},
+}
+
+
+class ResourceGraphHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        self.server.requests.append(body)
+        content = json.dumps(PAGES[body['options'].get('$skipToken')]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeModuleFailure(Exception):
+    pass
+
+
+class FakeAuth(object):
+    _cloud_environment = AZURE_PUBLIC_CLOUD
+    subscription_id = 'sub'
+
+
+def query(http_server, max_items=None):
+    server = http_server(ResourceGraphHandler)
+    server.requests = []
+    client = GenericRestClient(Authentication(), 'sub', server.base_url)
+    # skips the argument parsing and authentication of AzureRMModuleBase.__init__
+    module = AzureRMResourceGraphFacts.__new__(AzureRMResourceGraphFacts)
+    module.results = dict(changed=False, resources=[], total_records=0)
+    module.azure_auth = FakeAuth()
+    module.get_mgmt_svc_client = lambda client_type, base_url: client
+
+    def fail(msg, **kwargs):
+        raise FakeModuleFailure(msg)
+    module.fail = fail
+    kwargs = dict(query='Resources | project name', subscriptions=['sub'], max_items=max_items, page_size=2,
+                  api_version='2019-04-01')
+    module.module_arg_spec = kwargs
+
+    results = module.exec_module(**kwargs)
+    return results['resources'], server.requests, results
+
+
+def test_query_follows_skip_token_until_last_page(http_server):
+    rows, requests, results = query(http_server)
+
+    assert [row['name'] for row in rows] == ['vm1', 'vm2', 'vm3', 'vm4', 'vm5']
+    assert [request['options'].get('$skipToken') for request in requests] == [None, 'page2', 'page3']
+    assert results['total_records'] == 5
+
+
+@pytest.mark.parametrize('max_items, names, tops', [
+    (1, ['vm1'], [1]),
+    (2, ['vm1', 'vm2'], [2]),
+    (3, ['vm1', 'vm2', 'vm3'], [2, 1]),
+])
+def test_query_stops_at_max_items(http_server, max_items, names, tops):
+    rows, requests, results = query(http_server, max_items=max_items)
+
+    assert [row['name'] for row in rows] == names
+    assert [request['options']['$top'] for request in requests] == tops
+
+
+@pytest.mark.parametrize('max_items', [0, -1])
+def test_max_items_below_one_is_rejected(http_server, max_items):
+    with pytest.raises(FakeModuleFailure) as exc:
+        query(http_server, max_items=max_items)
+
+    assert str(exc.value) == 'max_items must be at least 1, got {0}'.format(max_items)
+
+
+def test_table_page_is_converted_to_object_array():
+    data = {'columns': [{'name': 'name'}, {'name': 'type'}], 'rows': [['vm1', 'microsoft.compute/virtualmachines']]}
+
+    assert AzureRMResourceGraphFacts.page_rows(data) == [{'name': 'vm1', 'type': 'microsoft.compute/virtualmachines'}]
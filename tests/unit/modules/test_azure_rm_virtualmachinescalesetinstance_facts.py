@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+
+import pytest
+
+from ansible.module_utils.six.moves import BaseHTTPServer
+from ansible.module_utils.six.moves.urllib.parse import parse_qs, urlparse
+
+pytest.importorskip('azure.mgmt.compute')
+
+from azure.mgmt.compute import ComputeManagementClient
+from azure_rm_virtualmachinescalesetinstance_facts import AzureRMVirtualMachineScaleSetVMFacts
+
+from msrest.authentication import Authentication
+
+# seconds every request takes on the stand-in
+LATENCY = 0.05
+
+INSTANCE_COUNTS = [1, 4, 12]
+
+
+class ScaleSetHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # the list carries the instance views when asked with $expand=instanceView and the server supports it,
+    # otherwise each one is a request of its own
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        expand = parse_qs(url.query).get('$expand') == ['instanceView'] and self.server.supports_expand
+        with self.server.lock:
+            self.server.requests.append(path)
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        try:
+            time.sleep(LATENCY)
+            if path.endswith('/instanceView'):
+                body = self.instance_view()
+            else:
+                body = dict(value=[self.instance(path, index, expand) for index in range(self.server.instances)])
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def instance(self, path, index, expand):
+        properties = dict(provisioningState='Succeeded')
+        if expand:
+            properties['instanceView'] = self.instance_view()
+        return dict(id='{0}/{1}'.format(path, index), name='vmss_{0}'.format(index),
+                    instanceId=str(index), properties=properties)
+
+    def instance_view(self):
+        return dict(statuses=[dict(code='PowerState/running')])
+
+    def log_message(self, *args):
+        pass
+
+
+def list_instances(http_server, instances, concurrency, supports_expand=True):
+    server = http_server(ScaleSetHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.in_flight = server.max_in_flight = 0
+    server.instances = instances
+    server.supports_expand = supports_expand
+    # skips the argument parsing and authentication of AzureRMModuleBase.__init__
+    module = AzureRMVirtualMachineScaleSetVMFacts.__new__(AzureRMVirtualMachineScaleSetVMFacts)
+    module.log = lambda msg, pretty_print=False: None
+    module.mgmt_client = ComputeManagementClient(Authentication(), 'sub', base_url=server.base_url)
+    module.resource_group = 'rg'
+    module.vmss_name = 'vmss'
+    module.tags = None
+    module.concurrency = concurrency
+    start = time.time()
+    result = module.list()
+    return result, server, time.time() - start
+
+
+@pytest.mark.parametrize('instances', INSTANCE_COUNTS)
+def test_instance_views_come_with_the_list(http_server, instances):
+    expanded, server, _ = list_instances(http_server, instances, 4)
+
+    assert [item['power_state'] for item in expanded] == ['running'] * instances
+    # a single list request whatever the number of instances
+    assert len(server.requests) == 1
+
+
+@pytest.mark.parametrize('instances', INSTANCE_COUNTS)
+def test_instance_views_are_fetched_concurrently_without_expand(http_server, instances):
+    expanded, expanded_server, expanded_elapsed = list_instances(http_server, instances, 4)
+    serial, serial_server, serial_elapsed = list_instances(http_server, instances, 1, supports_expand=False)
+    concurrent, concurrent_server, concurrent_elapsed = list_instances(http_server, instances, 4, supports_expand=False)
+
+    assert [item['power_state'] for item in serial] == ['running'] * instances
+    assert concurrent == serial
+    assert [item['power_state'] for item in expanded] == [item['power_state'] for item in serial]
+    # the same requests are sent either way, one list and one instance view per instance
+    assert len(serial_server.requests) == len(concurrent_server.requests) == instances + 1
+    assert sorted(serial_server.requests) == sorted(concurrent_server.requests)
+    assert serial_server.max_in_flight == 1
+    assert concurrent_server.max_in_flight <= 4
+    # the serial fallback pays the latency once per instance, the expanded list only once
+    assert serial_elapsed >= (instances + 1) * LATENCY
+    assert expanded_elapsed < serial_elapsed
+    if instances > 4:
+        assert 1 < concurrent_server.max_in_flight
+        assert concurrent_elapsed < serial_elapsed